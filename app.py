@@ -1,88 +1,46 @@
 import os
 import sqlite3
-from ultralytics import YOLO
 import json
 import sys
-import shutil
+import time
 from PySide6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout,
     QPushButton, QLineEdit, QLabel,
-    QTableWidget, QTableWidgetItem,
-    QFileDialog, QGraphicsScene,
-    QGraphicsView, QGraphicsPixmapItem,
-    QInputDialog, QDialog, QFormLayout,
-    QMessageBox, QGraphicsRectItem, QGraphicsTextItem,
-    QHBoxLayout, QDateEdit, QDialogButtonBox, QSizePolicy
+    QTableView,
+    QFileDialog,
+    QGraphicsView,
+    QDialog, QFormLayout,
+    QMessageBox,
+    QHBoxLayout, QDateEdit, QDialogButtonBox, QSizePolicy,
+    QProgressBar, QListWidget, QListWidgetItem, QCheckBox,
+    QComboBox, QDoubleSpinBox
 )
-from PySide6.QtCore import Qt
-from PySide6.QtGui import QPen, QBrush, QColor, QFont, QFontMetrics, QPainter, QPixmap
-
-CLASS_NAMES = {
-    0: "Impacted",
-    1: "Caries",
-    2: "Peri Lesion",
-    3: "Deep Caries"
-}
-
-DB_PATH = os.path.join(os.path.dirname(__file__), "data", "patients.db")
-os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-
-def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("""
-      CREATE TABLE IF NOT EXISTS patients (
-        id    INTEGER PRIMARY KEY,
-        name  TEXT NOT NULL,
-        dob   TEXT,
-        email TEXT,
-        user_id INTEGER
-      )
-    """)
-    c.execute("""
-      CREATE TABLE IF NOT EXISTS xrays (
-        id         INTEGER PRIMARY KEY,
-        patient_id INTEGER NOT NULL,
-        filepath   TEXT NOT NULL,
-        prediction TEXT,
-        FOREIGN KEY(patient_id) REFERENCES patients(id)
-      )
-    """)
-    c.execute("""
-      CREATE TABLE IF NOT EXISTS users (
-        id       INTEGER PRIMARY KEY,
-        username TEXT UNIQUE NOT NULL,
-        password TEXT NOT NULL
-      )
-    """)
-    conn.commit()
-    conn.close()
-    
-    # load your model weights
-MODEL_PATH = os.path.join(os.path.dirname(__file__), "model", "best.pt")
-yolo = YOLO(MODEL_PATH)
-
-def predict(image_path):
-    """
-    Run YOLO inference on image_path at conf threshold 0.4.
-    Returns a JSON string of results (class, x1,y1,x2,y2,conf).
-    """
-    results = yolo(image_path, conf=0.4)[0]  
-    boxes = []
-    for *box, conf, cls in results.boxes.data.tolist():
-        x1,y1,x2,y2 = box
-        boxes.append({
-            "class": int(cls),
-            "conf": float(conf),
-            "x1": x1, "y1": y1, "x2": x2, "y2": y2
-        })
-    return json.dumps(boxes)
+from PySide6.QtCore import Qt, QTimer, QModelIndex, QSize
+from PySide6.QtGui import QPainter, QPixmap, QIcon, QKeySequence
+
+from xray_app.blobstore import collect_garbage
+from xray_app.cache import prediction_cache
+from xray_app.config import BATCH_SIZE, CLASS_NAMES, PREFETCH_AHEAD, REFRESH_INTERVAL, THUMBNAIL_SIZE
+from xray_app.credentials import sessions
+from xray_app.db import get_connection, init_db
+from xray_app.detections import insert_xray
+from xray_app.inference import model_manager
+from xray_app.ingest import analyse_xray, collect_images, ingest, reindex, store_xray_file
+from xray_app.refresh import failed_version, mark_viewed
+from xray_app.tracing import record, span
+from xray_app.ui.auth import AuthWorker
+from xray_app.ui.inference_queue import InferenceQueue
+from xray_app.ui.patient_model import PatientTableModel
+from xray_app.ui.perf_panel import PerfPanel
+from xray_app.ui.prefetch import XrayPrefetcher, build_scene
+from xray_app.ui.previews import ThumbnailLoader
+from xray_app.ui.tiles import tile_cache, tile_loader
+
 
 class RegisterDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Register")
-        self.conn = sqlite3.connect(DB_PATH)
         layout = QFormLayout(self)
 
         self.user_in = QLineEdit()
@@ -93,6 +51,10 @@ class RegisterDialog(QDialog):
         layout.addRow(self.btn)
 
         self.btn.clicked.connect(self.register)
+        # the password is hashed off the GUI thread (see credentials.py)
+        self.auth = AuthWorker(self)
+        self.auth.finished.connect(self.on_registered)
+        self.auth.failed.connect(self.on_register_failed)
 
     def register(self):
         u = self.user_in.text().strip()
@@ -100,15 +62,23 @@ class RegisterDialog(QDialog):
         if not u or not p:
             QMessageBox.warning(self, "Error", "Please fill both fields.")
             return
-        try:
-            cur = self.conn.cursor()
-            cur.execute("INSERT INTO users(username,password) VALUES(?,?)", (u, p))
-            self.conn.commit()
-            QMessageBox.information(self, "Success", "Account created!")
-            self.accept()
-        except sqlite3.IntegrityError:
+        self.btn.setEnabled(False)
+        self.btn.setText("Creating account...")
+        self.auth.register(u, p)
+
+    def on_registered(self, user_id):
+        QMessageBox.information(self, "Success", "Account created!")
+        self.accept()
+
+    def on_register_failed(self, error):
+        self.btn.setEnabled(True)
+        self.btn.setText("Create Account")
+        if isinstance(error, sqlite3.IntegrityError):
             QMessageBox.warning(self, "Error", "Username already taken.")
-            
+        else:
+            QMessageBox.warning(self, "Error", str(error))
+
+
 class ZoomableGraphicsView(QGraphicsView):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -118,41 +88,75 @@ class ZoomableGraphicsView(QGraphicsView):
         self.setDragMode(QGraphicsView.ScrollHandDrag)
         # track current zoom level
         self._zoom = 0
+        # False hides DetectionOverlayItem in this view (scene is shared)
+        self.show_overlays = True
+        # views that follow this one's zoom and pan
+        self.linked = []
+        self._syncing = False
+        self.horizontalScrollBar().valueChanged.connect(self._sync_pan)
+        self.verticalScrollBar().valueChanged.connect(self._sync_pan)
+
+    def link(self, other):
+        """Keep zoom and pan of this view and other in step."""
+        self.linked.append(other)
+        other.linked.append(self)
+
+    def _sync_pan(self):
+        if self._syncing:
+            return
+        center = self.mapToScene(self.viewport().rect().center())
+        for view in self.linked:
+            view._syncing = True
+            view.centerOn(center)
+            view._syncing = False
+
+    def zoom(self, zoom_in):
+        # limit zoom levels
+        if (self._zoom < 10 and zoom_in) or (self._zoom > -10 and not zoom_in):
+            factor = 1.25 if zoom_in else 0.8
+            for view in [self] + self.linked:
+                view._zoom += 1 if zoom_in else -1
+                view.scale(factor, factor)
+            self._sync_pan()
 
     def wheelEvent(self, event):
         """Zoom in/out with Ctrl+wheel, otherwise pass through."""
         if event.modifiers() & Qt.ControlModifier:
             # angleDelta.y() is positive when scrolling up
-            zoom_in = event.angleDelta().y() > 0
-            factor = 1.25 if zoom_in else 0.8
-
-            # limit zoom levels
-            if (self._zoom < 10 and zoom_in) or (self._zoom > -10 and not zoom_in):
-                self._zoom += 1 if zoom_in else -1
-                self.scale(factor, factor)
+            self.zoom(event.angleDelta().y() > 0)
         else:
             # no Ctrl: scroll normally
             super().wheelEvent(event)
 
+    def paintEvent(self, event):
+        with span("view.paint"):
+            super().paintEvent(event)
+
     def reset_zoom(self):
         """Reset zoom to default (fitInView)."""
-        self._zoom = 0
-        self.resetTransform()
-        
-class DeselectableTableWidget(QTableWidget):
+        for view in [self] + self.linked:
+            view._zoom = 0
+            view.resetTransform()
+
+
+class DeselectableTableView(QTableView):
     def mousePressEvent(self, event):
         click_point = event.position().toPoint()
         idx = self.indexAt(click_point)
         if not idx.isValid():
             self.clearSelection()
-            self.setCurrentCell(-1, -1)
+            self.setCurrentIndex(QModelIndex())
         super().mousePressEvent(event)
 
+    def currentRow(self):
+        idx = self.currentIndex()
+        return idx.row() if idx.isValid() else -1
+
 class LoginWindow(QWidget):
-    def __init__(self):
+    def __init__(self, resume=None, username=""):
+        """resume: the hidden MainWindow of the last session, shown again if its user logs back in."""
         super().__init__()
         self.setWindowTitle("Login")
-        self.conn = sqlite3.connect(DB_PATH)
         self.resize(400, 250)
         layout = QVBoxLayout(self)
         # App name label
@@ -164,7 +168,7 @@ class LoginWindow(QWidget):
         app_label.setFont(font)
         layout.addWidget(app_label)
 
-        self.user = QLineEdit(); self.user.setPlaceholderText("Username")
+        self.user = QLineEdit(username); self.user.setPlaceholderText("Username")
         self.pw   = QLineEdit(); self.pw.setEchoMode(QLineEdit.Password)
         self.btn_login = QPushButton("Log In")
         self.btn_reg   = QPushButton("Register")
@@ -179,32 +183,76 @@ class LoginWindow(QWidget):
         layout.addLayout(btn_layout)
 
         self.btn_login.clicked.connect(self.check)
+        self.pw.returnPressed.connect(self.check)
         self.btn_reg.clicked.connect(self.open_register)
+        if username:
+            self.pw.setFocus()
+
+        self.resume = resume
+        self.pending = None
+        self.auth = AuthWorker(self)
+        self.auth.finished.connect(self.on_authenticated)
+        self.auth.failed.connect(self.on_auth_failed)
 
     def open_register(self):
         rd = RegisterDialog(self)
         rd.exec()
 
     def check(self):
+        if self.pending is not None:
+            return
         u = self.user.text().strip()
         p = self.pw.text().strip()
-        cur = self.conn.cursor()
-        cur.execute("SELECT id FROM users WHERE username=? AND password=?", (u,p))
-        row = cur.fetchone()
-        if row:
-            self.close()
-            user_id = row[0]
-            self.main = MainWindow(user_id)
-            self.main.showMaximized()
-        else:
+        # a recent session of this user is checked without the KDF
+        resumed = sessions.resume(u, p)
+        if resumed:
+            self.open_main(*resumed)
+            return
+        self.pending = (u, p)
+        self.set_busy(True)
+        self.auth.login(u, p)
+
+    def set_busy(self, busy):
+        for w in (self.user, self.pw, self.btn_login, self.btn_reg):
+            w.setEnabled(not busy)
+        self.btn_login.setText("Checking..." if busy else "Log In")
+
+    def on_authenticated(self, user_id):
+        u, p = self.pending
+        self.pending = None
+        self.set_busy(False)
+        if user_id is None:
             QMessageBox.warning(self, "Error", "Invalid credentials")
-            
+            return
+        self.open_main(sessions.open(user_id, u, p), user_id)
+
+    def on_auth_failed(self, error):
+        self.pending = None
+        self.set_busy(False)
+        QMessageBox.warning(self, "Error", f"Login failed: {error}")
+
+    def open_main(self, session, user_id):
+        self.close()
+        if self.resume is not None and session is not None and self.resume.session == session:
+            # same user within the session: the window comes back as it was left
+            self.main = self.resume
+            self.main.showMaximized()
+            return
+        if self.resume is not None:
+            self.resume.end_session()
+        self.main = MainWindow(user_id, session, self.user.text().strip())
+        self.main.showMaximized()
+
+
 class MainWindow(QWidget):
-    def __init__(self, user_id):
+    def __init__(self, user_id, session=None, username=""):
         super().__init__()
         self.user_id = user_id
+        # token in credentials.sessions; with one, logout and lock only hide the window
+        self.session = session
+        self.username = username
         self.setWindowTitle("X-ray Management App")
-        self.conn = sqlite3.connect(DB_PATH)
+        self.conn = get_connection()
         self.setWindowFlags(Qt.Window)  # Ensure standard window frame
         main_layout = QVBoxLayout(self)
         # Top bar with logout button and patient list title
@@ -217,33 +265,93 @@ class MainWindow(QWidget):
         lbl_patient_list.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
         top_bar.addWidget(lbl_patient_list)
         top_bar.addStretch()
+        # model readiness indicator (weights load in the background)
+        self.lbl_model = QLabel()
+        top_bar.addWidget(self.lbl_model)
+        self.model_timer = QTimer(self)
+        self.model_timer.timeout.connect(self.update_model_status)
+        # once it is ready, predictions made by older weights are redone a
+        # batch at a time while the inference queue is otherwise idle
+        self.refresh_job = None
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh_stale_predictions)
+        # after a pass that finds nothing, only the weights file is watched
+        self.refreshed_version = None
+        self.version_timer = QTimer(self)
+        self.version_timer.timeout.connect(self.check_model_version)
+        self.update_model_status()
+        if not model_manager.is_ready():
+            self.model_timer.start(250)
+        self.perf_panel = None
+        self.btn_perf = QPushButton("Performance")
+        self.btn_perf.clicked.connect(self.show_perf_panel)
+        top_bar.addWidget(self.btn_perf)
+        self.btn_lock = QPushButton("Lock")
+        top_bar.addWidget(self.btn_lock)
+        self.btn_lock.clicked.connect(self.lock)
+        self.btn_lock.setVisible(session is not None)
         self.btn_logout = QPushButton("Logout")
         top_bar.addWidget(self.btn_logout)
         self.btn_logout.clicked.connect(self.logout)
         main_layout.addLayout(top_bar)
         layout = QVBoxLayout()
         main_layout.addLayout(layout)
+        # Search-as-you-type, debounced so typing doesn't query on every key
+        self.search_box = QLineEdit()
+        self.search_box.setPlaceholderText("Search patients by name, email or date of birth")
+        self.search_box.setClearButtonEnabled(True)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(150)
+        self.search_timer.timeout.connect(self.lookup_patient)
+        self.search_box.textChanged.connect(self.search_timer.start)
+        self.search_box.returnPressed.connect(self.lookup_patient)
+        layout.addWidget(self.search_box)
+        # Filter by finding, evaluated in SQL against the detections table
+        finding_bar = QHBoxLayout()
+        self.cmb_finding = QComboBox()
+        self.cmb_finding.addItem("All patients", None)
+        for cls, cls_name in CLASS_NAMES.items():
+            self.cmb_finding.addItem(f"With {cls_name}", cls)
+        self.spin_conf = QDoubleSpinBox()
+        self.spin_conf.setRange(0.0, 1.0)
+        self.spin_conf.setSingleStep(0.05)
+        self.spin_conf.setValue(0.5)
+        self.spin_conf.setPrefix("conf ≥ ")
+        # every spin step would re-run the filter: wait for the value to settle, as for search
+        self.finding_timer = QTimer(self)
+        self.finding_timer.setSingleShot(True)
+        self.finding_timer.setInterval(150)
+        self.finding_timer.timeout.connect(self.filter_by_finding)
+        # the signals' argument would be taken as the interval by start(msec)
+        self.cmb_finding.currentIndexChanged.connect(lambda *_: self.finding_timer.start())
+        self.spin_conf.valueChanged.connect(lambda *_: self.finding_timer.start())
+        finding_bar.addWidget(QLabel("Finding:"))
+        finding_bar.addWidget(self.cmb_finding, 1)
+        finding_bar.addWidget(self.spin_conf)
+        layout.addLayout(finding_bar)
         # Patient list
-        self.table = DeselectableTableWidget(0, 3)
-        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
-        self.table.setHorizontalHeaderLabels(["Name", "Date of Birth", "Email"])
-        self.load_patients()
+        self.patients = PatientTableModel(self.conn, self.user_id, parent=self)
+        self.table = DeselectableTableView()
+        self.table.setModel(self.patients)
+        self.table.setEditTriggers(QTableView.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableView.SelectRows)
+        self.table.setSelectionMode(QTableView.SingleSelection)
+        self.table.setSortingEnabled(True)
+        self.table.sortByColumn(0, Qt.AscendingOrder)
         layout.addWidget(self.table)
         # Patient controls
         patient_btns = QHBoxLayout()
         btn_new = QPushButton("New Patient")
         btn_remove = QPushButton("Remove Patient")
-        btn_lookup = QPushButton("Look Up Patient")
         btn_show_all = QPushButton("Show All Patients")
         patient_btns.addWidget(btn_new)
         patient_btns.addWidget(btn_remove)
-        patient_btns.addWidget(btn_lookup)
         patient_btns.addWidget(btn_show_all)
         layout.addLayout(patient_btns)
         btn_new.clicked.connect(self.new_patient)
         btn_remove.clicked.connect(self.remove_patient)
-        btn_lookup.clicked.connect(self.lookup_patient)
-        btn_show_all.clicked.connect(self.load_patients)
+        btn_show_all.clicked.connect(self.show_all_patients)
         
         # X-ray section
         xray_btns = QHBoxLayout()
@@ -257,8 +365,31 @@ class MainWindow(QWidget):
         self.btn_immediate_xray.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Preferred)
         self.btn_immediate_xray.clicked.connect(self.immediate_xray_test)
         xray_btns.addWidget(self.btn_immediate_xray)
+        self.btn_bulk_import = QPushButton("Bulk Import X-rays")
+        self.btn_bulk_import.setMinimumWidth(0)
+        self.btn_bulk_import.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Preferred)
+        self.btn_bulk_import.clicked.connect(self.bulk_import_xrays)
+        xray_btns.addWidget(self.btn_bulk_import)
         layout.addLayout(xray_btns)
         layout.addWidget(self.btn_add_xray)
+
+        # Background inference: pending jobs indicator + cancel
+        self.inference = InferenceQueue(self)
+        self.inference.finished.connect(self.on_prediction_ready)
+        self.inference.failed.connect(self.on_prediction_failed)
+        self.inference.pending_changed.connect(self.update_pending_jobs)
+        self.jobs = {}
+        jobs_bar = QHBoxLayout()
+        self.lbl_jobs = QLabel()
+        self.job_progress = QProgressBar()
+        self.job_progress.setRange(0, 0)  # busy indicator
+        self.btn_cancel_jobs = QPushButton("Cancel Pending X-rays")
+        self.btn_cancel_jobs.clicked.connect(self.cancel_pending_jobs)
+        jobs_bar.addWidget(self.lbl_jobs)
+        jobs_bar.addWidget(self.job_progress)
+        jobs_bar.addWidget(self.btn_cancel_jobs)
+        layout.addLayout(jobs_bar)
+        self.update_pending_jobs(0)
         
         # View X-ray history button
         self.btn_xray_history = QPushButton("View X-ray History")
@@ -273,6 +404,17 @@ class MainWindow(QWidget):
         font.setPointSize(12)
         orig_label.setFont(font); pred_label.setFont(font)
         self.viewer_orig = ZoomableGraphicsView(); self.viewer_pred = ZoomableGraphicsView()
+        self.viewer_orig.show_overlays = False
+        self.viewer_orig.link(self.viewer_pred)
+        self.xray_scene = None
+        self.overlay = None
+        self.shown_xray_id = None
+        # scenes of the history's neighbouring X-rays, built ahead of time
+        self.prefetcher = XrayPrefetcher(self)
+        QApplication.instance().aboutToQuit.connect(self.prefetcher.stop)
+        self.history = []
+        self.history_pid = None
+        self.history_index = -1
         layout.addWidget(orig_label); layout.addWidget(self.viewer_orig)
         layout.addWidget(pred_label); layout.addWidget(self.viewer_pred)
 
@@ -281,24 +423,60 @@ class MainWindow(QWidget):
         self.btn_zoom_in = QPushButton("Zoom In")
         self.btn_zoom_out = QPushButton("Zoom Out")
         self.btn_zoom_reset = QPushButton("Reset Zoom")
+        self.chk_overlay = QCheckBox("Show Detections")
+        self.chk_overlay.setChecked(True)
+        self.chk_overlay.toggled.connect(self.toggle_overlay)
         zoom_layout.addWidget(self.btn_zoom_in)
         zoom_layout.addWidget(self.btn_zoom_out)
         zoom_layout.addWidget(self.btn_zoom_reset)
+        zoom_layout.addWidget(self.chk_overlay)
+        zoom_layout.addStretch()
+        self.btn_prev_xray = QPushButton("Previous X-ray")
+        self.btn_prev_xray.setShortcut(QKeySequence("Alt+Left"))
+        self.btn_prev_xray.clicked.connect(self.show_previous_xray)
+        self.btn_next_xray = QPushButton("Next X-ray")
+        self.btn_next_xray.setShortcut(QKeySequence("Alt+Right"))
+        self.btn_next_xray.clicked.connect(self.show_next_xray)
+        zoom_layout.addWidget(self.btn_prev_xray)
+        zoom_layout.addWidget(self.btn_next_xray)
+        self.update_history_nav()
         layout.addLayout(zoom_layout)
         self.btn_zoom_in.clicked.connect(self.zoom_in)
         self.btn_zoom_out.clicked.connect(self.zoom_out)
         self.btn_zoom_reset.clicked.connect(self.zoom_reset)
 
-    
+    def update_model_status(self):
+        state = model_manager.state
+        mode = ", tiled" if model_manager.tiled else ""
+        self.lbl_model.setText(f"Model ({model_manager.backend}{mode}): {state}")
+        if state == model_manager.FAILED:
+            self.lbl_model.setToolTip(str(model_manager.error))
+        if state in (model_manager.READY, model_manager.FAILED):
+            self.model_timer.stop()
+        if state == model_manager.READY and REFRESH_INTERVAL > 0:
+            self.refresh_timer.start(int(REFRESH_INTERVAL * 1000))
+
     def load_patients(self):
-        cur = self.conn.cursor()
-        rows = cur.execute("SELECT name, dob, email FROM patients WHERE user_id=?", (self.user_id,)).fetchall()
-        self.table.setRowCount(len(rows))
-        for i, (name, dob, email) in enumerate(rows):
-            self.table.setItem(i, 0, QTableWidgetItem(name if name else "no data"))
-            self.table.setItem(i, 1, QTableWidgetItem(dob if dob else "no data"))
-            self.table.setItem(i, 2, QTableWidgetItem(email if email else "no data"))
-    
+        self.patients.reload()
+
+    def show_all_patients(self):
+        self.search_box.clear()
+        self.cmb_finding.setCurrentIndex(0)
+        self.filter_by_finding()
+        self.lookup_patient()
+
+    def filter_by_finding(self):
+        self.finding_timer.stop()
+        self.patients.set_finding_filter(self.cmb_finding.currentData(), self.spin_conf.value())
+
+    def selected_patient(self, title="Error", text="Please select a patient."):
+        """(patient id, name) of the selected row, or None after warning the user."""
+        idx = self.table.currentRow()
+        if idx < 0:
+            QMessageBox.warning(self, title, text)
+            return None
+        return self.patients.patient_id(idx), self.patients.patient_name(idx)
+
     def new_patient(self):
         dialog = QDialog(self)
         dialog.setWindowTitle("Add New Patient")
@@ -330,133 +508,241 @@ class MainWindow(QWidget):
         dialog.exec()
     
     def add_xray(self):
-        idx = self.table.currentRow()
-        if idx < 0:
-            QMessageBox.warning(self, "No Patient Selected", "Please select a patient.")
-            return
-        # Get patient name from table, then fetch id from DB
-        name = self.table.item(idx, 0).text()
-        cur = self.conn.cursor()
-        row = cur.execute("SELECT id FROM patients WHERE name=?", (name,)).fetchone()
-        if not row:
-            QMessageBox.warning(self, "Error", "Patient not found in database.")
+        selected = self.selected_patient("No Patient Selected")
+        if not selected:
             return
-        pid = row[0]
+        pid, _ = selected
         file, _ = QFileDialog.getOpenFileName(self, "Select X-ray", "", "Images (*.png *.jpg *.jpeg)")
         if not file: return
-        # copy into data/xrays/
-        dest_dir = os.path.join("data","xrays",str(pid))
-        os.makedirs(dest_dir, exist_ok=True)
-        fname = os.path.basename(file)
-        dest = os.path.join(dest_dir, fname)
-        shutil.copy(file, dest)
-        # run prediction
-        pred_json = predict(dest)
-        cur = self.conn.cursor()
-        cur.execute(
-          "INSERT INTO xrays(patient_id,filepath,prediction) VALUES(?,?,?)",
-          (pid, dest, pred_json)
-        )
-        self.conn.commit()
-        self.show_xray(dest, pred_json)
-    
-    def show_xray(self, img_path, pred_json):
-        # load prediction data
-        boxes = json.loads(pred_json)
-
-        # --- ORIGINAL IMAGE (unchanged) ---
-        scene1 = QGraphicsScene()
-        pix1 = QPixmap(img_path)
-        scene1.addItem(QGraphicsPixmapItem(pix1))
-        self.viewer_orig.setScene(scene1)
-        self.viewer_orig.resetTransform()
-        self.viewer_orig.setRenderHint(QPainter.Antialiasing)
-        self.viewer_orig.setDragMode(QGraphicsView.ScrollHandDrag)
-        self.viewer_orig.fitInView(scene1.sceneRect(), Qt.KeepAspectRatio)
-
-        # --- PREDICTION IMAGE WITH COLORED BOXES + LABELS ---
-        scene2 = QGraphicsScene()
-        pix2 = QPixmap(img_path)
-        scene2.addItem(QGraphicsPixmapItem(pix2))
-
-        # configure pen/brush/font
-        pen = QPen(QColor(0, 255, 255), 2)             # cyan, width 2
-        font = QFont(); font.setPointSize(10); font.setBold(True)
-
-        for b in boxes:
-            x1, y1 = b["x1"], b["y1"]
-            w, h   = b["x2"] - x1, b["y2"] - y1
-            cls, conf = b["class"], b["conf"]
-            label = f"{CLASS_NAMES.get(cls, cls)} {conf:.2f}"
-
-            # 1) box
-            rect_item = QGraphicsRectItem(x1, y1, w, h)
-            rect_item.setPen(pen)
-            scene2.addItem(rect_item)
-
-            # 2) text background
-            # measure text size crudely
-            metrics = QFontMetrics(font)
-            tw = metrics.horizontalAdvance(label) + 4
-            th = metrics.height() + 2
-
-            bg = QGraphicsRectItem(x1, y1 - th, tw, th)
-            bg.setBrush(QBrush(QColor(0, 0, 0, 160)))   # semi-transparent black
-            bg.setPen(QPen(Qt.NoPen))
-            scene2.addItem(bg)
-
-            # 3) text
-            text_item = QGraphicsTextItem(label)
-            text_item.setDefaultTextColor(QColor(0, 255, 255))
-            text_item.setFont(font)
-            text_item.setPos(x1 + 2, y1 - th + 1)
-            scene2.addItem(text_item)
-
-        # set up the view
-        self.viewer_pred.setScene(scene2)
-        self.viewer_pred.resetTransform()
-        self.viewer_pred.setRenderHint(QPainter.Antialiasing)
-        self.viewer_pred.setDragMode(QGraphicsView.ScrollHandDrag)
-        self.viewer_pred.fitInView(scene2.sceneRect(), Qt.KeepAspectRatio)
+        start = time.perf_counter()
+        # copy and predict in the background, the row is stored once it is done
+        def on_done(result):
+            dest, pred_json = result
+            with span("add_xray.store"):
+                insert_xray(self.conn, pid, dest, pred_json, model_manager.model_hash())
+                self.conn.commit()
+            self.show_xray(dest, pred_json)
+            record("add_xray.total", (time.perf_counter() - start) * 1000)
+        job_id = self.inference.submit_task(self._run_add_xray, file)
+        self.jobs[job_id] = (os.path.basename(file), on_done)
+
+    @staticmethod
+    def _run_add_xray(file):
+        # hashing and copying a large file would freeze the GUI; the inference thread has its own connection
+        dest = store_xray_file(get_connection(), file)
+        return dest, analyse_xray(dest)
+
+    def bulk_import_xrays(self):
+        selected = self.selected_patient("No Patient Selected")
+        if not selected:
+            return
+        pid, name = selected
+        box = QMessageBox(self)
+        box.setWindowTitle("Bulk Import")
+        box.setText(f"Import X-rays for '{name}' from:")
+        btn_files = box.addButton("Files...", QMessageBox.AcceptRole)
+        btn_folder = box.addButton("Folder...", QMessageBox.AcceptRole)
+        box.addButton(QMessageBox.Cancel)
+        box.exec()
+        if box.clickedButton() == btn_files:
+            paths, _ = QFileDialog.getOpenFileNames(self, "Select X-rays", "", "Images (*.png *.jpg *.jpeg)")
+        elif box.clickedButton() == btn_folder:
+            folder = QFileDialog.getExistingDirectory(self, "Select X-ray Folder")
+            paths = [folder] if folder else []
+        else:
+            return
+        files = collect_images(paths)
+        if not files:
+            return
+        def on_done(report):
+            QMessageBox.information(self, "Bulk Import", str(report))
+        job_id = self.inference.submit_task(self._run_ingest, pid, files, cancellable=True)
+        self.jobs[job_id] = (f"{len(files)} X-rays", on_done)
+
+    @staticmethod
+    def _run_ingest(pid, files, cancelled):
+        # runs on the inference thread, which gets its own pooled connection
+        return ingest(get_connection(), pid, files, cancelled=cancelled)
+
+    def on_prediction_ready(self, job_id, result):
+        _, on_done = self.jobs.pop(job_id)
+        on_done(result)
+
+    def on_prediction_failed(self, job_id, message):
+        what, _ = self.jobs.pop(job_id)
+        if job_id == self.refresh_job:
+            # background work: stop retrying instead of interrupting the user
+            self.refresh_job = None
+            self.refresh_timer.stop()
+            return
+        QMessageBox.warning(self, "Prediction Failed", f"{what}: {message}")
 
+    def update_pending_jobs(self, pending):
+        self.lbl_jobs.setText(f"{pending} X-ray(s) being analysed")
+        for w in (self.lbl_jobs, self.job_progress, self.btn_cancel_jobs):
+            w.setVisible(pending > 0)
+
+    def cancel_pending_jobs(self):
+        for job_id in self.inference.cancel_all():
+            self.jobs.pop(job_id, None)
+        self.refresh_job = None
+
+    def refresh_stale_predictions(self):
+        if self.refresh_job is not None or self.inference.pending() or not model_manager.is_ready():
+            return
+        def on_done(result):
+            count, version = result
+            self.refresh_job = None
+            if count == BATCH_SIZE:
+                # more to do: keep going without waiting for the timer
+                QTimer.singleShot(0, self.refresh_stale_predictions)
+            elif count == 0:
+                self.refresh_timer.stop()
+                self.refreshed_version = version
+                self.version_timer.start(int(REFRESH_INTERVAL * 1000))
+        self.refresh_job = self.inference.submit_task(self._run_refresh, priority=-1)
+        self.jobs[self.refresh_job] = ("Stale predictions", on_done)
+
+    def check_model_version(self):
+        if model_manager.model_hash() != self.refreshed_version:
+            # new weights: everything they did not predict is stale again
+            self.version_timer.stop()
+            self.refresh_timer.start(int(REFRESH_INTERVAL * 1000))
+
+    @staticmethod
+    def _run_refresh():
+        # rows skipped (missing or unreadable) count too: they were dealt with
+        report = reindex(get_connection(), limit=BATCH_SIZE)
+        return report.count + report.skipped, model_manager.model_hash()
+    
+    def show_xray(self, img_path, pred_json, xray_id=None):
+        with span("show_xray"):
+            self._show_xray(img_path, pred_json, xray_id)
+
+    def _show_xray(self, img_path, pred_json, xray_id):
+        self.shown_xray_id = xray_id
+        self.prefetcher.pin(xray_id)
+        built = self.prefetcher.take(xray_id, img_path, pred_json) if xray_id is not None else None
+        if built is None:
+            built = build_scene(img_path, json.loads(pred_json), parent=self)
+            if xray_id is not None:
+                self.prefetcher.add(xray_id, img_path, pred_json, built)
+        scene, image, self.overlay = built
+        self.overlay.setVisible(self.chk_overlay.isChecked())
+        if self.xray_scene is not None and self.xray_scene is not scene \
+                and not self.prefetcher.holds(self.xray_scene):
+            self.xray_scene.deleteLater()
+        self.xray_scene = scene
+
+        for viewer in (self.viewer_orig, self.viewer_pred):
+            viewer.setScene(scene)
+            viewer._zoom = 0
+            viewer.resetTransform()
+            viewer.fitInView(image.sceneBoundingRect(), Qt.KeepAspectRatio)
+
+    def toggle_overlay(self, checked):
+        if self.overlay is not None:
+            self.overlay.setVisible(checked)
 
     def zoom_in(self):
-        self.viewer_pred.scale(1.25, 1.25)
-        self.viewer_orig.scale(1.25, 1.25)
+        self.viewer_pred.zoom(True)
     def zoom_out(self):
-        self.viewer_pred.scale(0.8, 0.8)
-        self.viewer_orig.scale(0.8, 0.8)
+        self.viewer_pred.zoom(False)
     def zoom_reset(self):
         self.viewer_pred.reset_zoom()
-        self.viewer_orig.reset_zoom()
+
+    def show_history(self, index):
+        """Show entry index of the history list and prepare its neighbours."""
+        self.history_index = index
+        xid, fpath, pred, _ = self.history[index]
+        self.show_xray(fpath, pred, xid)
+        self.update_history_nav()
+        self.prefetch_around(self.history, index)
+
+    def prefetch_around(self, rows, index):
+        """Prepare history rows index±PREFETCH_AHEAD; the next one first, as stepping on is likelier than back."""
+        order = [index]
+        for step in range(1, PREFETCH_AHEAD + 1):
+            order += [index + step, index - step]
+        self.prefetcher.prefetch([rows[i][:3] for i in order if 0 <= i < len(rows)])
+
+    def show_next_xray(self):
+        if 0 <= self.history_index < len(self.history) - 1:
+            self.show_history(self.history_index + 1)
+
+    def show_previous_xray(self):
+        if self.history_index > 0:
+            self.show_history(self.history_index - 1)
+
+    def update_history_nav(self):
+        self.btn_prev_xray.setEnabled(self.history_index > 0)
+        self.btn_next_xray.setEnabled(0 <= self.history_index < len(self.history) - 1)
 
     def view_xray_history(self):
-        idx = self.table.currentRow()
-        if idx < 0:
-            QMessageBox.warning(self, "Error", "Please select a patient.")
+        selected = self.selected_patient()
+        if not selected:
             return
-        # Get patient name from table, then fetch id from DB
-        name = self.table.item(idx, 0).text()
-        cur = self.conn.cursor()
-        row = cur.execute("SELECT id FROM patients WHERE name=?", (name,)).fetchone()
-        if not row:
-            QMessageBox.warning(self, "Error", "Patient not found in database.")
-            return
-        pid = row[0]
-        rows = cur.execute("SELECT id, filepath, prediction FROM xrays WHERE patient_id=? ORDER BY id DESC", (pid,)).fetchall()
+        pid, _ = selected
+        rows = self.conn.execute(
+            "SELECT id, filepath, prediction, model_version FROM xrays WHERE patient_id=? ORDER BY id DESC", (pid,)
+        ).fetchall()
         if not rows:
             QMessageBox.information(self, "No X-rays", "No X-rays found for this patient.")
             return
-        # Show dialog with list of X-rays
+        mark_viewed(self.conn, pid)
+        # Show dialog with a grid of X-ray thumbnails, loaded in the background
         dlg = QDialog(self)
         dlg.setWindowTitle("X-ray History")
+        dlg.resize(900, 600)
         vbox = QVBoxLayout(dlg)
-        list_widget = QTableWidget(len(rows), 2)
-        list_widget.setHorizontalHeaderLabels(["ID", "Filepath"])
-        for i, (xid, fpath, _) in enumerate(rows):
-            list_widget.setItem(i, 0, QTableWidgetItem(str(xid)))
-            list_widget.setItem(i, 1, QTableWidgetItem(fpath))
+        list_widget = QListWidget()
+        list_widget.setViewMode(QListWidget.IconMode)
+        list_widget.setIconSize(QSize(THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+        list_widget.setResizeMode(QListWidget.Adjust)
+        list_widget.setMovement(QListWidget.Static)
+        list_widget.setSpacing(8)
+        thumbs = ThumbnailLoader()
+        def on_thumbnail(i, image):
+            if not image.isNull():
+                list_widget.item(i).setIcon(QIcon(QPixmap.fromImage(image)))
+        thumbs.loaded.connect(on_thumbnail)
+        version = model_manager.model_hash()
+        stale = set()
+        for i, (xid, fpath, _, xray_version) in enumerate(rows):
+            item = QListWidgetItem(f"X-ray #{xid}")
+            if xray_version == failed_version(version):
+                item.setText(f"X-ray #{xid} (could not be analysed)")
+            elif xray_version != version:
+                item.setText(f"X-ray #{xid} (updating)")
+                stale.add(xid)
+            item.setToolTip(fpath)
+            list_widget.addItem(item)
+            thumbs.load(i, fpath)
         vbox.addWidget(list_widget)
+        # the newest X-rays are the likeliest picks, then whatever gets selected
+        self.prefetcher.prefetch([row[:3] for row in rows[:PREFETCH_AHEAD + 1]])
+        def on_current_changed(i):
+            if i >= 0:
+                self.prefetch_around(rows, i)
+        list_widget.currentRowChanged.connect(on_current_changed)
+        if stale:
+            # predictions from older weights: redo this patient's ahead of any background refresh
+            def on_refreshed(report):
+                fresh = {xid: (fpath, pred) for xid, fpath, pred in self.conn.execute(
+                    "SELECT id, filepath, prediction FROM xrays WHERE patient_id=? AND model_version=?",
+                    (pid, version))}
+                for i, (xid, _, _, _) in enumerate(rows):
+                    if xid in stale:
+                        text = f"X-ray #{xid} (could not be analysed)"
+                        if xid in fresh:
+                            rows[i] = (xid, *fresh[xid], version)
+                            text = f"X-ray #{xid}"
+                        if dlg.isVisible():
+                            list_widget.item(i).setText(text)
+                if self.shown_xray_id in stale and self.shown_xray_id in fresh:
+                    self.show_xray(*fresh[self.shown_xray_id], self.shown_xray_id)
+            job_id = self.inference.submit_task(self._run_patient_refresh, pid, priority=1)
+            self.jobs[job_id] = (f"{len(stale)} stale X-ray(s)", on_refreshed)
         btn_view = QPushButton("View Selected X-ray")
         vbox.addWidget(btn_view)
         def show_selected():
@@ -464,70 +750,94 @@ class MainWindow(QWidget):
             if sel < 0:
                 QMessageBox.warning(dlg, "Error", "Please select an X-ray.")
                 return
-            fpath = list_widget.item(sel, 1).text()
-            pred = rows[sel][2]
-            self.show_xray(fpath, pred)
+            # rows is updated in place when stale predictions are redone
+            self.history, self.history_pid = rows, pid
+            self.show_history(sel)
             dlg.accept()
         btn_view.clicked.connect(show_selected)
+        list_widget.itemDoubleClicked.connect(show_selected)
         dlg.exec()
+        thumbs.stop()
+
+    @staticmethod
+    def _run_patient_refresh(pid):
+        return reindex(get_connection(), patient_id=pid)
     
 
     def remove_patient(self):
-        idx = self.table.currentRow()
-        if idx < 0:
-            QMessageBox.warning(self, "Error", "Please select a patient to remove.")
+        selected = self.selected_patient(text="Please select a patient to remove.")
+        if not selected:
             return
-        # Need to get patient name from table, then fetch id from DB
-        name = self.table.item(idx, 0).text()
+        pid, name = selected
         cur = self.conn.cursor()
-        row = cur.execute("SELECT id FROM patients WHERE name=?", (name,)).fetchone()
-        if not row:
-            QMessageBox.warning(self, "Error", "Patient not found in database.")
-            return
-        pid = row[0]
         reply = QMessageBox.question(self, "Confirm", f"Remove patient '{name}'? This will delete all their X-rays.", QMessageBox.Yes | QMessageBox.No)
         if reply == QMessageBox.Yes:
             cur.execute("DELETE FROM xrays WHERE patient_id=?", (pid,))
             cur.execute("DELETE FROM patients WHERE id=?", (pid,))
             self.conn.commit()
+            if pid == self.history_pid:
+                self.history, self.history_pid, self.history_index = [], None, -1
+                self.update_history_nav()
+            # image files no other X-ray uses
+            collect_garbage(self.conn)
             self.load_patients()
 
     def lookup_patient(self):
-        name, ok = QInputDialog.getText(self, "Look Up Patient", "Enter patient name:")
-        if not ok or not name.strip():
-            return
-        cur = self.conn.cursor()
-        rows = cur.execute("SELECT name, dob, email FROM patients WHERE name LIKE ? AND user_id=?", (f"%{name.strip()}%", self.user_id)).fetchall()
-        if not rows:
-            QMessageBox.information(self, "No Results", "No patients found.")
-            return
-        self.table.setRowCount(len(rows))
-        for i, (name, dob, email) in enumerate(rows):
-            self.table.setItem(i, 0, QTableWidgetItem(name if name else "no data"))
-            self.table.setItem(i, 1, QTableWidgetItem(dob if dob else "no data"))
-            self.table.setItem(i, 2, QTableWidgetItem(email if email else "no data"))
-        # Ensure the X-ray History button is visible and in the correct layout
-        if hasattr(self, 'btn_xray_history'):
-            parent_layout = self.table.parentWidget().layout() if self.table.parentWidget() else None
-            if parent_layout and not parent_layout.indexOf(self.btn_xray_history) >= 0:
-                parent_layout.addWidget(self.btn_xray_history)
-        self.btn_xray_history.clicked.connect(self.view_xray_history)
+        self.search_timer.stop()
+        self.patients.set_search(self.search_box.text())
         
     def immediate_xray_test(self):
         file, _ = QFileDialog.getOpenFileName(self, "Select X-ray for Immediate Test", "", "Images (*.png *.jpg *.jpeg)")
         if not file:
             return
-        pred_json = predict(file)
-        self.show_xray(file, pred_json)
+        job_id = self.inference.submit(file)
+        self.jobs[job_id] = (os.path.basename(file), lambda pred_json: self.show_xray(file, pred_json))
     
+    def show_perf_panel(self):
+        if self.perf_panel is None:
+            self.perf_panel = PerfPanel(self, {"X-ray scenes": self.prefetcher, "Image tiles": tile_cache,
+                                               "Predictions": prediction_cache})
+        self.perf_panel.show()
+        self.perf_panel.raise_()
+
     def logout(self):
-        self.close()
-        self.login = LoginWindow()
+        self.leave()
+
+    def lock(self):
+        self.leave(self.username)
+
+    def leave(self, username=""):
+        """
+        Back to the login window. With a session the window is only hidden,
+        keeping its patient list, X-ray and jobs, and shown again if the same
+        user logs back in within SESSION_TTL; otherwise it is closed.
+        """
+        if self.perf_panel is not None:
+            self.perf_panel.hide()
+        if self.session is None:
+            self.close()
+            self.login = LoginWindow()
+        else:
+            sessions.touch(self.session)
+            self.hide()
+            self.login = LoginWindow(resume=self, username=username)
         self.login.show()
+
+    def end_session(self):
+        """Close for good, e.g. when another user logs in."""
+        sessions.close(self.session)
+        self.prefetcher.stop()
+        self.refresh_timer.stop()
+        self.version_timer.stop()
+        self.model_timer.stop()
+        self.close()
     
 if __name__ == "__main__":
     init_db()
     app = QApplication(sys.argv)
+    app.aboutToQuit.connect(tile_loader.stop)
     login = LoginWindow()
     login.show()
+    # load the weights once the event loop is running so the window shows first
+    QTimer.singleShot(0, model_manager.start)
     sys.exit(app.exec())
\ No newline at end of file
@@ -0,0 +1,97 @@
+"""
+Backend benchmark: per-image latency of each inference backend on CPU and how
+well its boxes agree with the PyTorch reference.
+
+    python benchmarks/bench_backends.py <images or folders...> [--backends torch,onnx,openvino,openvino-int8]
+
+A box counts as matched when the reference has a box of the same class with
+IoU >= 0.5. The prediction cache is bypassed, every backend runs the model.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from xray_app.backends import BACKENDS, get_backend
+from xray_app.config import CONF_THRESHOLD, MODEL_PATH
+from xray_app.inference import _boxes_json
+from xray_app.ingest import collect_images
+
+WARMUP = 2
+MATCH_IOU = 0.5
+
+
+def iou(a, b):
+    w = min(a["x2"], b["x2"]) - max(a["x1"], b["x1"])
+    h = min(a["y2"], b["y2"]) - max(a["y1"], b["y1"])
+    if w <= 0 or h <= 0:
+        return 0.0
+    inter = w * h
+    area = lambda r: (r["x2"] - r["x1"]) * (r["y2"] - r["y1"])
+    return inter / (area(a) + area(b) - inter)
+
+
+def agreement(reference, boxes):
+    """(matched, total) boxes of reference found again in boxes, and the mean IoU of the matches."""
+    matched, ious = 0, []
+    for ref, pred in zip(reference, boxes):
+        unused = list(pred)
+        for r in ref:
+            best = max((b for b in unused if b["class"] == r["class"]), key=lambda b: iou(r, b), default=None)
+            if best is not None and iou(r, best) >= MATCH_IOU:
+                matched += 1
+                ious.append(iou(r, best))
+                unused.remove(best)
+    total = sum(len(ref) for ref in reference)
+    return matched, total, statistics.mean(ious) if ious else 0.0
+
+
+def run(name, model_path, images):
+    start = time.perf_counter()
+    yolo = get_backend(name).load(model_path)
+    load_s = time.perf_counter() - start
+    for path in images[:WARMUP]:
+        yolo(path, conf=CONF_THRESHOLD, verbose=False)
+    latencies, boxes = [], []
+    for path in images:
+        start = time.perf_counter()
+        result = yolo(path, conf=CONF_THRESHOLD, verbose=False)[0]
+        latencies.append((time.perf_counter() - start) * 1000)
+        boxes.append(json.loads(_boxes_json(result)))
+    return load_s, latencies, boxes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="X-ray images or folders")
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--model", default=MODEL_PATH)
+    args = parser.parse_args()
+    images = collect_images(args.paths)
+    if not images:
+        sys.exit("no images found")
+    names = ["torch"] + [n for n in args.backends.split(",") if n != "torch"]
+
+    print(f"{len(images)} images, median/p95 of per-image latency after {WARMUP} warm-up runs")
+    print(f"{'backend':14} {'load s':>7} {'median ms':>10} {'p95 ms':>8} {'boxes':>6} {'matched':>8} {'mean IoU':>9}")
+    reference = None
+    for name in names:
+        try:
+            load_s, latencies, boxes = run(name, args.model, images)
+        except Exception as e:
+            print(f"{name:14} failed: {e}")
+            continue
+        if reference is None:
+            reference = boxes
+        matched, total, mean_iou = agreement(reference, boxes)
+        p95 = sorted(latencies)[int(0.95 * (len(latencies) - 1))]
+        print(f"{name:14} {load_s:7.1f} {statistics.median(latencies):10.1f} {p95:8.1f} "
+              f"{sum(map(len, boxes)):6} {f'{matched}/{total}':>8} {mean_iou:9.3f}")
+
+
+if __name__ == "__main__":
+    main()
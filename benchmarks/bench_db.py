@@ -0,0 +1,93 @@
+"""
+Database benchmark: seeds a large patients.db and times the patient-list
+and X-ray history queries before and after the index migration.
+
+    python benchmarks/bench_db.py [--patients 100000] [--xrays 1000000]
+
+The database is built in a temporary directory; data/patients.db is untouched.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from xray_app.db import MIGRATIONS, connect, migrate
+
+USERS = 20
+PRED = json.dumps([{"class": 1, "conf": 0.81, "x1": 100.0, "y1": 120.0, "x2": 160.0, "y2": 190.0}])
+
+
+def seed(conn, n_patients, n_xrays):
+    rnd = random.Random(0)
+    with conn:
+        conn.executemany("INSERT INTO users(username,password) VALUES(?,?)",
+                         ((f"user{u}", "pw") for u in range(1, USERS + 1)))
+        conn.executemany(
+            "INSERT INTO patients(id,name,dob,email,user_id) VALUES(?,?,?,?,?)",
+            ((i, f"Patient {i}", "01-01-1980", f"p{i}@example.com", rnd.randint(1, USERS))
+             for i in range(1, n_patients + 1))
+        )
+        conn.executemany(
+            "INSERT INTO xrays(patient_id,filepath,prediction) VALUES(?,?,?)",
+            ((pid, f"data/xrays/{pid}/img{i}.png", PRED)
+             for i, pid in enumerate(rnd.randint(1, n_patients) for _ in range(n_xrays)))
+        )
+
+
+def timed(conn, sql, params_list):
+    start = time.perf_counter()
+    for params in params_list:
+        conn.execute(sql, params).fetchall()
+    return (time.perf_counter() - start) / len(params_list) * 1000
+
+
+def run_queries(conn, n_patients):
+    rnd = random.Random(1)
+    pids = [(rnd.randint(1, n_patients),) for _ in range(50)]
+    names = [(rnd.randint(1, USERS), f"Patient {pid}") for (pid,) in pids]
+    return {
+        "patient list (user_id=?)": timed(
+            conn, "SELECT name, dob, email FROM patients WHERE user_id=?",
+            [(u,) for u in range(1, USERS + 1)]),
+        "patient by name": timed(
+            conn, "SELECT id FROM patients WHERE user_id=? AND name=?", names),
+        "x-ray history": timed(
+            conn, "SELECT id, filepath, prediction FROM xrays WHERE patient_id=? ORDER BY id DESC", pids),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--patients", type=int, default=100_000)
+    parser.add_argument("--xrays", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = connect(os.path.join(tmp, "bench.db"))
+        # schema only (version 1), as an un-migrated patients.db looks
+        with conn:
+            MIGRATIONS[0][1](conn)
+            conn.execute(f"PRAGMA user_version={MIGRATIONS[0][0]}")
+        start = time.perf_counter()
+        seed(conn, args.patients, args.xrays)
+        print(f"seeded {args.patients} patients / {args.xrays} xrays in {time.perf_counter() - start:.1f}s")
+
+        before = run_queries(conn, args.patients)
+        start = time.perf_counter()
+        version = migrate(conn)
+        print(f"migrated to schema v{version} in {time.perf_counter() - start:.1f}s")
+        after = run_queries(conn, args.patients)
+
+        print(f"{'query':28} {'before ms':>10} {'after ms':>10}")
+        for name in before:
+            print(f"{name:28} {before[name]:10.2f} {after[name]:10.2f}")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Login benchmark: latency of registering, logging in (full scrypt check),
+upgrading a legacy plaintext row and resuming a session, per KDF cost, plus
+the longest GUI event-loop stall while a login runs on the auth thread.
+
+    python benchmarks/bench_login.py [--costs 12,14,15,16,17] [--repeat 5]
+
+Each cost runs in a child process with XRAY_KDF_COST set, since the app
+reads its cost parameters from the environment at import time.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return (time.perf_counter() - start) * 1000, result
+
+
+def gui_stall(repeat):
+    """Longest gap (ms) between 5 ms timer ticks while logins run on AuthWorker."""
+    from PySide6.QtCore import QCoreApplication, QTimer
+    from xray_app.ui.auth import AuthWorker
+
+    app = QCoreApplication.instance() or QCoreApplication([])
+    worker = AuthWorker()
+    ticks, done = [], []
+    timer = QTimer()
+    timer.timeout.connect(lambda: ticks.append(time.perf_counter()))
+    worker.finished.connect(done.append)
+    timer.start(5)
+    for _ in range(repeat):
+        worker.login("user0", "correct horse")
+    while len(done) < repeat:
+        app.processEvents()
+        time.sleep(0.001)
+    timer.stop()
+    return max((b - a) * 1000 for a, b in zip(ticks, ticks[1:])) if len(ticks) > 1 else None
+
+
+def measure(repeat):
+    """Runs in the child process; prints one JSON line of ms medians."""
+    from xray_app.config import KDF_BLOCK_SIZE, KDF_COST
+    from xray_app.credentials import Sessions, authenticate, create_user
+    from xray_app.db import get_connection, init_db
+
+    init_db()
+    conn = get_connection()
+    register, login, upgrade, resume = [], [], [], []
+    sessions = Sessions(ttl=60)
+    for i in range(repeat):
+        ms, user_id = timed(create_user, conn, f"user{i}", "correct horse")
+        register.append(ms)
+        login.append(timed(authenticate, conn, f"user{i}", "correct horse")[0])
+        with conn:
+            conn.execute("INSERT INTO users(username,password) VALUES(?,?)", (f"legacy{i}", "correct horse"))
+        upgrade.append(timed(authenticate, conn, f"legacy{i}", "correct horse")[0])
+        sessions.open(user_id, f"user{i}", "correct horse")
+        resume.append(timed(sessions.resume, f"user{i}", "correct horse")[0])
+    print(json.dumps({
+        "cost": KDF_COST,
+        "memory_mib": 128 * KDF_BLOCK_SIZE * (1 << KDF_COST) / 2 ** 20,
+        "register": statistics.median(register),
+        "login": statistics.median(login),
+        "upgrade": statistics.median(upgrade),
+        "resume": statistics.median(resume),
+        "gui_stall": gui_stall(repeat),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--costs", default="12,14,15,16,17", help="log2 of the scrypt N parameter")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        sys.path.insert(0, ROOT)
+        measure(args.repeat)
+        return
+
+    print(f"{'cost':>4} {'MiB':>5} {'register ms':>12} {'login ms':>9} {'upgrade ms':>11} "
+          f"{'resume ms':>10} {'GUI stall ms':>13}")
+    for cost in (int(c) for c in args.costs.split(",")):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, XRAY_KDF_COST=str(cost), XRAY_DB=os.path.join(tmp, "patients.db"),
+                       QT_QPA_PLATFORM="offscreen")
+            out = subprocess.run([sys.executable, __file__, "--child", "--repeat", str(args.repeat)],
+                                 env=env, capture_output=True, text=True, check=True).stdout
+        r = json.loads(out.strip().splitlines()[-1])
+        stall = "-" if r["gui_stall"] is None else f"{r['gui_stall']:.1f}"
+        print(f"{r['cost']:4} {r['memory_mib']:5.0f} {r['register']:12.1f} {r['login']:9.1f} {r['upgrade']:11.1f} "
+              f"{r['resume']:10.3f} {stall:>13}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Process pool benchmark: bulk inference throughput for 1..N worker processes,
+to check that it scales with the number of cores.
+
+    python benchmarks/bench_pool.py [images or folders...] [--images 64] [--workers 1,2,4,8]
+
+Without images, synthetic X-rays of --size are generated. Start-up (spawning
+the workers, loading one model each and a warm-up batch) is reported
+separately from the steady-state throughput.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from xray_app.config import BATCH_SIZE
+from xray_app.ingest import collect_images
+from xray_app.pool import InferencePool
+
+
+def make_images(folder, n, w, h):
+    import cv2
+    import numpy as np
+
+    rnd = np.random.default_rng(0)
+    paths = []
+    for i in range(n):
+        path = os.path.join(folder, f"xray{i}.png")
+        cv2.imwrite(path, rnd.integers(0, 256, (h, w), dtype=np.uint8))
+        paths.append(path)
+    return paths
+
+
+def run(images, workers, batch_size, threads):
+    start = time.perf_counter()
+    with InferencePool(workers, batch_size, threads=threads) as pool:
+        # warm-up: one batch per worker, so every model is loaded before timing
+        for _, _, error in pool.map(enumerate(images[:workers * batch_size])):
+            if error is not None:
+                sys.exit(error)
+        warm = time.perf_counter()
+        for _ in pool.map(enumerate(images)):
+            pass
+        end = time.perf_counter()
+    return warm - start, len(images) / (end - warm)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("paths", nargs="*", help="X-ray images or folders")
+    parser.add_argument("--images", type=int, default=64, help="number of synthetic images")
+    parser.add_argument("--size", default="1600x800", help="synthetic image size WxH")
+    parser.add_argument("--workers", default=f"1,2,4,{os.cpu_count() or 1}")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--threads", type=int, help="CPU threads per worker (default: cores / workers)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.paths:
+            images = collect_images(args.paths)
+        else:
+            w, h = map(int, args.size.lower().split("x"))
+            images = make_images(tmp, args.images, w, h)
+        print(f"{len(images)} images, batch size {args.batch_size}, {os.cpu_count()} cores")
+        print(f"{'workers':>7} {'startup s':>10} {'images/sec':>11} {'speedup':>8}")
+        base = None
+        for workers in sorted({int(w) for w in args.workers.split(",")}):
+            startup, rate = run(images, workers, args.batch_size, args.threads)
+            base = base or rate
+            print(f"{workers:7} {startup:10.1f} {rate:11.2f} {rate / base:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Rendering benchmark: builds the viewer scenes for an X-ray with many
+detections and times scene construction and the first paint of both viewers,
+next to the previous per-box QGraphicsItem approach.
+
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_render.py [--boxes 500] [--size 4000x2000]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QBrush, QColor, QFont, QFontMetrics, QImage, QPen, QPixmap
+from PySide6.QtWidgets import (
+    QApplication, QGraphicsPixmapItem, QGraphicsRectItem, QGraphicsScene, QGraphicsTextItem
+)
+
+import app
+from xray_app.config import CLASS_NAMES
+
+RUNS = 10
+
+
+def make_boxes(n, w, h):
+    rnd = random.Random(0)
+    boxes = []
+    for _ in range(n):
+        x1, y1 = rnd.uniform(0, w - 200), rnd.uniform(30, h - 200)
+        boxes.append({"class": rnd.randint(0, 3), "conf": rnd.uniform(0.4, 1.0),
+                      "x1": x1, "y1": y1, "x2": x1 + rnd.uniform(20, 200), "y2": y1 + rnd.uniform(20, 200)})
+    return json.dumps(boxes)
+
+
+def legacy_show_xray(window, img_path, pred_json):
+    """The original show_xray: two decodes, three items and a QFontMetrics per box."""
+    boxes = json.loads(pred_json)
+    scene1 = QGraphicsScene()
+    scene1.addItem(QGraphicsPixmapItem(QPixmap(img_path)))
+    window.viewer_orig.setScene(scene1)
+    window.viewer_orig.resetTransform()
+    window.viewer_orig.fitInView(scene1.sceneRect(), Qt.KeepAspectRatio)
+    scene2 = QGraphicsScene()
+    scene2.addItem(QGraphicsPixmapItem(QPixmap(img_path)))
+    pen = QPen(QColor(0, 255, 255), 2)
+    font = QFont(); font.setPointSize(10); font.setBold(True)
+    for b in boxes:
+        x1, y1 = b["x1"], b["y1"]
+        label = f"{CLASS_NAMES.get(b['class'], b['class'])} {b['conf']:.2f}"
+        rect_item = QGraphicsRectItem(x1, y1, b["x2"] - x1, b["y2"] - y1)
+        rect_item.setPen(pen)
+        scene2.addItem(rect_item)
+        metrics = QFontMetrics(font)
+        tw = metrics.horizontalAdvance(label) + 4
+        th = metrics.height() + 2
+        bg = QGraphicsRectItem(x1, y1 - th, tw, th)
+        bg.setBrush(QBrush(QColor(0, 0, 0, 160)))
+        bg.setPen(QPen(Qt.NoPen))
+        scene2.addItem(bg)
+        text_item = QGraphicsTextItem(label)
+        text_item.setDefaultTextColor(QColor(0, 255, 255))
+        text_item.setFont(font)
+        text_item.setPos(x1 + 2, y1 - th + 1)
+        scene2.addItem(text_item)
+    window.viewer_pred.setScene(scene2)
+    window.viewer_pred.resetTransform()
+    window.viewer_pred.fitInView(scene2.sceneRect(), Qt.KeepAspectRatio)
+    window._legacy_scenes = (scene1, scene2)
+
+
+def measure(window, show, img_path, pred_json):
+    build, paint = [], []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        show(img_path, pred_json)
+        build.append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        window.viewer_orig.viewport().grab()
+        window.viewer_pred.viewport().grab()
+        paint.append((time.perf_counter() - start) * 1000)
+    return statistics.median(build), statistics.median(paint)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--boxes", type=int, default=500)
+    parser.add_argument("--size", default="4000x2000", help="synthetic image size WxH")
+    args = parser.parse_args()
+    w, h = map(int, args.size.lower().split("x"))
+
+    qapp = QApplication.instance() or QApplication(sys.argv[:1])
+    app.init_db()
+    window = app.MainWindow(0)
+    window.resize(1280, 1024)
+    window.show()
+    qapp.processEvents()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        img_path = os.path.join(tmp, "xray.png")
+        image = QImage(w, h, QImage.Format_Grayscale8)
+        image.fill(96)
+        image.save(img_path)
+        pred_json = make_boxes(args.boxes, w, h)
+
+        print(f"{args.boxes} boxes on a {w}x{h} image, median of {RUNS} runs")
+        print(f"{'':22} {'build ms':>10} {'paint ms':>10}")
+        for label, show in (("per-box items (old)", lambda p, j: legacy_show_xray(window, p, j)),
+                            ("shared scene+overlay", window.show_xray)):
+            build, paint = measure(window, show, img_path, pred_json)
+            print(f"{label:22} {build:10.1f} {paint:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
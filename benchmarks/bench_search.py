@@ -0,0 +1,86 @@
+"""
+Patient search benchmark: per-keystroke latency of the FTS5 search on a
+seeded database, next to the old name LIKE '%...%' query.
+
+    python benchmarks/bench_search.py [--patients 100000]
+
+The target is under ~20 ms per keystroke for the first page of results.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from xray_app.db import connect, migrate
+from xray_app.search import search_patients
+
+FIRST = ["Maria", "Jose", "Ana", "Joao", "Francisco", "Mariana", "Pedro", "Sofia", "Tiago", "Beatriz",
+         "Rui", "Ines", "Miguel", "Carla", "Nuno", "Marta", "Luis", "Rita", "Andre", "Helena"]
+LAST = ["Silva", "Santos", "Ferreira", "Pereira", "Oliveira", "Costa", "Rodrigues", "Martins", "Sousa",
+        "Fernandes", "Goncalves", "Gomes", "Lopes", "Marques", "Alves", "Almeida", "Ribeiro", "Pinto"]
+USERS = 5
+PAGE = 200
+
+# what a user types, one keystroke at a time
+TYPED = ["maria silva", "fern", "joao p", "1985", "rita.gomes"]
+
+
+def seed(conn, n):
+    rnd = random.Random(0)
+    rows = []
+    for i in range(1, n + 1):
+        first, last = rnd.choice(FIRST), rnd.choice(LAST)
+        dob = f"{rnd.randint(1, 28):02d}-{rnd.randint(1, 12):02d}-{rnd.randint(1930, 2020)}"
+        email = f"{first}.{last}{i}@example.com".lower()
+        rows.append((f"{first} {rnd.choice(LAST)} {last}", dob, email, rnd.randint(1, USERS)))
+    with conn:
+        conn.executemany("INSERT INTO patients(name,dob,email,user_id) VALUES(?,?,?,?)", rows)
+
+
+def keystrokes():
+    for text in TYPED:
+        for i in range(1, len(text) + 1):
+            yield text[:i]
+
+
+def report(label, times):
+    times = sorted(times)
+    p95 = times[int(len(times) * 0.95) - 1]
+    print(f"{label:16} mean {statistics.mean(times):7.2f} ms   p95 {p95:7.2f} ms   max {times[-1]:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--patients", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = connect(os.path.join(tmp, "bench.db"))
+        migrate(conn)
+        start = time.perf_counter()
+        seed(conn, args.patients)
+        print(f"seeded {args.patients} patients in {time.perf_counter() - start:.1f}s")
+
+        fts, like = [], []
+        for text in keystrokes():
+            user = random.randint(1, USERS)
+            start = time.perf_counter()
+            search_patients(conn, user, text, PAGE)
+            fts.append((time.perf_counter() - start) * 1000)
+            start = time.perf_counter()
+            conn.execute("SELECT name, dob, email FROM patients WHERE name LIKE ? AND user_id=?",
+                         (f"%{text}%", user)).fetchall()
+            like.append((time.perf_counter() - start) * 1000)
+        print(f"{len(fts)} keystrokes, first page of {PAGE} rows")
+        report("fts5 search", fts)
+        report("name LIKE", like)
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
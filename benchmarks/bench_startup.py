@@ -0,0 +1,43 @@
+"""
+Startup benchmark: time-to-first-window and time-to-first-prediction.
+
+Run in a fresh interpreter so the import cost is included:
+
+    python benchmarks/bench_startup.py [path/to/xray.png]
+
+Set QT_QPA_PLATFORM=offscreen to run it without a display.
+"""
+import os
+import sys
+import time
+
+t0 = time.perf_counter()
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    from PySide6.QtWidgets import QApplication
+    import app
+    from xray_app.inference import predict
+
+    app.init_db()
+    qapp = QApplication.instance() or QApplication(sys.argv[:1])
+    login = app.LoginWindow()
+    login.show()
+    qapp.processEvents()
+    t_window = time.perf_counter() - t0
+    print(f"time to first window:     {t_window * 1000:8.1f} ms")
+
+    if len(sys.argv) < 2:
+        print("no image given, skipping time to first prediction")
+        return
+    # same sequence as the app: background load starts once the window is up
+    app.model_manager.start()
+    predict(sys.argv[1])
+    t_pred = time.perf_counter() - t0
+    print(f"time to first prediction: {t_pred * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+"""
+Benchmark suite at practice scale: builds (or reuses) a synthetic practice
+with loadgen.py and times the app's hot paths on it, CPU only and offscreen.
+
+    python benchmarks/bench_suite.py [--data DIR] [--report bench_report.json]
+                                     [--baseline benchmarks/baseline.json] [--save-baseline]
+
+Scenarios: patient list first page / scrolling / sorting, search-as-you-type,
+finding filter, X-ray history query, thumbnails and stepping through it, predict (model load, cold,
+cached) and show_xray scene build and paint. The JSON report holds median and
+p95 per scenario; when the baseline file exists every median is compared with
+it and the exit status is 1 if any got slower by more than --tolerance (and
+--min-delta ms).
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# set before the app is imported: no display, no GPU, no background re-analysis
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+os.environ.setdefault("XRAY_REFRESH_INTERVAL", "0")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import loadgen
+
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+USERS_SAMPLED = 10
+PATIENTS_SAMPLED = 200
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def summary(samples):
+    samples = sorted(samples)
+    return {"n": len(samples), "median_ms": round(statistics.median(samples), 3),
+            "p95_ms": round(samples[min(len(samples) - 1, int(0.95 * len(samples)))], 3),
+            "mean_ms": round(statistics.mean(samples), 3)}
+
+
+def wait_for(qapp, done, timeout=60):
+    end = time.perf_counter() + timeout
+    while not done() and time.perf_counter() < end:
+        qapp.processEvents()
+        time.sleep(0.001)
+
+
+def bench_patient_list(ctx):
+    from PySide6.QtCore import QModelIndex, Qt
+    from xray_app.ui.patient_model import PatientTableModel
+
+    first, scroll, sort = [], [], []
+    for user in range(1, min(ctx["users"], USERS_SAMPLED) + 1):
+        start = time.perf_counter()
+        model = PatientTableModel(ctx["conn"], user)
+        first.append((time.perf_counter() - start) * 1000)
+        for _ in range(10):
+            if model.canFetchMore(QModelIndex()):
+                scroll.append(timed(model.fetchMore, QModelIndex()))
+        sort.append(timed(model.sort, 1, Qt.DescendingOrder))
+    return {"patients.first_page": first, "patients.scroll_page": scroll, "patients.sort_dob": sort}
+
+
+def bench_search(ctx):
+    from bench_search import keystrokes
+    from xray_app.ui.patient_model import PatientTableModel
+
+    model = PatientTableModel(ctx["conn"], 1)
+    typed = [timed(model.set_search, text) for text in keystrokes()]
+    model.set_search("")
+    finding = []
+    for _ in range(3):
+        for cls in range(4):
+            finding.append(timed(model.set_finding_filter, cls, 0.7))
+        model.set_finding_filter(None)
+    return {"search.keystroke": typed, "search.finding_filter": finding}
+
+
+def bench_history(ctx):
+    from xray_app.ui.previews import ThumbnailLoader
+
+    conn, rnd = ctx["conn"], ctx["rnd"]
+    sql = "SELECT id, filepath, prediction, model_version FROM xrays WHERE patient_id=? ORDER BY id DESC"
+    pids = [rnd.randint(1, ctx["patients"]) for _ in range(PATIENTS_SAMPLED)]
+    query = [timed(lambda pid: conn.execute(sql, (pid,)).fetchall(), pid) for pid in pids]
+    thumbs = []
+    for pid in pids[:20]:
+        rows = conn.execute(sql, (pid,)).fetchall()
+        if not rows:
+            continue
+        loader = ThumbnailLoader()
+        loaded = []
+        loader.loaded.connect(lambda key, image: loaded.append(key))
+        start = time.perf_counter()
+        for i, (_, path, _, _) in enumerate(rows):
+            loader.load(i, path)
+        wait_for(ctx["qapp"], lambda: len(loaded) == len(rows))
+        thumbs.append((time.perf_counter() - start) * 1000)
+        loader.stop()
+    return {"history.query": query, "history.thumbnails": thumbs}
+
+
+def bench_predict(ctx):
+    from xray_app.cache import prediction_cache
+    from xray_app.inference import model_manager, predict
+
+    if not os.path.exists(model_manager.model_path):
+        return {"predict": f"skipped: no weights at {model_manager.model_path}"}
+    load = [timed(model_manager.get)]
+    # the first call pays for fusing layers and warming up; that is not what cold means here
+    predict(ctx["images"][0])
+    prediction_cache.clear()
+    cold = [timed(predict, path) for path in ctx["images"]]
+    cached = [timed(predict, path) for path in ctx["images"]]
+    return {"predict.model_load": load, "predict.cold": cold, "predict.cached": cached}
+
+
+def bench_show_xray(ctx):
+    import app
+
+    window = app.MainWindow(1)
+    window.resize(1280, 1024)
+    window.show()
+    ctx["qapp"].processEvents()
+    rows = ctx["conn"].execute("SELECT filepath, prediction FROM xrays ORDER BY random() LIMIT 30").fetchall()
+    build, paint = [], []
+    for path, pred in rows:
+        build.append(timed(window.show_xray, path, pred))
+        start = time.perf_counter()
+        window.viewer_orig.viewport().grab()
+        window.viewer_pred.viewport().grab()
+        paint.append((time.perf_counter() - start) * 1000)
+    window.close()
+    return {"show_xray.build": build, "show_xray.paint": paint}
+
+
+def bench_history_steps(ctx):
+    import app
+
+    window = app.MainWindow(1)
+    window.resize(1280, 1024)
+    window.show()
+    ctx["qapp"].processEvents()
+    pids = [pid for (pid,) in ctx["conn"].execute(
+        "SELECT patient_id FROM xrays GROUP BY patient_id HAVING COUNT(*) >= 4 ORDER BY random() LIMIT 10")]
+    opened, steps = [], []
+    for pid in pids:
+        window.history = ctx["conn"].execute(
+            "SELECT id, filepath, prediction, model_version FROM xrays WHERE patient_id=? ORDER BY id DESC", (pid,)
+        ).fetchall()
+        opened.append(timed(window.show_history, 0))
+        for _ in range(len(window.history) - 1):
+            # the time a user looks at an X-ray before stepping on
+            wait_for(ctx["qapp"], lambda: not window.prefetcher._pending, timeout=2)
+            steps.append(timed(window.show_next_xray))
+    stats = window.prefetcher.stats()
+    window.prefetcher.stop()
+    window.close()
+    return {"history.open": opened, "history.step": steps,
+            "history.scene_hits": f"{stats['hits']} of {stats['hits'] + stats['misses']}"}
+
+
+SCENARIOS = (bench_patient_list, bench_search, bench_history, bench_history_steps, bench_predict, bench_show_xray)
+
+
+def prepare_dataset(data_dir, wanted):
+    """Generate the synthetic practice unless data_dir already holds one with the same parameters."""
+    meta_path = os.path.join(data_dir, "dataset.json")
+    if os.path.exists(meta_path) and os.path.exists(os.environ["XRAY_DB"]):
+        with open(meta_path) as f:
+            if json.load(f) == wanted:
+                print(f"reusing dataset in {data_dir}")
+                return
+    start = time.perf_counter()
+    loadgen.generate(os.environ["XRAY_DB"], **wanted)
+    with open(meta_path, "w") as f:
+        json.dump(wanted, f)
+    print(f"generated dataset in {time.perf_counter() - start:.1f}s")
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(report, baseline, tolerance, min_delta):
+    """
+    Print median changes against the baseline; returns the names of scenarios
+    slower by more than tolerance (a fraction) and min_delta ms.
+    """
+    regressed = []
+    print(f"\n{'scenario':24} {'baseline ms':>12} {'now ms':>10} {'change':>8}")
+    for name, now in report["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not isinstance(now, dict) or not isinstance(before, dict):
+            continue
+        ratio = now["median_ms"] / before["median_ms"] if before["median_ms"] else 1.0
+        flag = ""
+        if ratio > 1 + tolerance and now["median_ms"] - before["median_ms"] > min_delta:
+            flag = "  SLOWER"
+            regressed.append(name)
+        elif ratio < 1 - tolerance:
+            flag = "  faster"
+        print(f"{name:24} {before['median_ms']:12.2f} {now['median_ms']:10.2f} {ratio - 1:+8.0%}{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--data", help="dataset directory, kept and reused between runs (default: temporary)")
+    loadgen.add_arguments(parser)
+    parser.add_argument("--report", default="bench_report.json")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed median slowdown (default 20%%)")
+    parser.add_argument("--min-delta", type=float, default=0.5,
+                        help="ignore slowdowns smaller than this many ms (timer noise on fast scenarios)")
+    args = parser.parse_args()
+
+    tmp = None
+    data_dir = args.data
+    if data_dir is None:
+        tmp = tempfile.TemporaryDirectory()
+        data_dir = tmp.name
+    os.makedirs(data_dir, exist_ok=True)
+    # the app, its image store and prediction cache all follow XRAY_DB
+    os.environ["XRAY_DB"] = os.path.abspath(os.path.join(data_dir, "patients.db"))
+    wanted = loadgen.params(args)
+    prepare_dataset(data_dir, wanted)
+
+    from PySide6.QtWidgets import QApplication
+    from xray_app.db import get_connection, init_db
+
+    init_db()
+    conn = get_connection()
+    ctx = {
+        "qapp": QApplication.instance() or QApplication(sys.argv[:1]),
+        "conn": conn,
+        "rnd": random.Random(0),
+        "users": args.users,
+        "patients": args.patients,
+        "images": [path for (path,) in conn.execute("SELECT path FROM blobs ORDER BY hash")],
+    }
+    report = {
+        "meta": {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "revision": git_revision(),
+                 "python": platform.python_version(), "platform": platform.platform(),
+                 "cpus": os.cpu_count()},
+        "dataset": wanted,
+        "scenarios": {},
+    }
+    for scenario in SCENARIOS:
+        start = time.perf_counter()
+        for name, samples in scenario(ctx).items():
+            if isinstance(samples, list):
+                samples = summary(samples) if samples else "no samples at this dataset size"
+            report["scenarios"][name] = samples
+        print(f"{scenario.__name__[6:]:14} done in {time.perf_counter() - start:.1f}s")
+
+    print(f"\n{'scenario':24} {'n':>5} {'median ms':>10} {'p95 ms':>9}")
+    for name, s in report["scenarios"].items():
+        if isinstance(s, dict):
+            print(f"{name:24} {s['n']:5} {s['median_ms']:10.2f} {s['p95_ms']:9.2f}")
+        else:
+            print(f"{name:24} {s}")
+    with open(args.report, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nreport written to {args.report}")
+
+    regressed = []
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"baseline saved to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("dataset") != wanted:
+            print("warning: baseline was recorded on a different dataset")
+        regressed = compare(report, baseline, args.tolerance, args.min_delta)
+    conn.close()
+    if tmp is not None:
+        tmp.cleanup()
+    if regressed:
+        sys.exit(f"\n{len(regressed)} scenario(s) slower than baseline: {', '.join(regressed)}")
+
+
+if __name__ == "__main__":
+    main()
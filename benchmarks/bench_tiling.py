@@ -0,0 +1,79 @@
+"""
+Tiling benchmark: tiles/sec of sliced inference on CPU for a few batch sizes
+and worker counts, next to plain whole-image prediction.
+
+    python benchmarks/bench_tiling.py [images or folders...] [--size 3000x1500] [--images 4]
+
+Without images, synthetic panoramics of --size are generated.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from xray_app.backends import BACKENDS, get_backend
+from xray_app.config import CONF_THRESHOLD, MODEL_PATH, TILE_OVERLAP, TILE_SIZE
+from xray_app.ingest import collect_images
+from xray_app.tiling import load_tiles, predict_tiled
+
+
+def make_images(folder, n, w, h):
+    import cv2
+
+    rnd = np.random.default_rng(0)
+    paths = []
+    for i in range(n):
+        path = os.path.join(folder, f"pano{i}.png")
+        cv2.imwrite(path, rnd.integers(0, 256, (h, w), dtype=np.uint8))
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("paths", nargs="*", help="X-ray images or folders")
+    parser.add_argument("--size", default="3000x1500", help="synthetic image size WxH")
+    parser.add_argument("--images", type=int, default=4, help="number of synthetic images")
+    parser.add_argument("--tile-size", type=int, default=TILE_SIZE)
+    parser.add_argument("--overlap", type=float, default=TILE_OVERLAP)
+    parser.add_argument("--batch-sizes", default="1,4,8")
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--backend", choices=list(BACKENDS), default="torch")
+    parser.add_argument("--model", default=MODEL_PATH)
+    args = parser.parse_args()
+
+    yolo = get_backend(args.backend).load(args.model)
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.paths:
+            images = collect_images(args.paths)
+        else:
+            w, h = map(int, args.size.lower().split("x"))
+            images = make_images(tmp, args.images, w, h)
+        tiles = sum(len(load_tiles(p, args.tile_size, args.overlap)) for p in images)
+        print(f"{len(images)} images, {tiles} tiles of {args.tile_size}px "
+              f"(overlap {args.overlap:g}, incl. one whole-image pass each), backend {args.backend}")
+
+        yolo(images[0], conf=CONF_THRESHOLD, verbose=False)  # warm-up
+        start = time.perf_counter()
+        for path in images:
+            yolo(path, conf=CONF_THRESHOLD, verbose=False)
+        seconds = time.perf_counter() - start
+        print(f"{'whole image':22} {len(images) / seconds:8.2f} images/sec")
+
+        print(f"{'batch':>6} {'workers':>8} {'tiles/sec':>10} {'s/image':>8}")
+        for batch in map(int, args.batch_sizes.split(",")):
+            for workers in map(int, args.workers.split(",")):
+                predict_tiled(yolo, images[:1], CONF_THRESHOLD, batch, args.tile_size, args.overlap, workers)
+                start = time.perf_counter()
+                predict_tiled(yolo, images, CONF_THRESHOLD, batch, args.tile_size, args.overlap, workers)
+                seconds = time.perf_counter() - start
+                print(f"{batch:6} {workers:8} {tiles / seconds:10.1f} {seconds / len(images):8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Viewer benchmark for very large X-rays: frame times while zooming and
+panning, and memory after opening many X-rays, for the tiled image item next
+to a single full-resolution QPixmap (the previous full decode).
+
+    python benchmarks/bench_viewer.py [--size 10000x5000] [--opened 30]
+
+Runs offscreen. Each zoom step pans across the image one frame at a time,
+letting background tile loads land between frames as the event loop would;
+a frame over 16.7 ms misses 60 fps.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("XRAY_REFRESH_INTERVAL", "0")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FRAME_MS = 1000 / 60
+PAN_FRAMES = 60
+ZOOM_STEPS = 10
+
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") >> 20
+
+
+def frame(qapp, view):
+    qapp.processEvents()
+    start = time.perf_counter()
+    view.viewport().repaint()
+    return (time.perf_counter() - start) * 1000
+
+
+def sweep(qapp, view):
+    """Frame times of zooming in step by step, panning right at each step."""
+    from PySide6.QtCore import Qt
+
+    frames = []
+    view.reset_zoom()
+    view.fitInView(view.scene().itemsBoundingRect(), Qt.KeepAspectRatio)
+    for _ in range(ZOOM_STEPS):
+        view.zoom(True)
+        bar = view.horizontalScrollBar()
+        step = max(1, (bar.maximum() - bar.minimum()) // PAN_FRAMES)
+        bar.setValue(bar.minimum())
+        for _ in range(PAN_FRAMES // ZOOM_STEPS):
+            frames.append(frame(qapp, view))
+            bar.setValue(bar.value() + step)
+    return frames
+
+
+def legacy_scene(img_path):
+    from PySide6.QtCore import Qt
+    from PySide6.QtGui import QPixmap
+    from PySide6.QtWidgets import QGraphicsPixmapItem, QGraphicsScene
+
+    scene = QGraphicsScene()
+    item = QGraphicsPixmapItem(QPixmap(img_path))
+    item.setTransformationMode(Qt.SmoothTransformation)
+    scene.addItem(item)
+    return scene
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", default="10000x5000", help="synthetic image size WxH")
+    parser.add_argument("--images", type=int, default=3, help="distinct images to cycle through")
+    parser.add_argument("--opened", type=int, default=30, help="X-rays opened one after another for the memory test")
+    args = parser.parse_args()
+    w, h = map(int, args.size.lower().split("x"))
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ["XRAY_DB"] = os.path.join(tmp.name, "patients.db")
+    sys.path.insert(0, ROOT)
+    sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+    from PySide6.QtCore import QEvent
+    from PySide6.QtWidgets import QApplication
+
+    import app
+    from loadgen import make_image
+    from xray_app.blobstore import put_file
+    from xray_app.db import get_connection, init_db
+    from xray_app.previews import generate_previews, generate_tiles
+    from xray_app.ui.tiles import tile_cache, tile_loader
+
+    qapp = QApplication.instance() or QApplication(sys.argv[:1])
+    init_db()
+    conn = get_connection()
+    paths = []
+    for i in range(args.images):
+        src = os.path.join(tmp.name, f"large{i}.png")
+        make_image(src, w, h, i)
+        paths.append(put_file(conn, src))
+        generate_previews(paths[-1])
+    start = time.perf_counter()
+    generate_tiles(paths[0])
+    print(f"{w}x{h} ({w * h / 1e6:.0f} MP): tile pyramid built in {time.perf_counter() - start:.1f}s")
+
+    window = app.MainWindow(1)
+    window.resize(1600, 1000)
+    window.show()
+    qapp.processEvents()
+    view = window.viewer_pred
+
+    print(f"\n{'':20} {'median ms':>10} {'p95 ms':>8} {'max ms':>8} {'>16.7ms':>8} {'RSS MB':>7}")
+    results = []
+    base = rss_mb()
+    legacy = legacy_scene(paths[0])
+    view.setScene(legacy)
+    results.append(("full QPixmap (old)", sweep(qapp, view), rss_mb() - base))
+    view.setScene(None)
+    del legacy
+    base = rss_mb()
+    window.show_xray(paths[0], "[]")
+    results.append(("tiled, cold cache", sweep(qapp, view), rss_mb() - base))
+    results.append(("tiled, warm cache", sweep(qapp, view), rss_mb() - base))
+    for label, frames, rss in results:
+        frames.sort()
+        slow = sum(f > FRAME_MS for f in frames) / len(frames)
+        print(f"{label:20} {statistics.median(frames):10.2f} {frames[int(0.95 * len(frames))]:8.2f} "
+              f"{frames[-1]:8.2f} {slow:8.0%} {rss:7}")
+    print(f"tile cache: {tile_cache.stats()}")
+
+    print(f"\nopening {args.opened} X-rays, zooming in on each")
+    for i in range(args.opened):
+        window.show_xray(paths[i % len(paths)], "[]")
+        # what the event loop does with the previous scene's deleteLater()
+        qapp.sendPostedEvents(None, QEvent.DeferredDelete)
+        for _ in range(8):
+            view.zoom(True)
+        for _ in range(20):
+            frame(qapp, view)
+        if (i + 1) % 10 == 0:
+            print(f"  {i + 1:3} opened: RSS {rss_mb()} MB, tile cache {tile_cache.bytes >> 20} MB")
+    tile_loader.stop()
+    tile_loader.pool.waitForDone()
+    window.close()
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
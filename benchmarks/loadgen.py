@@ -0,0 +1,139 @@
+"""
+Load generator: builds a synthetic practice (users, patients, X-rays with
+prediction JSON and detections, and panoramic-looking images in the image
+store) for the benchmark suite, or on its own to try the app at scale.
+
+    python benchmarks/loadgen.py <dir> [--patients 50000] [--xrays 250000] [--images 20]
+    XRAY_DB=<dir>/patients.db python app.py
+
+The database and images go to <dir>; nothing under data/ is touched.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+DEFAULTS = {"users": 20, "patients": 50_000, "xrays": 250_000, "images": 20, "image_size": "2800x1400"}
+
+# detections per X-ray and how often each class shows up (Impacted, Caries, Peri Lesion, Deep Caries)
+MAX_BOXES = 12
+CLASS_WEIGHTS = (0.15, 0.55, 0.1, 0.2)
+# X-ray rows built in memory at a time
+CHUNK = 50_000
+
+
+def add_arguments(parser):
+    parser.add_argument("--users", type=int, default=DEFAULTS["users"])
+    parser.add_argument("--patients", type=int, default=DEFAULTS["patients"])
+    parser.add_argument("--xrays", type=int, default=DEFAULTS["xrays"])
+    parser.add_argument("--images", type=int, default=DEFAULTS["images"], help="distinct image files")
+    parser.add_argument("--image-size", default=DEFAULTS["image_size"], help="WxH of the synthetic images")
+
+
+def params(args):
+    return {k: getattr(args, k) for k in DEFAULTS}
+
+
+def make_boxes(rnd, w, h):
+    boxes = []
+    for _ in range(min(MAX_BOXES, int(rnd.expovariate(1 / 3)))):
+        bw, bh = rnd.uniform(0.02, 0.08) * w, rnd.uniform(0.05, 0.2) * h
+        x1, y1 = rnd.uniform(0, w - bw), rnd.uniform(0.2 * h, 0.8 * h - bh)
+        boxes.append({"class": rnd.choices(range(4), CLASS_WEIGHTS)[0], "conf": round(rnd.uniform(0.4, 0.99), 4),
+                      "x1": x1, "y1": y1, "x2": x1 + bw, "y2": y1 + bh})
+    return boxes
+
+
+def make_image(path, w, h, seed):
+    """A dark panoramic with two arches of blurred bright "teeth" and sensor noise."""
+    from PIL import Image, ImageChops, ImageDraw, ImageFilter
+
+    rnd = random.Random(seed)
+    img = Image.new("L", (w, h), 40)
+    draw = ImageDraw.Draw(img)
+    for row, top in ((0, 0.22), (1, 0.52)):
+        n = 16
+        for i in range(n):
+            cx = w * (0.12 + 0.76 * (i + 0.5) / n)
+            sag = 0.08 * h * ((2 * i / (n - 1) - 1) ** 2) * (1 if row else -1)
+            tw, th = w * 0.38 / n, h * rnd.uniform(0.2, 0.26)
+            y = h * top - sag
+            draw.ellipse((cx - tw, y, cx + tw, y + th), fill=rnd.randint(150, 230))
+    img = img.filter(ImageFilter.GaussianBlur(w / 600))
+    noise = Image.effect_noise((w, h), 12).point(lambda v: v - 128 + 16)
+    ImageChops.add(img, noise).save(path)
+
+
+def generate(db_path, users, patients, xrays, images, image_size, seed=0):
+    """Create (or overwrite) the synthetic practice; returns the stored image paths."""
+    from bench_search import FIRST, LAST
+    from xray_app.blobstore import put_file
+    from xray_app.db import connect, migrate
+    from xray_app.previews import generate_previews
+
+    if images < 1:
+        raise ValueError("need at least one image")
+    w, h = map(int, image_size.lower().split("x"))
+    rnd = random.Random(seed)
+    for path in (db_path, db_path + "-wal", db_path + "-shm"):
+        if os.path.exists(path):
+            os.remove(path)
+    conn = connect(db_path)
+    migrate(conn)
+
+    paths = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(images):
+            src = os.path.join(tmp, f"synthetic{i}.png")
+            make_image(src, w, h, seed + i)
+            paths.append(put_file(conn, src))
+            generate_previews(paths[-1])
+
+    with conn:
+        conn.executemany("INSERT INTO users(id,username,password) VALUES(?,?,?)",
+                         ((u, f"user{u}", "pw") for u in range(1, users + 1)))
+        rows = []
+        for pid in range(1, patients + 1):
+            first, last = rnd.choice(FIRST), rnd.choice(LAST)
+            rows.append((pid, f"{first} {rnd.choice(LAST)} {last}",
+                         f"{rnd.randint(1, 28):02d}-{rnd.randint(1, 12):02d}-{rnd.randint(1930, 2020)}",
+                         f"{first}.{last}{pid}@example.com".lower(), rnd.randint(1, users)))
+        conn.executemany("INSERT INTO patients(id,name,dob,email,user_id) VALUES(?,?,?,?,?)", rows)
+        for first_id in range(1, xrays + 1, CHUNK):
+            xray_rows, detection_rows = [], []
+            for xid in range(first_id, min(first_id + CHUNK, xrays + 1)):
+                boxes = make_boxes(rnd, w, h)
+                xray_rows.append((xid, rnd.randint(1, patients), rnd.choice(paths), json.dumps(boxes), "synthetic"))
+                detection_rows.extend((xid, b["class"], b["conf"], b["x1"], b["y1"], b["x2"], b["y2"], "synthetic")
+                                      for b in boxes)
+            conn.executemany(
+                "INSERT INTO xrays(id,patient_id,filepath,prediction,model_version) VALUES(?,?,?,?,?)", xray_rows)
+            conn.executemany(
+                "INSERT INTO detections(xray_id,class,conf,x1,y1,x2,y2,model_version) VALUES(?,?,?,?,?,?,?,?)",
+                detection_rows)
+    conn.execute("PRAGMA optimize")
+    conn.close()
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("dir", help="output directory (patients.db and xrays/ go here)")
+    add_arguments(parser)
+    args = parser.parse_args()
+    os.makedirs(args.dir, exist_ok=True)
+    # the image store lives next to the database, see xray_app/blobstore.py
+    os.environ["XRAY_DB"] = os.path.abspath(os.path.join(args.dir, "patients.db"))
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    start = time.perf_counter()
+    generate(os.environ["XRAY_DB"], **params(args))
+    print(f"generated {args.patients} patients / {args.xrays} X-rays / {args.images} images "
+          f"in {time.perf_counter() - start:.1f}s -> {os.environ['XRAY_DB']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+import os
+import sys
+import tempfile
+
+# set before xray_app is imported: a throwaway database and a cheap KDF
+os.environ["XRAY_DB"] = os.path.join(tempfile.mkdtemp(), "patients.db")
+os.environ["XRAY_KDF_COST"] = "4"
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from xray_app.db import connect, migrate
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = connect(str(tmp_path / "patients.db"))
+    migrate(conn)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def qapp():
+    pytest.importorskip("PySide6")
+    from PySide6.QtCore import QCoreApplication
+
+    return QCoreApplication.instance() or QCoreApplication([])
@@ -0,0 +1,49 @@
+import os
+
+from xray_app import blobstore
+from xray_app.detections import insert_xray
+
+
+def test_blob_refcounts_after_deleting_patient(conn, tmp_path):
+    shared, own = tmp_path / "shared.png", tmp_path / "own.png"
+    shared.write_bytes(b"shared image")
+    own.write_bytes(b"only patient 1")
+    with conn:
+        conn.execute("INSERT INTO patients(id,name,user_id) VALUES(1,'a',1), (2,'b',1)")
+    shared_path = blobstore.put_file(conn, str(shared))
+    own_path = blobstore.put_file(conn, str(own))
+    # the same bytes stored again are the same blob
+    assert blobstore.put_file(conn, str(shared)) == shared_path
+    with conn:
+        insert_xray(conn, 1, shared_path, "[]")
+        insert_xray(conn, 1, own_path, "[]")
+        insert_xray(conn, 2, shared_path, "[]")
+
+    # as MainWindow.remove_patient does it
+    with conn:
+        conn.execute("DELETE FROM xrays WHERE patient_id=1")
+        conn.execute("DELETE FROM patients WHERE id=1")
+    assert dict(conn.execute("SELECT path, refcount FROM blobs")) == {shared_path: 1, own_path: 0}
+
+    assert blobstore.collect_garbage(conn) == (1, len(b"only patient 1"))
+    assert os.path.exists(shared_path) and not os.path.exists(own_path)
+    assert [p for (p,) in conn.execute("SELECT path FROM blobs")] == [shared_path]
+
+
+def test_store_sits_beside_the_connections_database(conn, tmp_path):
+    src = tmp_path / "scan.PNG"
+    src.write_bytes(b"scan")
+    path = blobstore.put_file(conn, str(src))
+    assert blobstore.store_dir(conn) == str(tmp_path / "xrays")
+    assert path.startswith(str(tmp_path / "xrays") + os.sep) and path.endswith(".png")
+    with open(path, "rb") as f:
+        assert f.read() == b"scan"
+
+
+def test_unused_blob_is_kept_during_grace(conn, tmp_path):
+    src = tmp_path / "a.png"
+    src.write_bytes(b"never used")
+    path = blobstore.put_file(conn, str(src))
+    assert blobstore.collect_garbage(conn, grace=3600) == (0, 0)
+    assert blobstore.collect_garbage(conn, grace=-1) == (1, len(b"never used"))
+    assert not os.path.exists(path)
@@ -0,0 +1,52 @@
+import itertools
+
+import pytest
+
+from xray_app import cache as cache_mod
+from xray_app.cache import PredictionCache
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    # a clock that always moves, so last_used never ties
+    clock = itertools.count(1)
+    monkeypatch.setattr(cache_mod.time, "time", lambda: float(next(clock)))
+    return PredictionCache(str(tmp_path / "cache.db"), max_entries=3)
+
+
+def test_least_recently_used_entries_are_evicted(cache):
+    for name in "abc":
+        cache.put(name, "m1", 0.4, f"[{name}]")
+    assert cache.get("a", "m1", 0.4) == "[a]"   # b is now the oldest
+    cache.put("d", "m1", 0.4, "[d]")
+    assert cache.get("b", "m1", 0.4) is None
+    assert [cache.get(name, "m1", 0.4) for name in "acd"] == ["[a]", "[c]", "[d]"]
+    assert cache.stats()["entries"] == 3
+    # a put for a cached key replaces it without evicting anything
+    cache.put("a", "m1", 0.4, "[a2]")
+    assert cache.get("a", "m1", 0.4) == "[a2]" and cache.get("c", "m1", 0.4) == "[c]"
+
+
+def test_new_model_hash_invalidates_other_entries(cache):
+    cache.put("a", "m1", 0.4, "[a]")
+    cache.put("a", "m1", 0.5, "[a.5]")
+    assert cache.get("a", "m2", 0.4) is None
+    assert cache.stats()["entries"] == 0
+    cache.put("a", "m2", 0.4, "[a2]")
+    assert cache.get("a", "m1", 0.4) is None
+    assert cache.get("a", "m2", 0.4) is None   # the m1 lookup dropped it again
+
+
+def test_counters_persist_across_instances_until_cleared(cache):
+    cache.put("a", "m1", 0.4, "[a]")
+    cache.get("a", "m1", 0.4)
+    cache.get("b", "m1", 0.4)
+    cache.get("a", "m1", 0.4)
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"], stats["max_entries"]) == (2, 1, 1, 3)
+    other = PredictionCache(cache.path, max_entries=3)
+    assert other.get("a", "m1", 0.4) == "[a]"
+    assert (other.stats()["hits"], other.stats()["misses"]) == (3, 1)
+    other.clear()
+    assert cache.stats()["hits"] == 0 and other.stats()["entries"] == 0
+    assert other.get("a", "m1", 0.4) is None
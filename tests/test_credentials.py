@@ -0,0 +1,40 @@
+from xray_app import credentials
+from xray_app.credentials import Sessions, authenticate, create_user, verify_password
+
+
+def test_plaintext_password_is_upgraded_on_login(conn):
+    with conn:
+        user_id = conn.execute("INSERT INTO users(username,password) VALUES('ann','secret')").lastrowid
+    assert authenticate(conn, "ann", "secret") == user_id
+    stored = conn.execute("SELECT password FROM users WHERE id=?", (user_id,)).fetchone()[0]
+    assert stored.startswith("scrypt$") and "secret" not in stored
+    assert verify_password("secret", stored) == (True, False)
+    assert authenticate(conn, "ann", "secret") == user_id
+
+
+def test_wrong_password(conn):
+    create_user(conn, "bob", "right")
+    with conn:
+        conn.execute("INSERT INTO users(username,password) VALUES('carl','plain')")
+    assert authenticate(conn, "bob", "wrong") is None
+    assert authenticate(conn, "nobody", "right") is None
+    assert authenticate(conn, "carl", "wrong") is None
+    # a failed login leaves a plaintext row alone
+    assert conn.execute("SELECT password FROM users WHERE username='carl'").fetchone()[0] == "plain"
+
+
+def test_session_expires_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(credentials.time, "monotonic", lambda: now[0])
+    sessions = Sessions(ttl=60)
+    token = sessions.open(7, "ann", "secret")
+    assert sessions.resume("ann", "wrong") is None
+    now[0] += 50
+    assert sessions.resume("ann", "secret") == (token, 7)
+    # resume() restarted the countdown
+    now[0] += 50
+    assert sessions.is_open(token)
+    now[0] += 61
+    assert not sessions.is_open(token)
+    assert sessions.resume("ann", "secret") is None
+    assert Sessions(ttl=0).open(7, "ann", "secret") is None
@@ -0,0 +1,40 @@
+import json
+
+from xray_app.credentials import authenticate
+from xray_app.db import MIGRATIONS, _schema_v1, close_connection, connect, get_connection, migrate
+
+
+def test_migrate_v0_database_with_rows(tmp_path):
+    conn = connect(str(tmp_path / "old.db"))
+    # a database from before migrations: the original tables, user_version 0
+    with conn:
+        _schema_v1(conn)
+        conn.execute("INSERT INTO users(id,username,password) VALUES(1,'ann','secret')")
+        conn.execute("INSERT INTO patients(id,name,dob,email,user_id) VALUES(1,'Maria Silva','02-03-1980','m@x.org',1)")
+        boxes = [{"class": 2, "conf": 0.9, "x1": 1, "y1": 2, "x2": 3, "y2": 4}]
+        conn.execute("INSERT INTO xrays(id,patient_id,filepath,prediction) VALUES(1,1,'a.png',?)", (json.dumps(boxes),))
+        conn.execute("INSERT INTO xrays(id,patient_id,filepath,prediction) VALUES(2,1,'b.png',NULL)")
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == 0
+
+    assert migrate(conn) == MIGRATIONS[-1][0]
+    assert conn.execute("SELECT id, patient_id, filepath FROM xrays ORDER BY id").fetchall() == \
+        [(1, 1, "a.png"), (2, 1, "b.png")]
+    assert conn.execute("SELECT name, dob, email FROM patients").fetchall() == [("Maria Silva", "02-03-1980", "m@x.org")]
+    assert authenticate(conn, "ann", "secret") == 1
+    # running it again changes nothing
+    assert migrate(conn) == MIGRATIONS[-1][0]
+    conn.close()
+
+
+def test_migrations_are_numbered_in_order():
+    assert [version for version, _ in MIGRATIONS] == list(range(1, len(MIGRATIONS) + 1))
+
+
+def test_connection_settings_and_per_thread_pool(tmp_path):
+    path = str(tmp_path / "p.db")
+    conn = get_connection(path)
+    assert get_connection(path) is conn
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    close_connection(path)
+    assert get_connection(path) is not conn
+    close_connection(path)
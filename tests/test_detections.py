@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+from xray_app.db import MIGRATIONS, connect, migrate
+from xray_app.detections import class_id, find_patients, insert_xray, update_prediction, xray_findings
+
+
+def boxes(*found):
+    return json.dumps([{"class": cls, "conf": conf, "x1": 1, "y1": 2, "x2": 3, "y2": 4} for cls, conf in found])
+
+
+def test_detections_backfilled_from_prediction_json(tmp_path):
+    conn = connect(str(tmp_path / "v3.db"))
+    with conn:
+        for _, step in MIGRATIONS[:3]:
+            step(conn)
+        conn.execute("PRAGMA user_version=3")
+        conn.execute("INSERT INTO patients(id,name,user_id) VALUES(1,'a',1)")
+        conn.execute("INSERT INTO xrays(id,patient_id,filepath,prediction) VALUES(1,1,'a.png',?)",
+                     (boxes((1, 0.8), (1, 0.3), (2, 0.6)),))
+        conn.execute("INSERT INTO xrays(id,patient_id,filepath,prediction) VALUES(2,1,'b.png','not json')")
+        conn.execute("INSERT INTO xrays(id,patient_id,filepath,prediction) VALUES(3,1,'c.png',NULL)")
+    migrate(conn)
+    assert xray_findings(conn, 1) == {1: 2, 2: 1}
+    assert xray_findings(conn, 1, min_conf=0.5) == {1: 1, 2: 1}
+    assert conn.execute("SELECT COUNT(*) FROM detections WHERE xray_id IN (2, 3)").fetchone()[0] == 0
+    conn.close()
+
+
+def test_find_patients_by_finding(conn):
+    with conn:
+        ann = conn.execute("INSERT INTO patients(name,user_id) VALUES('ann',1)").lastrowid
+        bob = conn.execute("INSERT INTO patients(name,user_id) VALUES('bob',1)").lastrowid
+        eve = conn.execute("INSERT INTO patients(name,user_id) VALUES('eve',2)").lastrowid
+        insert_xray(conn, ann, "a1.png", boxes((1, 0.9)))
+        insert_xray(conn, ann, "a2.png", boxes((1, 0.7)))
+        xid = insert_xray(conn, bob, "b.png", boxes((1, 0.45), (3, 0.9)))
+        insert_xray(conn, eve, "e.png", boxes((1, 0.95)))
+    assert [p[1] for p in find_patients(conn, 1, 0.5)] == ["ann", "eve"]
+    assert [p[1] for p in find_patients(conn, 1, 0.4, user_id=1)] == ["ann", "bob"]
+    assert [p[1] for p in find_patients(conn, 3)] == ["bob"]
+    # a new prediction replaces the X-ray's detections
+    with conn:
+        update_prediction(conn, xid, boxes((0, 0.6)))
+    assert find_patients(conn, 3) == []
+    assert [p[1] for p in find_patients(conn, class_id("impacted"))] == ["bob"]
+    # deleting the X-ray drops its detections
+    with conn:
+        conn.execute("DELETE FROM xrays WHERE id=?", (xid,))
+    assert find_patients(conn, 0) == []
+
+
+def test_class_id_accepts_names_and_ids():
+    assert class_id("Deep Caries") == class_id("deep caries") == class_id(3) == 3
+    with pytest.raises(ValueError):
+        class_id("cavity")
@@ -0,0 +1,84 @@
+import threading
+
+import pytest
+
+
+@pytest.fixture
+def queue(qapp):
+    from xray_app.ui.inference_queue import InferenceQueue
+
+    queue = InferenceQueue()
+    queue.results = []
+    queue.finished.connect(lambda job_id, result: queue.results.append((job_id, result)))
+    queue.failed.connect(lambda job_id, message: queue.results.append((job_id, message)))
+    yield queue
+    queue.cancel_all()
+    queue.pool.waitForDone()
+
+
+def blocker(queue):
+    """Submit a job that holds the single pool thread until the returned event is set."""
+    started, release = threading.Event(), threading.Event()
+
+    def hold():
+        started.set()
+        release.wait(5)
+        return "held"
+
+    job_id = queue.submit_task(hold)
+    assert started.wait(5)
+    return job_id, release
+
+
+def drain(queue, qapp):
+    queue.pool.waitForDone()
+    qapp.processEvents()
+
+
+def test_higher_priority_jobs_run_first(queue, qapp):
+    ran = []
+    first, release = blocker(queue)
+    low = queue.submit_task(ran.append, "low", priority=-1)
+    normal = queue.submit_task(ran.append, "normal")
+    high = queue.submit_task(ran.append, "high", priority=5)
+    assert queue.pending() == 4
+    release.set()
+    drain(queue, qapp)
+    assert ran == ["high", "normal", "low"]
+    assert [job_id for job_id, _ in queue.results] == [first, high, normal, low]
+    assert queue.pending() == 0
+
+
+def test_cancel_queued_and_running_jobs(queue, qapp):
+    ran = []
+    first, release = blocker(queue)
+    queued = queue.submit_task(ran.append, "queued")
+    assert queue.cancel(queued) and not queue.cancel(queued)
+    assert queue.cancel(first)
+    release.set()
+    drain(queue, qapp)
+    # neither the cancelled queued job nor the cancelled running one reports back
+    assert ran == [] and queue.results == []
+
+    polled, started = [], threading.Event()
+
+    def long_task(cancelled):
+        started.set()
+        while not cancelled():
+            threading.Event().wait(0.01)
+        polled.append(True)
+
+    job_id = queue.submit_task(long_task, cancellable=True)
+    assert started.wait(5)
+    assert queue.cancel_all() == [job_id]
+    drain(queue, qapp)
+    assert polled == [True] and queue.results == []
+
+
+def test_failed_job_reports_its_error(queue, qapp):
+    def broken():
+        raise OSError("image file is truncated")
+
+    job_id = queue.submit_task(broken)
+    drain(queue, qapp)
+    assert queue.results == [(job_id, "image file is truncated")]
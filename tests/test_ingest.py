@@ -0,0 +1,94 @@
+import json
+
+import pytest
+
+from xray_app import ingest as ingest_mod
+from xray_app.detections import insert_xray, update_prediction
+from xray_app.ingest import _write_batches, ingest
+
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    """predict_batch/predict/previews without YOLO: files whose bytes start with b"bad" cannot be read."""
+    calls = []
+
+    def unreadable(path):
+        with open(path, "rb") as f:
+            return f.read().startswith(b"bad")
+
+    def predict(path):
+        if unreadable(path):
+            raise OSError("image file is truncated")
+        return json.dumps([{"class": 0, "conf": 0.9, "x1": 1, "y1": 2, "x2": 3, "y2": 4}])
+
+    def predict_batch(paths, batch_size):
+        calls.append(list(paths))
+        return [predict(p) for p in paths]
+
+    def generate_previews(path):
+        with open(path, "rb") as f:
+            if f.read().startswith(b"badpreview"):
+                raise ValueError("cannot identify image file")
+
+    monkeypatch.setattr(ingest_mod, "predict", predict)
+    monkeypatch.setattr(ingest_mod, "predict_batch", predict_batch)
+    monkeypatch.setattr(ingest_mod, "generate_previews", generate_previews)
+    monkeypatch.setattr(ingest_mod.model_manager, "model_hash", lambda: "v1")
+    return calls
+
+
+@pytest.fixture
+def patient(conn):
+    with conn:
+        return conn.execute("INSERT INTO patients(name,user_id) VALUES('a',1)").lastrowid
+
+
+def make_files(tmp_path, contents):
+    files = []
+    for i, data in enumerate(contents):
+        path = tmp_path / f"in{i}.png"
+        path.write_bytes(data)
+        files.append(str(path))
+    return files
+
+
+def test_ingest_skips_unreadable_files(conn, patient, fake_model, tmp_path):
+    files = make_files(tmp_path, [b"one", b"bad bytes", b"two", b"badpreview", b"three"])
+    report = ingest(conn, patient, files, batch_size=2)
+    assert (report.count, report.skipped) == (3, 2)
+    rows = conn.execute("SELECT prediction, model_version FROM xrays WHERE patient_id=?", (patient,)).fetchall()
+    assert len(rows) == 3 and {version for _, version in rows} == {"v1"}
+    # run again: the good files are already in, the bad ones are skipped again
+    report = ingest(conn, patient, files, batch_size=2)
+    assert (report.count, report.skipped) == (0, 2)
+    assert "2 unreadable skipped" in str(report)
+
+
+def test_ingest_stops_between_batches_when_cancelled(conn, patient, fake_model, tmp_path):
+    files = make_files(tmp_path, [b"x%d" % i for i in range(7)])
+    report = ingest(conn, patient, files, batch_size=3, cancelled=lambda: len(fake_model) >= 1)
+    assert report.count == 3 and len(fake_model) == 1
+    assert conn.execute("SELECT COUNT(*) FROM xrays").fetchone()[0] == 3
+    # the rest comes in when the import is run again
+    assert ingest(conn, patient, files, batch_size=3).count == 4
+
+
+def test_ingest_cancelled_before_copying(conn, patient, fake_model, tmp_path):
+    files = make_files(tmp_path, [b"one", b"two"])
+    report = ingest(conn, patient, files, cancelled=lambda: True)
+    assert report.count == 0 and not fake_model
+    assert conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0] == 0
+
+
+def test_write_batches_counts_rows_written(conn, patient, fake_model, monkeypatch):
+    monkeypatch.setattr(ingest_mod, "WRITE_BATCH", 2)
+    pred = json.dumps([{"class": 1, "conf": 0.8, "x1": 1, "y1": 2, "x2": 3, "y2": 4}])
+    with conn:
+        ids = [insert_xray(conn, patient, f"{i}.png", "[]") for i in range(4)]
+        # deleted while its prediction was on the way
+        conn.execute("DELETE FROM xrays WHERE id=?", (ids[1],))
+    results = [(xid, pred) for xid in ids]
+    written = _write_batches(conn, results, lambda xid, pred, version: update_prediction(conn, xid, pred, version))
+    assert written == 3
+    assert conn.execute("SELECT COUNT(*) FROM xrays WHERE model_version='v1'").fetchone()[0] == 3
+    assert conn.execute("SELECT COUNT(*) FROM detections WHERE xray_id=?", (ids[1],)).fetchone()[0] == 0
@@ -0,0 +1,54 @@
+import pytest
+
+
+@pytest.fixture
+def model_class(qapp):
+    from xray_app.ui.patient_model import PatientTableModel
+
+    return PatientTableModel
+
+
+@pytest.fixture
+def patients(conn):
+    # duplicate names and missing emails/dates, so pages break inside runs of equal keys
+    rows = [(f"p{i % 7}", f"{1 + i % 28:02d}-{1 + i % 12:02d}-{1950 + i % 60}" if i % 5 else None,
+             f"{i}@x.org" if i % 3 else None, 1) for i in range(100)]
+    rows.append(("other user", "01-01-2000", "o@x.org", 2))
+    with conn:
+        conn.executemany("INSERT INTO patients(name,dob,email,user_id) VALUES(?,?,?,?)", rows)
+    return rows
+
+
+def fetch_all(model):
+    while model.canFetchMore():
+        model.fetchMore()
+    return [model.patient_id(row) for row in range(model.rowCount())]
+
+
+def test_keyset_pages_cover_every_patient_once(conn, patients, model_class):
+    from PySide6.QtCore import Qt
+
+    model = model_class(conn, 1, page_size=7)
+    assert model.rowCount() == 7
+    ids = fetch_all(model)
+    assert len(ids) == len(set(ids)) == 100
+    names = [model.patient_name(row) for row in range(model.rowCount())]
+    assert names == sorted(names)
+    for column in range(len(model.COLUMNS)):
+        for order in (Qt.AscendingOrder, Qt.DescendingOrder):
+            model.sort(column, order)
+            assert sorted(fetch_all(model)) == sorted(ids)
+
+
+def test_date_of_birth_sorts_by_date(conn, patients, model_class):
+    from PySide6.QtCore import Qt
+
+    model = model_class(conn, 1, page_size=9)
+    model.sort(1, Qt.DescendingOrder)
+    fetch_all(model)
+    dobs = [model.index(row, 1).data() for row in range(model.rowCount())]
+    dated = [d for d in dobs if d != "no data"]
+    as_date = [(d[6:], d[3:5], d[:2]) for d in dated]
+    assert as_date == sorted(as_date, reverse=True)
+    # patients without a date come last when sorting newest first
+    assert dobs[len(dated):] == ["no data"] * (len(dobs) - len(dated))
@@ -0,0 +1,55 @@
+import pytest
+
+from xray_app import refresh
+from xray_app.ingest import model_manager, reindex
+from xray_app.refresh import failed_version, stale_xrays
+
+
+@pytest.fixture
+def xrays(conn):
+    """Patients viewed at 2 and 1 and never, each with X-rays of several model versions."""
+    ids = {}
+    with conn:
+        for name, viewed in (("recent", 2.0), ("older", 1.0), ("never", None)):
+            pid = conn.execute("INSERT INTO patients(name,user_id,last_viewed) VALUES(?,1,?)", (name, viewed)).lastrowid
+            for version in (None, "v0", "v1", failed_version("v1"), "v2"):
+                ids[name, version] = conn.execute(
+                    "INSERT INTO xrays(patient_id,filepath,prediction,model_version) VALUES(?,?,'[]',?)",
+                    (pid, f"/missing/{name}-{version}.png", version)).lastrowid
+    return ids
+
+
+def expected(ids, names, versions):
+    return [ids[name, version] for name in names for version in reversed(versions)]
+
+
+def test_stale_xrays_order_and_limit(conn, xrays):
+    stale = [xid for xid, _ in stale_xrays(conn, "v1")]
+    assert stale == expected(xrays, ("recent", "older", "never"), (None, "v0", "v2"))
+    assert [xid for xid, _ in stale_xrays(conn, "v1", limit=4)] == stale[:4]
+    pid = conn.execute("SELECT id FROM patients WHERE name='older'").fetchone()[0]
+    assert [xid for xid, _ in stale_xrays(conn, "v1", pid)] == expected(xrays, ("older",), (None, "v0", "v2"))
+    assert stale_xrays(conn, None) == []
+
+
+def test_stale_xrays_walks_patients_when_many_are_stale(conn, xrays, monkeypatch):
+    sorted_plan = stale_xrays(conn, "v1", limit=5)
+    monkeypatch.setattr(refresh, "SORT_LIMIT", 1)
+    assert stale_xrays(conn, "v1", limit=5) == sorted_plan
+
+
+def test_stale_xrays_empty_once_all_predicted_or_failed(conn, xrays):
+    with conn:
+        conn.execute("UPDATE xrays SET model_version='v1' WHERE id % 2 = 0")
+        conn.execute("UPDATE xrays SET model_version=? WHERE id % 2 = 1", (failed_version("v1"),))
+    assert stale_xrays(conn, "v1") == []
+    assert len(stale_xrays(conn, "v2")) == len(xrays)
+
+
+def test_reindex_marks_missing_files_failed(conn, xrays, monkeypatch):
+    monkeypatch.setattr(model_manager, "model_hash", lambda: "v1")
+    report = reindex(conn, limit=4)
+    assert (report.count, report.skipped) == (0, 4)
+    assert len(stale_xrays(conn, "v1")) == 9 - 4
+    assert reindex(conn).skipped == 5
+    assert stale_xrays(conn, "v1") == []
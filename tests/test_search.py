@@ -0,0 +1,50 @@
+from xray_app.search import fts_query, search_patients
+
+
+def names(rows):
+    return [row[1] for row in rows]
+
+
+def add(conn, *patients):
+    with conn:
+        return [conn.execute("INSERT INTO patients(name,dob,email,user_id) VALUES(?,?,?,?)", p).lastrowid
+                for p in patients]
+
+
+def test_fts_query_quotes_every_word_as_a_prefix():
+    assert fts_query("mar sil") == '"mar"* "sil"*'
+    # punctuation and FTS5 syntax are not passed through
+    assert fts_query('o"neil AND -x*') == '"o"* "neil"* "AND"* "x"*'
+    assert fts_query("  ") is None and fts_query(None) is None
+
+
+def test_search_matches_word_prefixes_of_own_patients(conn):
+    add(conn, ("Maria Silva", "02-03-1980", "maria@x.org", 1),
+        ("Mario Santos", "11-12-1975", "ms@y.org", 1),
+        ("Marta Silveira", "02-03-1990", "marta@x.org", 2))
+    assert sorted(names(search_patients(conn, 1, "mar"))) == ["Maria Silva", "Mario Santos"]
+    assert names(search_patients(conn, 1, "mar sil")) == ["Maria Silva"]
+    assert names(search_patients(conn, 1, "1975")) == ["Mario Santos"]
+    assert names(search_patients(conn, 1, "y.org")) == ["Mario Santos"]
+    assert names(search_patients(conn, 2, "silv")) == ["Marta Silveira"]
+    assert search_patients(conn, 1, "") == []
+
+
+def test_index_follows_updates_and_deletes(conn):
+    pid, other = add(conn, ("Ana Costa", None, None, 1), ("Ana Lima", None, None, 1))
+    with conn:
+        conn.execute("UPDATE patients SET name='Ana Pereira' WHERE id=?", (pid,))
+        conn.execute("DELETE FROM patients WHERE id=?", (other,))
+    assert search_patients(conn, 1, "costa") == []
+    assert names(search_patients(conn, 1, "ana")) == ["Ana Pereira"]
+
+
+def test_short_prefixes_newest_first_and_paging(conn):
+    add(conn, *[(f"Jo {i}", None, None, 1) for i in range(5)])
+    rows = search_patients(conn, 1, "jo")
+    assert names(rows) == [f"Jo {i}" for i in reversed(range(5))]
+    assert search_patients(conn, 1, "jo", limit=2, offset=2) == rows[2:4]
+    by_name = search_patients(conn, 1, "jo", order_by="p.name ASC")
+    assert names(by_name) == [f"Jo {i}" for i in range(5)]
+    first = rows[-1][0]
+    assert names(search_patients(conn, 1, "jo", where="p.id <> ?", params=(first,))) == names(rows[:-1])
@@ -0,0 +1,30 @@
+import pytest
+
+tiling = pytest.importorskip("xray_app.tiling")
+
+
+def test_merge_boxes_across_tiles():
+    rows = [
+        # one finding seen by two overlapping tiles
+        [60, 10, 120, 50, 0.8, 1],
+        [80, 10, 140, 50, 0.9, 1],
+        # same place, other class: kept
+        [80, 10, 140, 50, 0.7, 2],
+        # same class elsewhere: kept
+        [300, 300, 340, 340, 0.5, 1],
+        # small box inside a larger one of the same class: merged into it
+        [95, 15, 105, 25, 0.6, 1],
+    ]
+    merged = tiling.merge_boxes(rows, threshold=0.6)
+    assert merged == [[80, 10, 140, 50, 0.9, 1], [80, 10, 140, 50, 0.7, 2], [300, 300, 340, 340, 0.5, 1]]
+    assert tiling.merge_boxes([]) == []
+
+
+def test_tile_grid_covers_the_image():
+    assert tiling.tile_grid(500, 400, tile_size=640) == [(0, 0)]
+    grid = tiling.tile_grid(1500, 700, tile_size=640, overlap=0.2)
+    xs, ys = sorted({x for x, _ in grid}), sorted({y for _, y in grid})
+    assert xs == [0, 512, 860] and ys == [0, 60]
+    # neighbouring tiles overlap, the last one ends at the edge
+    assert all(b - a < 640 for a, b in zip(xs, xs[1:]))
+    assert xs[-1] + 640 == 1500 and ys[-1] + 640 == 700
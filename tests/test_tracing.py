@@ -0,0 +1,47 @@
+import json
+from types import SimpleNamespace
+
+from xray_app.tracing import Tracer
+
+
+def test_disabled_tracer_records_nothing():
+    tracer = Tracer(enabled=False)
+    with tracer.span("a"):
+        pass
+    tracer.record("b", 5)
+    assert tracer.stats() == {} and not tracer.events
+
+
+def test_spans_and_recorded_stages_feed_the_stats():
+    tracer = Tracer(enabled=True, max_events=3, window=4)
+    with tracer.span("ingest.copy", files=2):
+        pass
+    for ms in (1, 2, 3, 4, 100):
+        tracer.record("predict.model", ms)
+    tracer.record_speed([SimpleNamespace(speed={"inference": 7.0, "postprocess": None})])
+    stats = tracer.stats()
+    assert list(stats) == ["ingest.copy", "predict.model", "yolo.inference"]
+    # the window keeps the last 4 durations of each stage
+    assert stats["predict.model"] == {"count": 4, "p50": 4.0, "p95": 100.0, "max": 100.0}
+    assert stats["yolo.inference"]["max"] == 7.0
+    # and the buffer the last 3 spans
+    assert [e[0] for e in tracer.events] == ["predict.model", "predict.model", "yolo.inference"]
+    tracer.clear()
+    assert tracer.stats() == {} and not tracer.events
+
+
+def test_export_chrome_trace_and_summary(tmp_path):
+    tracer = Tracer(enabled=True)
+    with tracer.span("db.query", rows=3):
+        pass
+    tracer.record("predict.model", 12.5)
+    tracer.export(tmp_path / "trace.json")
+    trace = json.loads((tmp_path / "trace.json").read_text())
+    events = trace["traceEvents"]
+    assert [(e["name"], e["cat"], e["ph"]) for e in events] == [("db.query", "db", "X"), ("predict.model", "predict", "X")]
+    assert events[0]["args"] == {"rows": 3} and events[1]["dur"] == 12500
+    tracer.export(tmp_path / "summary.json", chrome=False)
+    summary = json.loads((tmp_path / "summary.json").read_text())
+    assert summary["stats"]["predict.model"]["count"] == 1
+    assert [s["name"] for s in summary["spans"]] == ["db.query", "predict.model"]
+    assert summary["spans"][1]["ms"] == 12.5
@@ -0,0 +1 @@
+"""Core (Qt-free) building blocks of the X-ray Management App."""
@@ -0,0 +1,73 @@
+"""
+Inference backends behind predict().
+
+Every backend is an ultralytics export of model/best.pt that YOLO() can load
+again (ultralytics picks ONNX Runtime / OpenVINO from the file type), so the
+rest of the app keeps calling the same model object. Exports are written next
+to best.pt and redone when best.pt is newer than them. The backend in use
+comes from XRAY_BACKEND (see config.py).
+"""
+import os
+import shutil
+
+from .config import CALIBRATION_DATA
+
+
+class Backend:
+    def __init__(self, name, export_format=None, suffix=None, description="", **export_kwargs):
+        self.name = name
+        self.export_format = export_format
+        self.suffix = suffix
+        self.description = description
+        self.export_kwargs = export_kwargs
+
+    def artifact_path(self, model_path):
+        if self.export_format is None:
+            return model_path
+        return os.path.splitext(model_path)[0] + self.suffix
+
+    def is_stale(self, model_path):
+        path = self.artifact_path(model_path)
+        return path != model_path and (
+            not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(model_path))
+
+    def export(self, model_path):
+        """(Re-)export best.pt to this backend's format; returns the artifact path."""
+        from ultralytics import YOLO
+
+        target = self.artifact_path(model_path)
+        kwargs = dict(self.export_kwargs)
+        if kwargs.get("int8") and CALIBRATION_DATA:
+            kwargs["data"] = CALIBRATION_DATA
+        exported = YOLO(model_path).export(format=self.export_format, **kwargs)
+        if os.path.abspath(exported) != os.path.abspath(target):
+            # variants of one format (e.g. int8) share ultralytics' default output name
+            if os.path.isdir(target):
+                shutil.rmtree(target)
+            elif os.path.exists(target):
+                os.remove(target)
+            os.replace(exported, target)
+        return target
+
+    def load(self, model_path):
+        from ultralytics import YOLO
+
+        if self.is_stale(model_path):
+            self.export(model_path)
+        return YOLO(self.artifact_path(model_path), task="detect")
+
+
+BACKENDS = {b.name: b for b in (
+    Backend("torch", description="PyTorch weights as trained (reference)"),
+    Backend("onnx", "onnx", ".onnx", "ONNX Runtime on CPU", simplify=True),
+    Backend("openvino", "openvino", "_openvino_model", "OpenVINO FP32 on CPU"),
+    Backend("openvino-int8", "openvino", "_int8_openvino_model",
+            "OpenVINO INT8 (post-training quantized) on CPU", int8=True),
+)}
+
+
+def get_backend(name):
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"unknown backend {name!r}, expected one of {', '.join(BACKENDS)}") from None
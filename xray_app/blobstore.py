@@ -0,0 +1,141 @@
+"""
+Content-addressed store for X-ray image files.
+
+Each distinct image is kept once, at xrays/ab/cd/<sha256><ext> next to the
+database file (see store_dir()), so
+adding the same scan again (for any patient) costs no space and two files
+with the same name can no longer overwrite each other. The blobs table
+(migration 7 in db.py) counts the xrays rows pointing at each file; triggers
+keep the count in step, and collect_garbage() deletes files nobody uses.
+
+Files are brought in by reflink (copy-on-write clone) or hardlink when the
+source is on the same filesystem, otherwise by a streamed copy.
+"""
+import os
+import shutil
+import time
+
+from .cache import file_sha256
+from .config import STORE_GRACE, STORE_HARDLINKS
+from .db import DB_PATH, db_file
+from .previews import remove_previews
+
+BLOB_DIR = os.path.join(os.path.dirname(DB_PATH), "xrays")
+
+# Linux ioctl cloning a whole file (btrfs, XFS, ...)
+FICLONE = 0x40049409
+
+
+def store_dir(conn):
+    """The image store of conn's database: xrays/ beside its file."""
+    path = db_file(conn)
+    return os.path.join(os.path.dirname(path), "xrays") if path else BLOB_DIR
+
+
+def blob_path(digest, ext, root=BLOB_DIR):
+    return os.path.join(root, digest[:2], digest[2:4], digest + ext.lower())
+
+
+def _reflink(src, dest):
+    import fcntl
+
+    with open(src, "rb") as s, open(dest, "wb") as d:
+        fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+
+
+def _materialize(src, dest):
+    """Put src's bytes at dest by the cheapest means available; returns how."""
+    try:
+        _reflink(src, dest)
+        return "reflink"
+    except (ImportError, OSError):
+        if os.path.exists(dest):
+            os.remove(dest)
+    if STORE_HARDLINKS:
+        try:
+            os.link(src, dest)
+            return "hardlink"
+        except OSError:
+            pass
+    # copyfile streams (sendfile on Linux) rather than reading the file into memory
+    shutil.copyfile(src, dest)
+    return "copy"
+
+
+def put_file(conn, src, root=None):
+    """
+    Store src and return its path in the store (commits). The blob is
+    claimed before its file is checked, so a concurrent collect_garbage()
+    either finishes first (and the file is written again) or leaves it alone.
+    """
+    digest = file_sha256(src)
+    dest = blob_path(digest, os.path.splitext(src)[1], root or store_dir(conn))
+    with conn:
+        conn.execute("""
+          INSERT INTO blobs(hash, path, size, created) VALUES(?,?,?,?)
+          ON CONFLICT(hash) DO UPDATE SET created = excluded.created, released = NULL
+        """, (digest, dest, os.path.getsize(src), time.time()))
+        # same bytes stored earlier under another extension
+        dest = conn.execute("SELECT path FROM blobs WHERE hash=?", (digest,)).fetchone()[0]
+    if not os.path.exists(dest):
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        tmp = f"{dest}.{os.getpid()}.tmp"
+        try:
+            _materialize(src, tmp)
+            os.replace(tmp, dest)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+    return dest
+
+
+def collect_garbage(conn, grace=STORE_GRACE):
+    """
+    Delete blobs no xrays row uses: at once when their last row went away,
+    after `grace` seconds when they were stored but never used (e.g. an
+    import that failed before its row was written). Returns (files, bytes).
+    """
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        rows = conn.execute("""
+          SELECT hash, path, size FROM blobs
+          WHERE refcount <= 0 AND (released IS NOT NULL OR created < ?)
+        """, (time.time() - grace,)).fetchall()
+        conn.executemany("DELETE FROM blobs WHERE hash=?", [(h,) for h, _, _ in rows])
+        # removed while still holding the write lock, see put_file()
+        for _, path, _ in rows:
+            remove_previews(path)
+            if os.path.exists(path):
+                os.remove(path)
+    return len(rows), sum(size for _, _, size in rows)
+
+
+def adopt_files(conn, root=None):
+    """
+    Move X-rays stored before the blob store (data/xrays/<pid>/<name>) into
+    it, pointing their rows at the blob. Returns the number of rows moved.
+    """
+    root = root or store_dir(conn)
+    known = {path for (path,) in conn.execute("SELECT path FROM blobs")}
+    rows = [(xid, path) for xid, path in conn.execute("SELECT id, filepath FROM xrays")
+            if path not in known and os.path.exists(path)]
+    for xid, path in rows:
+        dest = put_file(conn, path, root)
+        with conn:
+            conn.execute("UPDATE xrays SET filepath=? WHERE id=?", (dest, xid))
+    inside = os.path.abspath(root) + os.sep
+    for old in {path for _, path in rows}:
+        # only ever delete the app's own old copies, never files it was pointed at elsewhere
+        if os.path.abspath(old).startswith(inside) and \
+                not conn.execute("SELECT 1 FROM xrays WHERE filepath=?", (old,)).fetchone():
+            remove_previews(old)
+            os.remove(old)
+    return len(rows)
+
+
+def stats(conn):
+    """Blob count and bytes stored, and the bytes the xrays rows would take without dedup."""
+    blobs, stored, referenced = conn.execute(
+        "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(size * refcount), 0) FROM blobs"
+    ).fetchone()
+    return {"blobs": blobs, "bytes": stored, "bytes_without_dedup": referenced}
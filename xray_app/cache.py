@@ -0,0 +1,140 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from .config import PREDICTION_CACHE_SIZE
+from .db import DB_PATH
+
+
+def cache_path(db_path):
+    """The prediction cache kept beside database db_path."""
+    return os.path.join(os.path.dirname(db_path), "prediction_cache.db")
+
+
+PREDICTION_CACHE_PATH = cache_path(DB_PATH)
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class PredictionCache:
+    """
+    Persistent cache of prediction JSON keyed by
+    (SHA-256 of the image bytes, hash of the weights, confidence threshold).
+
+    Entries made with other weights are dropped the first time the cache is
+    used with a new model hash. The cache holds at most max_entries rows and
+    evicts the least recently used ones beyond that. Hit and miss counts are
+    kept in the cache file too, so they add up across processes until clear().
+    """
+
+    def __init__(self, path=PREDICTION_CACHE_PATH, max_entries=PREDICTION_CACHE_SIZE):
+        self.path = path
+        self.max_entries = max_entries
+        self._counts = {"hits": 0, "misses": 0}   # not yet written to the counters table
+        self._conn = None
+        self._size = 0
+        self._model_hash = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("""
+              CREATE TABLE IF NOT EXISTS predictions (
+                image_hash TEXT NOT NULL,
+                model_hash TEXT NOT NULL,
+                conf       REAL NOT NULL,
+                prediction TEXT NOT NULL,
+                last_used  REAL NOT NULL,
+                PRIMARY KEY (image_hash, model_hash, conf)
+              )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_predictions_last_used ON predictions(last_used)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            self._size = self._conn.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+        return self._conn
+
+    def _use_model(self, conn, model_hash):
+        # invalidate everything produced by other weights
+        if model_hash != self._model_hash:
+            with conn:
+                self._size -= conn.execute("DELETE FROM predictions WHERE model_hash<>?", (model_hash,)).rowcount
+            self._model_hash = model_hash
+
+    def _write_counts(self, conn):
+        # inside the caller's transaction: misses wait for the put() that follows them
+        conn.executemany("""
+          INSERT INTO counters VALUES(?,?) ON CONFLICT(name) DO UPDATE SET value = value + excluded.value
+        """, [(name, n) for name, n in self._counts.items() if n])
+        self._counts = dict.fromkeys(self._counts, 0)
+
+    def get(self, image_hash, model_hash, conf):
+        with self._lock:
+            conn = self._connect()
+            self._use_model(conn, model_hash)
+            row = conn.execute(
+                "SELECT prediction FROM predictions WHERE image_hash=? AND model_hash=? AND conf=?",
+                (image_hash, model_hash, conf)
+            ).fetchone()
+            if row is None:
+                self._counts["misses"] += 1
+                return None
+            self._counts["hits"] += 1
+            with conn:
+                conn.execute(
+                    "UPDATE predictions SET last_used=? WHERE image_hash=? AND model_hash=? AND conf=?",
+                    (time.time(), image_hash, model_hash, conf)
+                )
+                self._write_counts(conn)
+            return row[0]
+
+    def put(self, image_hash, model_hash, conf, prediction):
+        with self._lock:
+            conn = self._connect()
+            self._use_model(conn, model_hash)
+            with conn:
+                key = (image_hash, model_hash, conf)
+                updated = conn.execute(
+                    "UPDATE predictions SET prediction=?, last_used=? WHERE image_hash=? AND model_hash=? AND conf=?",
+                    (prediction, time.time()) + key
+                ).rowcount
+                if not updated:
+                    conn.execute("INSERT INTO predictions VALUES(?,?,?,?,?)", key + (prediction, time.time()))
+                    self._size += 1
+                self._write_counts(conn)
+                if self._size > self.max_entries:
+                    # evict the least recently used entries
+                    conn.execute("""
+                      DELETE FROM predictions WHERE rowid IN (
+                        SELECT rowid FROM predictions ORDER BY last_used LIMIT ?
+                      )
+                    """, (self._size - self.max_entries,))
+                    self._size = self.max_entries
+
+    def clear(self):
+        with self._lock:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM predictions")
+                conn.execute("DELETE FROM counters")
+            self._size = 0
+            self._counts = dict.fromkeys(self._counts, 0)
+
+    def stats(self):
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                self._write_counts(conn)
+            counts = dict(conn.execute("SELECT name, value FROM counters"))
+            return {"hits": counts.get("hits", 0), "misses": counts.get("misses", 0), "entries": self._size,
+                    "max_entries": self.max_entries, "bytes": os.path.getsize(self.path)}
+
+
+prediction_cache = PredictionCache()
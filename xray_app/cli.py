@@ -0,0 +1,165 @@
+"""
+Headless entry point: python -m xray_app predict|ingest|reindex|versions|find|cache|store|export
+
+Reuses the same prediction and database code as the desktop app but never
+imports PySide6, so it can run on a server and starts without Qt.
+"""
+import argparse
+import json
+import sys
+
+from . import blobstore
+from .backends import BACKENDS, get_backend
+from .cache import cache_path, prediction_cache
+from .config import BATCH_SIZE, BACKEND, POOL_WORKERS, TILED
+from .db import DB_PATH, get_connection, init_db
+from .detections import class_id, find_patients
+from .ingest import collect_images, ingest, reindex
+from .inference import model_manager, predict_batch
+from .refresh import version_counts
+from .tracing import tracer
+
+
+def cmd_predict(args):
+    files = collect_images(args.paths)
+    if not files:
+        sys.exit("no images found")
+    for path, pred_json in zip(files, predict_batch(files, args.batch_size)):
+        print(json.dumps({"file": path, "boxes": json.loads(pred_json)}))
+
+
+def cmd_ingest(args, conn):
+    files = collect_images(args.paths)
+    if not files:
+        sys.exit("no images found")
+    if not conn.execute("SELECT 1 FROM patients WHERE id=?", (args.patient_id,)).fetchone():
+        sys.exit(f"patient {args.patient_id} not found")
+    print(ingest(conn, args.patient_id, files, args.batch_size, args.workers))
+
+
+def cmd_reindex(args, conn):
+    print(reindex(conn, args.patient_id, args.batch_size, args.workers, args.force, args.limit))
+
+
+def cmd_versions(args, conn):
+    active = model_manager.model_hash()
+    for version, count in version_counts(conn):
+        mark = "\tactive" if version == active else ""
+        print(f"{version or 'unknown'}\t{count}{mark}")
+
+
+def cmd_find(args, conn):
+    try:
+        cls = class_id(args.finding)
+    except ValueError as e:
+        sys.exit(str(e))
+    for pid, name, dob, email in find_patients(conn, cls, args.min_conf, args.user_id):
+        print(f"{pid}\t{name}\t{dob or ''}\t{email or ''}")
+
+
+def cmd_cache(args):
+    if args.clear:
+        prediction_cache.clear()
+    print(json.dumps(prediction_cache.stats()))
+
+
+def cmd_store(args, conn):
+    if args.adopt:
+        print(f"{blobstore.adopt_files(conn)} X-rays moved into the image store", file=sys.stderr)
+    if args.gc:
+        files, size = blobstore.collect_garbage(conn)
+        print(f"{files} unused images ({size} bytes) deleted", file=sys.stderr)
+    print(json.dumps(blobstore.stats(conn)))
+
+
+def cmd_export(args):
+    backend = get_backend(args.backend)
+    if backend.export_format is None:
+        sys.exit(f"backend {backend.name} uses {model_manager.model_path} as is, nothing to export")
+    print(backend.export(model_manager.model_path))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m xray_app", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--db", default=DB_PATH,
+                        help="database file; its image store and prediction cache sit beside it (default: %(default)s)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=POOL_WORKERS,
+                        help="inference processes for ingest/reindex (default: %(default)s, set XRAY_WORKERS to change)")
+    parser.add_argument("--backend", choices=list(BACKENDS), default=BACKEND,
+                        help="inference backend (default: %(default)s, set XRAY_BACKEND to change)")
+    parser.add_argument("--tiled", action="store_true", default=TILED,
+                        help="sliced inference for large panoramics (also XRAY_TILED=1)")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="time each stage and write a Chrome trace (chrome://tracing) to FILE")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("predict", help="print predictions as JSON lines, without touching the database")
+    p.add_argument("paths", nargs="+", help="image files and/or folders")
+
+    p = sub.add_parser("ingest", help="import X-rays for a patient")
+    p.add_argument("patient_id", type=int)
+    p.add_argument("paths", nargs="+", help="image files and/or folders")
+
+    p = sub.add_parser("reindex", help="re-run prediction for stored X-rays")
+    p.add_argument("--patient-id", type=int)
+    p.add_argument("--force", action="store_true", help="also redo X-rays already predicted by the current weights")
+    p.add_argument("--limit", type=int, help="re-analyse at most this many X-rays (recently viewed patients first)")
+
+    sub.add_parser("versions", help="number of X-rays predicted by each model version")
+
+    p = sub.add_parser("find", help="list patients with a finding, e.g. find 'Deep Caries' --min-conf 0.7")
+    p.add_argument("finding", help="class name or id")
+    p.add_argument("--min-conf", type=float, default=0.0)
+    p.add_argument("--user-id", type=int)
+
+    p = sub.add_parser("cache", help="show (or clear) the prediction cache")
+    p.add_argument("--clear", action="store_true")
+
+    p = sub.add_parser("store", help="show image store usage, optionally adopt old files or delete unused ones")
+    p.add_argument("--adopt", action="store_true", help="move X-rays stored before the image store into it")
+    p.add_argument("--gc", action="store_true", help="delete images no X-ray uses any more")
+
+    sub.add_parser("export", help="export best.pt for the selected --backend ahead of time")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    model_manager.backend = args.backend
+    model_manager.tiled = args.tiled
+    if not args.trace:
+        run(args)
+        return
+    tracer.enabled = True
+    try:
+        run(args)
+    finally:
+        tracer.export(args.trace)
+        for name, s in tracer.stats().items():
+            print(f"{name:28} n={s['count']:<6} p50={s['p50']:8.1f}ms p95={s['p95']:8.1f}ms", file=sys.stderr)
+
+
+def run(args):
+    prediction_cache.path = cache_path(args.db)
+    if args.command == "export":
+        cmd_export(args)
+        return
+    if args.command == "predict":
+        cmd_predict(args)
+        return
+    if args.command == "cache":
+        cmd_cache(args)
+        return
+    init_db(args.db)
+    conn = get_connection(args.db)
+    if args.command == "ingest":
+        cmd_ingest(args, conn)
+    elif args.command == "find":
+        cmd_find(args, conn)
+    elif args.command == "versions":
+        cmd_versions(args, conn)
+    elif args.command == "store":
+        cmd_store(args, conn)
+    else:
+        cmd_reindex(args, conn)
@@ -0,0 +1,74 @@
+import os
+
+# project root (the directory holding app.py, model/ and data/)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODEL_PATH = os.path.join(BASE_DIR, "model", "best.pt")
+
+CLASS_NAMES = {
+    0: "Impacted",
+    1: "Caries",
+    2: "Peri Lesion",
+    3: "Deep Caries"
+}
+
+# confidence threshold used for every prediction
+CONF_THRESHOLD = 0.4
+
+# images sent to YOLO per call during bulk import
+BATCH_SIZE = int(os.environ.get("XRAY_BATCH_SIZE", "8"))
+
+# maximum number of cached predictions kept in data/prediction_cache.db
+PREDICTION_CACHE_SIZE = int(os.environ.get("XRAY_CACHE_SIZE", "10000"))
+
+# longest edge (px) of the downscaled copies made at import time
+PREVIEW_SIZE = int(os.environ.get("XRAY_PREVIEW_SIZE", "2048"))
+THUMBNAIL_SIZE = 256
+# the viewer shows images larger than the preview from tiles of this size (see previews.generate_tiles)
+VIEW_TILE_SIZE = int(os.environ.get("XRAY_VIEW_TILE_SIZE", "512"))
+# memory for decoded tiles, shared by every open X-ray
+TILE_CACHE_MB = int(os.environ.get("XRAY_TILE_CACHE_MB", "256"))
+# memory for X-ray scenes built ahead of time for history navigation (see ui/prefetch.py)
+SCENE_CACHE_MB = int(os.environ.get("XRAY_SCENE_CACHE_MB", "96"))
+# history entries on each side of the shown one that are prepared in the background
+PREFETCH_AHEAD = int(os.environ.get("XRAY_PREFETCH_AHEAD", "2"))
+
+# inference backend for predict(): torch, onnx, openvino or openvino-int8 (see backends.py)
+BACKEND = os.environ.get("XRAY_BACKEND", "torch")
+# dataset yaml used to calibrate the openvino-int8 export
+CALIBRATION_DATA = os.environ.get("XRAY_CALIBRATION_DATA")
+
+# sliced inference for large panoramics (see tiling.py): XRAY_TILED=1 to enable
+TILED = os.environ.get("XRAY_TILED", "0") == "1"
+# tile edge in image pixels (the network input size, so tiles are not rescaled)
+TILE_SIZE = int(os.environ.get("XRAY_TILE_SIZE", "640"))
+# fraction of a tile shared with its neighbour
+TILE_OVERLAP = float(os.environ.get("XRAY_TILE_OVERLAP", "0.2"))
+# threads decoding and slicing the next images while the model runs
+TILE_WORKERS = int(os.environ.get("XRAY_TILE_WORKERS", "2"))
+
+# worker processes for bulk reindex/ingest (see pool.py), each with its own model
+POOL_WORKERS = int(os.environ.get("XRAY_WORKERS", str(max(1, (os.cpu_count() or 1) // 4))))
+
+# seconds between background passes re-predicting X-rays made by older weights (0 disables)
+REFRESH_INTERVAL = float(os.environ.get("XRAY_REFRESH_INTERVAL", "5"))
+
+# per-stage timing (see tracing.py): XRAY_TRACE=1 to record from startup
+TRACE = os.environ.get("XRAY_TRACE", "0") == "1"
+# spans kept in memory for export
+TRACE_BUFFER = int(os.environ.get("XRAY_TRACE_BUFFER", "100000"))
+
+# image store (see blobstore.py): link instead of copying files on the same
+# filesystem when reflinks are unavailable. A hardlinked blob shares the
+# source file's inode, so set XRAY_STORE_HARDLINKS=0 if sources get edited in place
+STORE_HARDLINKS = os.environ.get("XRAY_STORE_HARDLINKS", "1") == "1"
+# seconds a stored but not yet referenced image is kept (imports still running)
+STORE_GRACE = float(os.environ.get("XRAY_STORE_GRACE", "3600"))
+
+# password hashing (see credentials.py): scrypt with N = 2**KDF_COST; each
+# step up doubles the time and memory of a login (15: 32 MiB, ~0.2 s per core)
+KDF_COST = int(os.environ.get("XRAY_KDF_COST", "15"))
+KDF_BLOCK_SIZE = int(os.environ.get("XRAY_KDF_BLOCK_SIZE", "8"))
+KDF_PARALLELISM = int(os.environ.get("XRAY_KDF_PARALLELISM", "1"))
+# seconds a logged-out or locked session can be resumed without the KDF (0 disables)
+SESSION_TTL = float(os.environ.get("XRAY_SESSION_TTL", "900"))
@@ -0,0 +1,153 @@
+"""
+Password hashing and resumable login sessions.
+
+Passwords are stored as "scrypt$<log2 N>$<r>$<p>$<salt>$<hash>" (base64).
+Rows written before hashing hold the plaintext password: they still log in,
+and authenticate() rewrites them as a hash on the first success, as it does
+hashes made with cost parameters other than the configured ones.
+
+scrypt is slow on purpose, so the UI calls authenticate() and create_user()
+off the GUI thread (ui/auth.py). After a full login, `sessions` keeps a keyed
+SHA-256 of the password in memory for SESSION_TTL seconds, so logging back
+in as the same user after logout or at the lock screen is checked in
+microseconds instead of redoing the KDF.
+"""
+import base64
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+
+from .config import KDF_BLOCK_SIZE, KDF_COST, KDF_PARALLELISM, SESSION_TTL
+
+PREFIX = "scrypt"
+SALT_BYTES = 16
+HASH_BYTES = 32
+
+
+def _scrypt(password, salt, cost, r, p):
+    n = 1 << cost
+    # hashlib's default limit (32 MiB) is below what N = 2**15 needs
+    maxmem = 128 * r * (n + p + 2) + (1 << 20)
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, maxmem=maxmem, dklen=HASH_BYTES)
+
+
+def _b64(data):
+    return base64.b64encode(data).decode()
+
+
+def hash_password(password, cost=KDF_COST, r=KDF_BLOCK_SIZE, p=KDF_PARALLELISM):
+    salt = secrets.token_bytes(SALT_BYTES)
+    digest = _scrypt(password, salt, cost, r, p)
+    return "$".join((PREFIX, str(cost), str(r), str(p), _b64(salt), _b64(digest)))
+
+
+def _parse(stored):
+    parts = stored.split("$")
+    if len(parts) != 6 or parts[0] != PREFIX:
+        return None
+    try:
+        return (int(parts[1]), int(parts[2]), int(parts[3]),
+                base64.b64decode(parts[4], validate=True), base64.b64decode(parts[5], validate=True))
+    except ValueError:
+        return None
+
+
+def verify_password(password, stored, cost=KDF_COST, r=KDF_BLOCK_SIZE, p=KDF_PARALLELISM):
+    """(matches, needs_rehash): plaintext rows and other cost parameters need rehashing."""
+    parsed = _parse(stored)
+    if parsed is None:
+        return hmac.compare_digest(password.encode(), stored.encode()), True
+    s_cost, s_r, s_p, salt, digest = parsed
+    matches = hmac.compare_digest(_scrypt(password, salt, s_cost, s_r, s_p), digest)
+    return matches, (s_cost, s_r, s_p) != (cost, r, p)
+
+
+def authenticate(conn, username, password):
+    """User id for a correct username and password, else None. Upgrades the stored hash when needed (commits)."""
+    row = conn.execute("SELECT id, password FROM users WHERE username=?", (username,)).fetchone()
+    if row is None:
+        # same cost as a real check, so the delay does not tell which usernames exist
+        _scrypt(password, bytes(SALT_BYTES), KDF_COST, KDF_BLOCK_SIZE, KDF_PARALLELISM)
+        return None
+    user_id, stored = row
+    matches, needs_rehash = verify_password(password, stored)
+    if matches and needs_rehash:
+        with conn:
+            conn.execute("UPDATE users SET password=? WHERE id=? AND password=?",
+                         (hash_password(password), user_id, stored))
+    return user_id if matches else None
+
+
+def create_user(conn, username, password):
+    """Add a user with a hashed password; returns its id. Raises sqlite3.IntegrityError if the name is taken."""
+    hashed = hash_password(password)
+    with conn:
+        return conn.execute("INSERT INTO users(username,password) VALUES(?,?)", (username, hashed)).lastrowid
+
+
+class Sessions:
+    """
+    Logins that can be resumed without the KDF, by token. Each keeps the
+    user id, the username and an HMAC of the password under a key that
+    only exists in this process, and expires `ttl` seconds after it was
+    opened or last touched.
+    """
+
+    def __init__(self, ttl=SESSION_TTL):
+        self.ttl = ttl
+        self._key = secrets.token_bytes(32)
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def _verifier(self, username, password):
+        return hmac.new(self._key, f"{username}\0{password}".encode(), hashlib.sha256).digest()
+
+    def _expire(self):
+        now = time.monotonic()
+        for token in [t for t, s in self._sessions.items() if s[3] <= now]:
+            del self._sessions[token]
+
+    def open(self, user_id, username, password):
+        """Start a session after a successful authenticate(); returns its token, or None when disabled."""
+        if self.ttl <= 0:
+            return None
+        token = secrets.token_urlsafe(32)
+        with self._lock:
+            self._expire()
+            for old in [t for t, s in self._sessions.items() if s[0] == user_id]:
+                del self._sessions[old]
+            self._sessions[token] = (user_id, username, self._verifier(username, password),
+                                     time.monotonic() + self.ttl)
+        return token
+
+    def resume(self, username, password):
+        """(token, user id) of the live session of username if password matches it, else None."""
+        verifier = self._verifier(username, password)
+        with self._lock:
+            self._expire()
+            for token, (user_id, name, known, _) in self._sessions.items():
+                if name == username and hmac.compare_digest(known, verifier):
+                    self._sessions[token] = (user_id, name, known, time.monotonic() + self.ttl)
+                    return token, user_id
+        return None
+
+    def touch(self, token):
+        """Restart the countdown of a session (logout and lock do, so the TTL runs from there)."""
+        with self._lock:
+            session = self._sessions.get(token)
+            if session is not None:
+                self._sessions[token] = session[:3] + (time.monotonic() + self.ttl,)
+
+    def is_open(self, token):
+        with self._lock:
+            self._expire()
+            return token in self._sessions
+
+    def close(self, token):
+        with self._lock:
+            self._sessions.pop(token, None)
+
+
+sessions = Sessions()
@@ -0,0 +1,297 @@
+import os
+import sqlite3
+import threading
+
+from .config import BASE_DIR
+from .tracing import tracer
+
+# XRAY_DB points the app (and the image store and prediction cache next to it) at another database
+DB_PATH = os.environ.get("XRAY_DB") or os.path.join(BASE_DIR, "data", "patients.db")
+os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
+
+# applied once per connection
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",      # 16 MB page cache
+    "PRAGMA mmap_size=268435456",    # 256 MB
+    "PRAGMA busy_timeout=5000",
+)
+
+
+def _schema_v1(c):
+    c.execute("""
+      CREATE TABLE IF NOT EXISTS patients (
+        id    INTEGER PRIMARY KEY,
+        name  TEXT NOT NULL,
+        dob   TEXT,
+        email TEXT,
+        user_id INTEGER
+      )
+    """)
+    c.execute("""
+      CREATE TABLE IF NOT EXISTS xrays (
+        id         INTEGER PRIMARY KEY,
+        patient_id INTEGER NOT NULL,
+        filepath   TEXT NOT NULL,
+        prediction TEXT,
+        FOREIGN KEY(patient_id) REFERENCES patients(id)
+      )
+    """)
+    c.execute("""
+      CREATE TABLE IF NOT EXISTS users (
+        id       INTEGER PRIMARY KEY,
+        username TEXT UNIQUE NOT NULL,
+        password TEXT NOT NULL
+      )
+    """)
+
+
+def _indexes_v2(c):
+    c.execute("CREATE INDEX IF NOT EXISTS idx_xrays_patient ON xrays(patient_id, id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_patients_user_name ON patients(user_id, name)")
+
+
+def _patient_search_v3(c):
+    # external-content FTS5 index over patients, kept in sync by triggers
+    c.execute("""
+      CREATE VIRTUAL TABLE IF NOT EXISTS patients_fts USING fts5(
+        name, email, dob,
+        content='patients', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='1 2 3'
+      )
+    """)
+    c.execute("""
+      CREATE TRIGGER IF NOT EXISTS patients_fts_ai AFTER INSERT ON patients BEGIN
+        INSERT INTO patients_fts(rowid, name, email, dob) VALUES (new.id, new.name, new.email, new.dob);
+      END
+    """)
+    c.execute("""
+      CREATE TRIGGER IF NOT EXISTS patients_fts_ad AFTER DELETE ON patients BEGIN
+        INSERT INTO patients_fts(patients_fts, rowid, name, email, dob) VALUES ('delete', old.id, old.name, old.email, old.dob);
+      END
+    """)
+    c.execute("""
+      CREATE TRIGGER IF NOT EXISTS patients_fts_au AFTER UPDATE ON patients BEGIN
+        INSERT INTO patients_fts(patients_fts, rowid, name, email, dob) VALUES ('delete', old.id, old.name, old.email, old.dob);
+        INSERT INTO patients_fts(rowid, name, email, dob) VALUES (new.id, new.name, new.email, new.dob);
+      END
+    """)
+    c.execute("INSERT INTO patients_fts(patients_fts) VALUES ('rebuild')")
+
+
+def _detections_v4(c):
+    # one row per predicted box, backfilled from the JSON in xrays.prediction
+    c.execute("""
+      CREATE TABLE IF NOT EXISTS detections (
+        id            INTEGER PRIMARY KEY,
+        xray_id       INTEGER NOT NULL,
+        class         INTEGER NOT NULL,
+        conf          REAL NOT NULL,
+        x1 REAL, y1 REAL, x2 REAL, y2 REAL,
+        model_version TEXT,
+        FOREIGN KEY(xray_id) REFERENCES xrays(id)
+      )
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_detections_class_conf ON detections(class, conf)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_detections_xray ON detections(xray_id)")
+    c.execute("""
+      CREATE TRIGGER IF NOT EXISTS xrays_detections_ad AFTER DELETE ON xrays BEGIN
+        DELETE FROM detections WHERE xray_id = old.id;
+      END
+    """)
+    c.execute("""
+      INSERT INTO detections(xray_id, class, conf, x1, y1, x2, y2)
+      SELECT x.id, json_extract(j.value, '$.class'), json_extract(j.value, '$.conf'),
+             json_extract(j.value, '$.x1'), json_extract(j.value, '$.y1'),
+             json_extract(j.value, '$.x2'), json_extract(j.value, '$.y2')
+      FROM xrays x, json_each(x.prediction) j
+      WHERE x.prediction IS NOT NULL AND json_valid(x.prediction)
+    """)
+
+
+def _xray_model_version_v5(c):
+    # which weights produced xrays.prediction, so bulk re-analysis can skip done rows
+    c.execute("ALTER TABLE xrays ADD COLUMN model_version TEXT")
+    c.execute("""
+      UPDATE xrays SET model_version = (
+        SELECT d.model_version FROM detections d WHERE d.xray_id = xrays.id LIMIT 1
+      )
+    """)
+
+
+def _last_viewed_v6(c):
+    # when a patient's X-rays were last opened, to refresh stale predictions of recent patients first
+    c.execute("ALTER TABLE patients ADD COLUMN last_viewed REAL")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_patients_last_viewed ON patients(last_viewed)")
+    # only the indexed columns need the FTS row rewritten
+    c.execute("DROP TRIGGER IF EXISTS patients_fts_au")
+    c.execute("""
+      CREATE TRIGGER patients_fts_au AFTER UPDATE OF name, email, dob ON patients BEGIN
+        INSERT INTO patients_fts(patients_fts, rowid, name, email, dob) VALUES ('delete', old.id, old.name, old.email, old.dob);
+        INSERT INTO patients_fts(rowid, name, email, dob) VALUES (new.id, new.name, new.email, new.dob);
+      END
+    """)
+
+
+def _blob_store_v7(c):
+    # content-addressed image files (see blobstore.py), counted by the xrays rows using them
+    c.execute("""
+      CREATE TABLE IF NOT EXISTS blobs (
+        hash     TEXT PRIMARY KEY,
+        path     TEXT NOT NULL UNIQUE,
+        size     INTEGER NOT NULL,
+        refcount INTEGER NOT NULL DEFAULT 0,
+        created  REAL NOT NULL,
+        released REAL
+      )
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_blobs_unreferenced ON blobs(refcount) WHERE refcount <= 0")
+    now = "(julianday('now') - 2440587.5) * 86400.0"
+    c.execute("""
+      CREATE TRIGGER IF NOT EXISTS xrays_blobs_ai AFTER INSERT ON xrays BEGIN
+        UPDATE blobs SET refcount = refcount + 1, released = NULL WHERE path = new.filepath;
+      END
+    """)
+    c.execute(f"""
+      CREATE TRIGGER IF NOT EXISTS xrays_blobs_ad AFTER DELETE ON xrays BEGIN
+        UPDATE blobs SET refcount = refcount - 1,
+          released = CASE WHEN refcount <= 1 THEN {now} END
+        WHERE path = old.filepath;
+      END
+    """)
+    c.execute(f"""
+      CREATE TRIGGER IF NOT EXISTS xrays_blobs_au AFTER UPDATE OF filepath ON xrays BEGIN
+        UPDATE blobs SET refcount = refcount - 1,
+          released = CASE WHEN refcount <= 1 THEN {now} END
+        WHERE path = old.filepath;
+        UPDATE blobs SET refcount = refcount + 1, released = NULL WHERE path = new.filepath;
+      END
+    """)
+
+
+def _model_version_index_v8(c):
+    # the background refresh looks up stale rows by model_version (see refresh.stale_xrays)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_xrays_model_version ON xrays(model_version)")
+
+
+# (version, step) in order; a database's PRAGMA user_version is the last step applied.
+# Append new steps here, never edit ones that have shipped.
+MIGRATIONS = [
+    (1, _schema_v1),
+    (2, _indexes_v2),
+    (3, _patient_search_v3),
+    (4, _detections_v4),
+    (5, _xray_model_version_v5),
+    (6, _last_viewed_v6),
+    (7, _blob_store_v7),
+    (8, _model_version_index_v8),
+]
+
+
+def migrate(conn):
+    """Bring the schema up to date in place; returns the resulting version."""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for target, step in MIGRATIONS:
+        if target <= version:
+            continue
+        with conn:
+            conn.execute("BEGIN")
+            step(conn)
+            conn.execute(f"PRAGMA user_version={target}")
+        version = target
+    conn.execute("PRAGMA optimize")
+    return version
+
+
+def _db_span(sql):
+    # one stage per statement kind: "db.SELECT", "db.INSERT", ...
+    return tracer.span("db." + sql.lstrip().split(None, 1)[0].upper(), sql=sql[:200])
+
+
+class TracedCursor(sqlite3.Cursor):
+    def execute(self, sql, *args):
+        if not tracer.enabled:
+            return super().execute(sql, *args)
+        with _db_span(sql):
+            return super().execute(sql, *args)
+
+    def executemany(self, sql, *args):
+        if not tracer.enabled:
+            return super().executemany(sql, *args)
+        with _db_span(sql):
+            return super().executemany(sql, *args)
+
+
+class TracedConnection(sqlite3.Connection):
+    """sqlite3 connection timing statements and commits as tracing spans (see tracing.py)."""
+
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, *args):
+        if not tracer.enabled:
+            return super().execute(sql, *args)
+        with _db_span(sql):
+            return super().execute(sql, *args)
+
+    def executemany(self, sql, *args):
+        if not tracer.enabled:
+            return super().executemany(sql, *args)
+        with _db_span(sql):
+            return super().executemany(sql, *args)
+
+    def commit(self):
+        with tracer.span("db.COMMIT"):
+            return super().commit()
+
+    def __exit__(self, *exc):
+        # `with conn:` commits without going through commit()
+        with tracer.span("db.COMMIT"):
+            return super().__exit__(*exc)
+
+
+def connect(db_path=DB_PATH):
+    """Open a new connection with the tuned pragmas applied."""
+    conn = sqlite3.connect(db_path, factory=TracedConnection)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+_local = threading.local()
+
+
+def get_connection(db_path=DB_PATH):
+    """
+    Shared connection for the calling thread.
+
+    All windows on the GUI thread use the same connection; worker threads
+    (bulk import, CLI jobs) each get their own, as sqlite3 requires.
+    """
+    pool = getattr(_local, "pool", None)
+    if pool is None:
+        pool = _local.pool = {}
+    conn = pool.get(db_path)
+    if conn is None:
+        conn = pool[db_path] = connect(db_path)
+    return conn
+
+
+def close_connection(db_path=DB_PATH):
+    conn = getattr(_local, "pool", {}).pop(db_path, None)
+    if conn is not None:
+        conn.close()
+
+
+def db_file(conn):
+    """Path of the file conn's main database lives in ("" when in memory)."""
+    for _, name, path in conn.execute("PRAGMA database_list"):
+        if name == "main":
+            return path
+    return ""
+
+
+def init_db(db_path=DB_PATH):
+    migrate(get_connection(db_path))
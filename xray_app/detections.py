@@ -0,0 +1,81 @@
+"""
+Normalized storage of predictions: one detections row per box.
+
+xrays.prediction keeps the JSON blob for show_xray; the detections table
+mirrors it so findings can be filtered in SQL (see migration 4 in db.py).
+"""
+import json
+
+from .config import CLASS_NAMES
+
+# ids of patients with at least one detection of a class above a confidence
+FINDING_PATIENTS_SQL = """
+  SELECT x.patient_id FROM detections d JOIN xrays x ON x.id = d.xray_id
+  WHERE d.class = ? AND d.conf >= ?"""
+
+# the same as a condition on patients (aliased p)
+FINDING_FILTER_SQL = f"p.id IN ({FINDING_PATIENTS_SQL})"
+
+
+def class_id(name_or_id):
+    """Accept a CLASS_NAMES value (case-insensitive) or a numeric class id."""
+    for cid, name in CLASS_NAMES.items():
+        if str(name_or_id).lower() in (name.lower(), str(cid)):
+            return cid
+    raise ValueError(f"unknown class {name_or_id!r}, expected one of {', '.join(CLASS_NAMES.values())}")
+
+
+def save_detections(conn, xray_id, pred_json, model_version=None):
+    """Replace the detections of one X-ray with the boxes in pred_json (no commit)."""
+    conn.execute("DELETE FROM detections WHERE xray_id=?", (xray_id,))
+    conn.executemany(
+        "INSERT INTO detections(xray_id,class,conf,x1,y1,x2,y2,model_version) VALUES(?,?,?,?,?,?,?,?)",
+        [(xray_id, b["class"], b["conf"], b["x1"], b["y1"], b["x2"], b["y2"], model_version)
+         for b in json.loads(pred_json or "[]")]
+    )
+
+
+def insert_xray(conn, pid, filepath, pred_json, model_version=None):
+    """Add an xrays row and its detections (no commit); returns the new id."""
+    xray_id = conn.execute(
+        "INSERT INTO xrays(patient_id,filepath,prediction,model_version) VALUES(?,?,?,?)",
+        (pid, filepath, pred_json, model_version)
+    ).lastrowid
+    save_detections(conn, xray_id, pred_json, model_version)
+    return xray_id
+
+
+def update_prediction(conn, xray_id, pred_json, model_version=None):
+    """
+    Store a new prediction for an existing X-ray (no commit); returns the
+    number of rows updated, 0 if the X-ray has been deleted meanwhile.
+    """
+    updated = conn.execute("UPDATE xrays SET prediction=?, model_version=? WHERE id=?",
+                           (pred_json, model_version, xray_id)).rowcount
+    if updated:
+        save_detections(conn, xray_id, pred_json, model_version)
+    return updated
+
+
+def find_patients(conn, cls, min_conf=0.0, user_id=None):
+    """
+    Patients with a finding of class cls at conf >= min_conf (optionally only
+    those of user_id), as (id, name, dob, email).
+    """
+    where, params = FINDING_FILTER_SQL, [cls, min_conf]
+    if user_id is not None:
+        where += " AND p.user_id = ?"
+        params.append(user_id)
+    return conn.execute(f"""
+      SELECT p.id, p.name, p.dob, p.email FROM patients p
+      WHERE {where}
+      ORDER BY p.name, p.id
+    """, params).fetchall()
+
+
+def xray_findings(conn, xray_id, min_conf=0.0):
+    """{class id: number of detections} for one X-ray."""
+    return dict(conn.execute(
+        "SELECT class, COUNT(*) FROM detections WHERE xray_id=? AND conf>=? GROUP BY class",
+        (xray_id, min_conf)
+    ).fetchall())
@@ -0,0 +1,165 @@
+import json
+import os
+import threading
+
+from .backends import get_backend
+from .cache import file_sha256, prediction_cache
+from .config import MODEL_PATH, CONF_THRESHOLD, BATCH_SIZE, BACKEND, TILED, TILE_OVERLAP, TILE_SIZE
+from .tracing import record_speed, span
+
+
+class ModelManager:
+    """
+    Owns the YOLO model and loads it lazily.
+
+    Importing ultralytics/torch and reading the weights takes several seconds,
+    so the load is either started in the background with start() once the UI
+    is up, or done on demand by the first get() call. get() only blocks while
+    the model is actually still loading. The backend (see backends.py) decides
+    which export of the weights is loaded; tiled switches predict() to sliced
+    inference (see tiling.py).
+    """
+
+    NOT_LOADED = "not loaded"
+    LOADING = "loading"
+    READY = "ready"
+    FAILED = "failed"
+
+    def __init__(self, model_path=MODEL_PATH, backend=BACKEND, tiled=TILED):
+        self.model_path = model_path
+        self.backend = backend
+        self.tiled = tiled
+        self.state = self.NOT_LOADED
+        self.error = None
+        self._model = None
+        self._hash = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    def start(self):
+        """Begin loading the weights on a daemon thread (no-op if already started)."""
+        with self._lock:
+            if self.state != self.NOT_LOADED:
+                return
+            self.state = self.LOADING
+        threading.Thread(target=self._load, name="model-loader", daemon=True).start()
+
+    def _load(self):
+        try:
+            with span("model.load", backend=self.backend):
+                self._model = get_backend(self.backend).load(self.model_path)
+            self.state = self.READY
+        except Exception as e:
+            self.error = e
+            self.state = self.FAILED
+        finally:
+            self._done.set()
+
+    def model_hash(self):
+        """
+        SHA-256 of the weights file (re-hashed when the file changes), None if
+        missing. Non-torch backends and tiled mode are appended, as their boxes differ.
+        """
+        try:
+            st = os.stat(self.model_path)
+        except OSError:
+            return None
+        stamp = (st.st_mtime_ns, st.st_size)
+        if self._hash is None or self._hash[0] != stamp:
+            self._hash = (stamp, file_sha256(self.model_path))
+        version = self._hash[1]
+        if self.backend != "torch":
+            version += f"+{self.backend}"
+        if self.tiled:
+            version += f"+tiled{TILE_SIZE}x{TILE_OVERLAP:g}"
+        return version
+
+    def is_ready(self):
+        return self.state == self.READY
+
+    def get(self, timeout=None):
+        """Return the loaded model, loading it now or waiting for the loader thread."""
+        with self._lock:
+            load_here = self.state == self.NOT_LOADED
+            if load_here:
+                self.state = self.LOADING
+        if load_here:
+            self._load()
+        elif not self._done.wait(timeout):
+            raise TimeoutError("model is still loading")
+        if self.state == self.FAILED:
+            raise RuntimeError(f"could not load model {self.model_path}: {self.error}")
+        return self._model
+
+
+model_manager = ModelManager()
+
+
+def _boxes_json(result):
+    return _rows_json(result.boxes.data.tolist())
+
+
+def _rows_json(rows):
+    boxes = []
+    for *box, conf, cls in rows:
+        x1,y1,x2,y2 = box
+        boxes.append({
+            "class": int(cls),
+            "conf": float(conf),
+            "x1": x1, "y1": y1, "x2": x2, "y2": y2
+        })
+    return json.dumps(boxes)
+
+
+def predict(image_path):
+    """
+    Run YOLO inference on image_path at conf threshold 0.4.
+    Returns a JSON string of results (class, x1,y1,x2,y2,conf).
+    Cached results for the same image bytes and weights are returned
+    without running the model.
+    """
+    return predict_batch([image_path])[0]
+
+
+def predict_batch(image_paths, batch_size=BATCH_SIZE):
+    """
+    Like predict(), but sends the images to YOLO batch_size at a time
+    (tiles rather than images in tiled mode). Returns one JSON string per
+    image, in the same order.
+    """
+    with span("predict.cache_lookup", images=len(image_paths)):
+        model_hash = model_manager.model_hash()
+        keys = [file_sha256(p) for p in image_paths] if model_hash else [None] * len(image_paths)
+        preds = [prediction_cache.get(k, model_hash, CONF_THRESHOLD) if k else None for k in keys]
+    todo = [i for i, pred in enumerate(preds) if pred is None]
+    if not todo:
+        return preds
+    with span("predict.wait_model"):
+        yolo = model_manager.get()
+    for i, pred in zip(todo, _run_model(yolo, [image_paths[i] for i in todo], batch_size)):
+        preds[i] = pred
+        if keys[i]:
+            with span("predict.cache_store"):
+                prediction_cache.put(keys[i], model_hash, CONF_THRESHOLD, preds[i])
+    return preds
+
+
+def _run_model(yolo, image_paths, batch_size):
+    """Yield the prediction JSON of each image, in order."""
+    if model_manager.tiled:
+        from .tiling import predict_tiled  # numpy/cv2, only needed here
+        with span("predict.tiled", images=len(image_paths)):
+            tiled = predict_tiled(yolo, image_paths, CONF_THRESHOLD, batch_size)
+        for rows in tiled:
+            yield _rows_json(rows)
+        return
+    for n in range(0, len(image_paths), batch_size):
+        chunk = image_paths[n:n + batch_size]
+        with span("predict.model", images=len(chunk)):
+            if len(chunk) == 1:
+                results = yolo(chunk[0], conf=CONF_THRESHOLD, verbose=False)
+            else:
+                results = yolo(chunk, conf=CONF_THRESHOLD, batch=len(chunk), verbose=False)
+        record_speed(results)
+        for r in results:
+            yield _boxes_json(r)
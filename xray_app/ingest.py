@@ -0,0 +1,221 @@
+import os
+import sys
+import time
+from dataclasses import dataclass
+
+from .blobstore import put_file
+from .config import BATCH_SIZE
+from .detections import insert_xray, update_prediction
+from .inference import model_manager, predict, predict_batch
+from .previews import generate_previews
+from .refresh import mark_failed, stale_xrays
+from .tracing import span
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+# rows written per transaction when predictions come from the process pool
+WRITE_BATCH = 64
+
+
+@dataclass
+class IngestReport:
+    count: int
+    seconds: float
+    action: str = "imported"
+    skipped: int = 0
+
+    @property
+    def images_per_sec(self):
+        return self.count / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        skipped = f", {self.skipped} unreadable skipped" if self.skipped else ""
+        return (f"{self.count} X-rays {self.action} in {self.seconds:.1f}s "
+                f"({self.images_per_sec:.2f} images/sec){skipped}")
+
+
+def collect_images(paths):
+    """Expand folders (recursively) and keep only supported image files, sorted."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, n) for n in names)
+        else:
+            files.append(path)
+    return sorted(f for f in files if f.lower().endswith(IMAGE_EXTENSIONS))
+
+
+def store_xray_file(conn, src):
+    """Bring src into the image store (see blobstore.py) and return its stored path."""
+    with span("xray.copy"):
+        return put_file(conn, src)
+
+
+def analyse_xray(path):
+    """Previews and prediction for one stored X-ray; returns the prediction JSON."""
+    generate_previews(path)
+    return predict(path)
+
+
+def ingest(conn, pid, files, batch_size=BATCH_SIZE, workers=1, cancelled=None):
+    """
+    Bulk import: copy files for patient pid, predict them in batches and
+    write every xrays row (and its detections), committing after every
+    batch. Files already imported for pid are skipped, so an interrupted
+    import can simply be run again. Files that cannot be read are skipped
+    (printed and counted in the report). cancelled(), if given, is checked
+    between files and batches and stops the import once it returns True.
+    With workers > 1 prediction runs on a process pool (see pool.py) and
+    rows are committed as results arrive.
+    """
+    start = time.perf_counter()
+    cancelled = cancelled or (lambda: False)
+    dests = []
+    for f in files:
+        if cancelled():
+            return IngestReport(0, time.perf_counter() - start)
+        dests.append(store_xray_file(conn, f))
+    done = {path for (path,) in conn.execute("SELECT filepath FROM xrays WHERE patient_id=?", (pid,))}
+    # also drops duplicates within files: the store names files by content
+    dests = [d for d in dict.fromkeys(dests) if d not in done]
+    if workers > 1:
+        def write(i, pred, version):
+            insert_xray(conn, pid, dests[i], pred, version)
+            return 1
+
+        rows = _predict_pooled(list(enumerate(dests)), batch_size, workers, previews=True, cancelled=cancelled)
+        written = _write_batches(conn, rows, write)
+        return IngestReport(written, time.perf_counter() - start)
+    version = model_manager.model_hash()
+    written = skipped = 0
+    for i in range(0, len(dests), batch_size):
+        if cancelled():
+            break
+        batch = dests[i:i + batch_size]
+        chunk = [dest for dest in batch if _previews_or_skip(dest)]
+        preds = _predict_each(chunk, batch_size)
+        with conn:
+            for dest, pred in zip(chunk, preds):
+                if pred is not None:
+                    insert_xray(conn, pid, dest, pred, version)
+                    written += 1
+        skipped = i + len(batch) - written
+    return IngestReport(written, time.perf_counter() - start, skipped=skipped)
+
+
+def reindex(conn, patient_id=None, batch_size=BATCH_SIZE, workers=1, force=False, limit=None):
+    """
+    Re-run prediction for existing xrays rows (all, or one patient's),
+    committing after every batch. Rows already predicted by the current
+    weights are skipped unless force is set, so an interrupted run resumes
+    where it stopped; stale rows go most recently viewed patients first, at
+    most limit of them. Rows whose file is missing or cannot be predicted are
+    skipped and marked failed (see refresh.mark_failed).
+    With workers > 1 prediction runs on a process pool (see pool.py).
+    """
+    start = time.perf_counter()
+    version = model_manager.model_hash()
+    if force:
+        sql = "SELECT id, filepath FROM xrays"
+        params = ()
+        if patient_id is not None:
+            sql += " WHERE patient_id=?"
+            params = (patient_id,)
+        rows = conn.execute(sql + " ORDER BY id LIMIT ?", params + (-1 if limit is None else limit,)).fetchall()
+    else:
+        rows = stale_xrays(conn, version, patient_id, limit)
+    missing = {xid for xid, path in rows if not os.path.exists(path)}
+    with conn:
+        for xid, path in rows:
+            if xid in missing:
+                print(f"skipped: {path}: file missing", file=sys.stderr)
+                mark_failed(conn, xid, version)
+    rows = [(xid, path) for xid, path in rows if xid not in missing]
+    if workers > 1:
+        preds = _predict_pooled(rows, batch_size, workers)
+        written = _write_batches(conn, preds, lambda xid, pred, version: update_prediction(conn, xid, pred, version))
+        return IngestReport(written, time.perf_counter() - start, "re-analysed", len(missing) + len(rows) - written)
+    skipped = len(missing)
+    written = 0
+    for i in range(0, len(rows), batch_size):
+        chunk = rows[i:i + batch_size]
+        preds = _predict_each([path for _, path in chunk], batch_size)
+        with conn:
+            for (xid, _), pred in zip(chunk, preds):
+                if pred is None:
+                    mark_failed(conn, xid, version)
+                    skipped += 1
+                else:
+                    written += update_prediction(conn, xid, pred, version)
+    return IngestReport(written, time.perf_counter() - start, "re-analysed", skipped)
+
+
+def _previews_or_skip(path):
+    """generate_previews(path); False (printed) if the file cannot be read."""
+    try:
+        generate_previews(path)
+        return True
+    except Exception as e:
+        print(f"skipped: {path}: {e}", file=sys.stderr)
+        return False
+
+
+def _predict_each(paths, batch_size):
+    """predict_batch(paths), with None for each file that cannot be predicted."""
+    if not paths:
+        return []
+    try:
+        return predict_batch(paths, batch_size)
+    except Exception:
+        # one unreadable file fails the whole batch; the others come from the cache
+        return [_predict_or_none(path) for path in paths]
+
+
+def _predict_or_none(path):
+    """predict(path), or None (printed) if the file cannot be predicted."""
+    try:
+        return predict(path)
+    except Exception as e:
+        print(f"skipped: {path}: {e}", file=sys.stderr)
+        return None
+
+
+def _predict_pooled(items, batch_size, workers, previews=False, cancelled=None):
+    """
+    Yield (key, prediction) for (key, path) items from a process pool;
+    failures are printed and skipped. Stops the pool once cancelled() is True.
+    """
+    from .pool import InferencePool
+
+    if not items:
+        return
+    with InferencePool(min(workers, len(items)), batch_size) as pool:
+        for key, pred, error in pool.map(items, previews):
+            if cancelled is not None and cancelled():
+                pool.close(terminate=True)
+                return
+            if error is None:
+                yield key, pred
+            else:
+                print(f"skipped: {error}", file=sys.stderr)
+
+
+def _write_batches(conn, results, write):
+    """
+    Single writer: write(key, prediction, version) each result, WRITE_BATCH
+    rows per transaction. write returns the number of rows it changed; the
+    total is returned.
+    """
+    version = model_manager.model_hash()
+    batch = []
+    written = 0
+    for result in results:
+        batch.append(result)
+        if len(batch) == WRITE_BATCH:
+            with conn:
+                written += sum(write(key, pred, version) for key, pred in batch)
+            batch = []
+    with conn:
+        written += sum(write(key, pred, version) for key, pred in batch)
+    return written
@@ -0,0 +1,169 @@
+"""
+Process pool for bulk inference (reindex / ingest across all cores).
+
+Each worker process loads its own model and gets an equal share of the CPU
+threads, so workers do not fight over cores. Work goes through a bounded
+queue: the producer blocks while the workers are behind (backpressure), and
+inside every worker a thread decodes the next images while the model runs on
+the current batch. Predictions come back to the calling process, which is the
+only one that writes to SQLite. The prediction cache is not consulted; bulk
+jobs are for images the current weights have not seen.
+"""
+import multiprocessing as mp
+import os
+import queue
+import threading
+
+from .config import BATCH_SIZE, CONF_THRESHOLD, POOL_WORKERS
+
+
+def _decode(path, tiled, previews):
+    if previews:
+        from .previews import generate_previews
+        generate_previews(path)
+    if tiled:
+        from .tiling import load_tiles
+        return load_tiles(path)
+    import cv2
+    image = cv2.imread(path, cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError(f"cannot read image {path}")
+    return image
+
+
+def _decode_loop(tasks, decoded, tiled):
+    while True:
+        task = tasks.get()
+        if task is None:
+            decoded.put(None)
+            return
+        key, path, previews = task
+        try:
+            decoded.put((key, _decode(path, tiled, previews), None))
+        except Exception as e:
+            decoded.put((key, None, f"{path}: {e}"))
+
+
+def _predict(yolo, batch, tiled, batch_size, results):
+    from .inference import _boxes_json, _rows_json
+    from .tiling import predict_tiles
+
+    try:
+        if tiled:
+            preds = [_rows_json(predict_tiles(yolo, tiles, CONF_THRESHOLD, batch_size)) for _, tiles in batch]
+        else:
+            out = yolo([image for _, image in batch], conf=CONF_THRESHOLD, batch=len(batch), verbose=False)
+            preds = [_boxes_json(r) for r in out]
+    except Exception as e:
+        for key, _ in batch:
+            results.put((key, None, str(e)))
+        return
+    for (key, _), pred in zip(batch, preds):
+        results.put((key, pred, None))
+
+
+def _worker(tasks, results, model_path, backend, tiled, batch_size, threads):
+    try:
+        import torch
+        torch.set_num_threads(threads)
+        from .backends import get_backend
+        yolo = get_backend(backend).load(model_path)
+    except Exception as e:
+        results.put((None, None, f"could not load model {model_path}: {e}"))
+        return
+    # decode at most one batch ahead of the model
+    decoded = queue.Queue(maxsize=batch_size)
+    threading.Thread(target=_decode_loop, args=(tasks, decoded, tiled), daemon=True).start()
+    while True:
+        item = decoded.get()
+        batch = []
+        while item is not None:
+            key, data, error = item
+            if error is None:
+                batch.append((key, data))
+            else:
+                results.put((key, None, error))
+            if len(batch) == batch_size:
+                break
+            try:
+                item = decoded.get_nowait()
+            except queue.Empty:
+                break
+        if batch:
+            _predict(yolo, batch, tiled, batch_size, results)
+        if item is None:
+            return
+
+
+class InferencePool:
+    """
+    Worker processes running the model of model_manager (same weights,
+    backend and tiled mode). Use as a context manager around map().
+    """
+
+    def __init__(self, workers=POOL_WORKERS, batch_size=BATCH_SIZE, queue_size=None, threads=None):
+        from .inference import model_manager
+
+        self.workers = max(1, workers)
+        self.batch_size = batch_size
+        self.queue_size = queue_size or 2 * self.workers * batch_size
+        self.threads = threads or max(1, (os.cpu_count() or 1) // self.workers)
+        self.model_path = model_manager.model_path
+        self.backend = model_manager.backend
+        self.tiled = model_manager.tiled
+        self.processes = []
+
+    def start(self):
+        # spawn: forking a process that already imported torch is not safe
+        ctx = mp.get_context("spawn")
+        self.tasks = ctx.Queue(self.queue_size)
+        self.results = ctx.Queue()
+        args = (self.tasks, self.results, self.model_path, self.backend, self.tiled, self.batch_size, self.threads)
+        self.processes = [ctx.Process(target=_worker, args=args, name=f"inference-{i}", daemon=True)
+                          for i in range(self.workers)]
+        for p in self.processes:
+            p.start()
+        return self
+
+    def _feed(self, items, previews):
+        for key, path in items:
+            self.tasks.put((key, path, previews))
+
+    def _next_result(self):
+        while True:
+            try:
+                key, pred, error = self.results.get(timeout=1.0)
+            except queue.Empty:
+                if not any(p.is_alive() for p in self.processes):
+                    raise RuntimeError("all inference workers exited")
+                continue
+            if key is None:
+                raise RuntimeError(error)
+            return key, pred, error
+
+    def map(self, items, previews=False):
+        """
+        Predict (key, image_path) items; yields (key, prediction JSON, error)
+        in completion order, error being None on success. With previews the
+        workers also create the image's previews.
+        """
+        items = list(items)
+        threading.Thread(target=self._feed, args=(items, previews), name="inference-feed", daemon=True).start()
+        for _ in items:
+            yield self._next_result()
+
+    def close(self, terminate=False):
+        for p in self.processes:
+            if terminate:
+                p.terminate()
+            else:
+                self.tasks.put(None)
+        for p in self.processes:
+            p.join()
+        self.processes = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(terminate=exc_type is not None)
@@ -0,0 +1,122 @@
+import json
+import os
+import shutil
+
+from .config import PREVIEW_SIZE, THUMBNAIL_SIZE, VIEW_TILE_SIZE
+from .tracing import span
+
+# downscaled copies kept next to every stored X-ray, largest first:
+# "preview" is roughly screen sized, "thumb" is for the history grid
+LEVELS = (("preview", PREVIEW_SIZE), ("thumb", THUMBNAIL_SIZE))
+PREVIEW_DIR = ".previews"
+# written last into a finished tile pyramid
+TILE_MANIFEST = "tiles.json"
+
+
+def preview_path(image_path, level):
+    folder, name = os.path.split(image_path)
+    return os.path.join(folder, PREVIEW_DIR, f"{name}.{level}.jpg")
+
+
+def has_previews(image_path):
+    return all(os.path.exists(preview_path(image_path, level)) for level, _ in LEVELS)
+
+
+def remove_previews(image_path):
+    for level, _ in LEVELS:
+        path = preview_path(image_path, level)
+        if os.path.exists(path):
+            os.remove(path)
+    shutil.rmtree(tile_dir(image_path), ignore_errors=True)
+
+
+def _to_8bit(img):
+    if img.mode.startswith("I"):
+        # 16-bit greyscale: keep the top 8 bits
+        img = img.convert("I").point(lambda v: v / 256)
+    return img.convert("L" if img.mode in ("L", "I") else "RGB")
+
+
+def generate_previews(image_path, force=False):
+    """
+    Write the preview pyramid for image_path (skipped when it is up to date).
+    Each level is downscaled from the previous one, so the full image is
+    decoded only once.
+    """
+    if not force and has_previews(image_path):
+        src_mtime = os.path.getmtime(image_path)
+        if all(os.path.getmtime(preview_path(image_path, level)) >= src_mtime for level, _ in LEVELS):
+            return
+    from PIL import Image
+
+    os.makedirs(os.path.join(os.path.dirname(image_path), PREVIEW_DIR), exist_ok=True)
+    with span("previews.generate"), Image.open(image_path) as img:
+        # lets the JPEG decoder scale down while decoding
+        img.draft("RGB", (PREVIEW_SIZE, PREVIEW_SIZE))
+        img = _to_8bit(img)
+        for level, size in LEVELS:
+            img.thumbnail((size, size))
+            img.save(preview_path(image_path, level), "JPEG", quality=85)
+
+
+def tile_dir(image_path):
+    folder, name = os.path.split(image_path)
+    return os.path.join(folder, PREVIEW_DIR, f"{name}.tiles")
+
+
+def tile_path(image_path, level, col, row):
+    return os.path.join(tile_dir(image_path), str(level), f"{col}_{row}.png")
+
+
+def tile_levels(width, height):
+    """Pyramid levels (level k is downscaled 2**k) still sharper than the preview."""
+    levels = 1
+    while max(width, height) >> levels > PREVIEW_SIZE:
+        levels += 1
+    return levels
+
+
+def read_tile_manifest(image_path):
+    """{"size": [w, h], "tile": px, "levels": n} of a finished tile pyramid, or None."""
+    try:
+        with open(os.path.join(tile_dir(image_path), TILE_MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def generate_tiles(image_path, tile=VIEW_TILE_SIZE):
+    """
+    Cut image_path into tile x tile PNGs at full resolution and at each
+    halving down to preview size, so the viewer can decode only what is on
+    screen. Built in a temporary folder and renamed into place, so a
+    pyramid with a manifest is always complete. Returns the manifest.
+    """
+    manifest = read_tile_manifest(image_path)
+    if manifest is not None:
+        return manifest
+    from PIL import Image
+
+    final = tile_dir(image_path)
+    tmp = f"{final}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    with span("previews.tiles"), Image.open(image_path) as img:
+        img = _to_8bit(img)
+        manifest = {"size": list(img.size), "tile": tile, "levels": tile_levels(*img.size)}
+        for level in range(manifest["levels"]):
+            if level:
+                img = img.reduce(2)
+            os.makedirs(os.path.join(tmp, str(level)))
+            for row in range(0, img.height, tile):
+                for col in range(0, img.width, tile):
+                    # PNG: full-resolution tiles are looked at for diagnosis, so no lossy compression
+                    img.crop((col, row, min(col + tile, img.width), min(row + tile, img.height))).save(
+                        os.path.join(tmp, str(level), f"{col // tile}_{row // tile}.png"), compress_level=1)
+        with open(os.path.join(tmp, TILE_MANIFEST), "w") as f:
+            json.dump(manifest, f)
+    try:
+        os.replace(tmp, final)
+    except OSError:
+        # another process finished the same pyramid first
+        shutil.rmtree(tmp, ignore_errors=True)
+    return manifest
@@ -0,0 +1,81 @@
+"""
+Finding X-rays whose prediction came from other weights than the active model.
+
+xrays.model_version holds the model_hash() that produced each prediction.
+Stale rows are re-predicted lazily: a patient's rows when their history is
+opened, everything else a few rows at a time in the background, patients
+viewed most recently first (see reindex(limit=...) in ingest.py). Rows
+whose file is missing or cannot be predicted are marked
+failed_version(version) so they stop coming back until the weights change.
+"""
+import time
+
+
+def mark_viewed(conn, pid):
+    """Record that patient pid's X-rays were just opened (commits)."""
+    with conn:
+        conn.execute("UPDATE patients SET last_viewed=? WHERE id=?", (time.time(), pid))
+
+
+def failed_version(version):
+    """The model_version of X-rays version could not predict."""
+    return f"failed:{version}"
+
+
+def mark_failed(conn, xray_id, version):
+    """Keep X-ray xray_id out of stale_xrays(conn, version) (no commit)."""
+    conn.execute("UPDATE xrays SET model_version=? WHERE id=?", (failed_version(version), xray_id))
+
+
+# above this many stale rows, walking patients in viewing order reaches the
+# first ones soonest; below it they are looked up by model_version and sorted
+SORT_LIMIT = 10000
+
+# the model_version values other than the two a version leaves behind (see
+# stale_xrays), one arm per range so that each is a search of
+# idx_xrays_model_version rather than a scan
+_OTHER_VERSIONS = " UNION ALL ".join(f"SELECT id FROM xrays WHERE {arm}" for arm in (
+    "model_version IS NULL",
+    "model_version < ?",
+    "model_version > ? AND model_version < ?",
+    "model_version > ?",
+))
+
+_ORDER = " ORDER BY p.last_viewed DESC, p.id DESC, x.id DESC LIMIT ?"
+
+
+def stale_xrays(conn, version, patient_id=None, limit=None):
+    """
+    (id, filepath) of at most limit X-rays not predicted by version (and that
+    version has not failed on), most recently viewed patients first, newest
+    X-rays first within a patient. Empty without a version.
+    """
+    if version is None:
+        return []
+    limit = -1 if limit is None else limit
+    if patient_id is not None:
+        return conn.execute("""
+          SELECT x.id, x.filepath FROM patients p JOIN xrays x ON x.patient_id = p.id
+          WHERE p.id = ? AND x.model_version IS NOT ? AND x.model_version IS NOT ?""" + _ORDER,
+            (patient_id, version, failed_version(version), limit)).fetchall()
+    lo, hi = sorted((version, failed_version(version)))
+    ranges = (lo, lo, hi, hi)
+    (found,) = conn.execute(f"SELECT COUNT(*) FROM ({_OTHER_VERSIONS} LIMIT ?)", ranges + (SORT_LIMIT,)).fetchone()
+    if not found:
+        return []
+    if found < SORT_LIMIT:
+        return conn.execute(f"""
+          SELECT x.id, x.filepath FROM ({_OTHER_VERSIONS}) s
+          CROSS JOIN xrays x ON x.id = s.id CROSS JOIN patients p ON p.id = x.patient_id""" + _ORDER,
+            ranges + (limit,)).fetchall()
+    return conn.execute("""
+      SELECT x.id, x.filepath FROM patients p CROSS JOIN xrays x ON x.patient_id = p.id
+      WHERE x.model_version IS NOT ? AND x.model_version IS NOT ?""" + _ORDER,
+        (version, failed_version(version), limit)).fetchall()
+
+
+def version_counts(conn):
+    """[(model_version, number of X-rays)], most used first."""
+    return conn.execute("""
+      SELECT model_version, COUNT(*) FROM xrays GROUP BY model_version ORDER BY COUNT(*) DESC
+    """).fetchall()
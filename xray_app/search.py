@@ -0,0 +1,44 @@
+import re
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+# bm25 ranking has to score every match, which is too slow for one to three
+# letter prefixes that match most of the table (and says little about them);
+# those are listed newest first instead, which FTS5 can stop early on.
+RANK_MIN_TOKEN = 4
+
+
+def fts_query(text):
+    """
+    Turn what the user typed into an FTS5 query: every word must match as a
+    prefix of some token in name, email or dob, e.g. "mar sil" -> "mar"* "sil"*.
+    Returns None when there is nothing to search for.
+    """
+    tokens = _TOKEN.findall(text or "")
+    if not tokens:
+        return None
+    return " ".join(f'"{t}"*' for t in tokens)
+
+
+def search_patients(conn, user_id, text, limit=200, offset=0, order_by=None, where=None, params=()):
+    """
+    Patients of user_id matching text, best match first (bm25 rank) unless
+    order_by gives an ORDER BY expression over p.*. where/params add an extra
+    condition on p. Rows are (id, name, dob, email).
+    """
+    query = fts_query(text)
+    if query is None:
+        return []
+    order = order_by
+    if order is None:
+        selective = max(len(t) for t in _TOKEN.findall(text)) >= RANK_MIN_TOKEN
+        order = "f.rank, p.id" if selective else "f.rowid DESC"
+    else:
+        order += ", p.id"
+    return conn.execute(f"""
+      SELECT p.id, p.name, p.dob, p.email
+      FROM patients_fts f JOIN patients p ON p.id = f.rowid
+      WHERE patients_fts MATCH ? AND p.user_id = ? {f"AND {where}" if where else ""}
+      ORDER BY {order}
+      LIMIT ? OFFSET ?
+    """, (query, user_id, *params, limit, offset)).fetchall()
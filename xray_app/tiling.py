@@ -0,0 +1,118 @@
+"""
+Sliced inference for large panoramic X-rays.
+
+YOLO resizes whatever it is given to its input size, which shrinks a 3000 px
+panoramic about five times and loses small caries. Here the image is cut into
+overlapping TILE_SIZE tiles at native resolution; the tiles, plus the whole
+image for findings larger than a tile, go through the model in batches and
+their boxes are shifted back to image coordinates and merged across tiles.
+"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .config import BATCH_SIZE, TILE_OVERLAP, TILE_SIZE, TILE_WORKERS
+from .tracing import record_speed, span
+
+# a box is dropped when this much of it lies inside a better box of its class;
+# measured on the smaller box, so a box cut off at a tile edge goes as well
+MERGE_THRESHOLD = 0.6
+
+
+def tile_starts(length, tile_size, stride):
+    if length <= tile_size:
+        return [0]
+    starts = list(range(0, length - tile_size, stride))
+    starts.append(length - tile_size)
+    return starts
+
+
+def tile_grid(width, height, tile_size=TILE_SIZE, overlap=TILE_OVERLAP):
+    """Top-left corners of the tiles covering a width x height image."""
+    stride = max(1, int(tile_size * (1 - overlap)))
+    return [(x, y) for y in tile_starts(height, tile_size, stride)
+            for x in tile_starts(width, tile_size, stride)]
+
+
+def load_tiles(image_path, tile_size=TILE_SIZE, overlap=TILE_OVERLAP):
+    """[(x, y, BGR array)] for every tile of the image, the whole image last."""
+    import cv2
+
+    with span("tiling.decode"):
+        image = cv2.imread(image_path, cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError(f"cannot read image {image_path}")
+    h, w = image.shape[:2]
+    tiles = [(x, y, np.ascontiguousarray(image[y:y + tile_size, x:x + tile_size]))
+             for x, y in tile_grid(w, h, tile_size, overlap)]
+    if len(tiles) > 1:
+        tiles.append((0, 0, image))
+    return tiles
+
+
+def merge_boxes(rows, threshold=MERGE_THRESHOLD):
+    """
+    Greedy per-class NMS over [x1, y1, x2, y2, conf, class] rows coming from
+    different tiles, using intersection over the smaller box. Returns the
+    kept rows, best first.
+    """
+    if not rows:
+        return []
+    boxes = np.asarray(rows, dtype=np.float64)
+    boxes = boxes[np.argsort(-boxes[:, 4], kind="stable")]
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    keep = []
+    suppressed = np.zeros(len(boxes), dtype=bool)
+    for i in range(len(boxes)):
+        if suppressed[i]:
+            continue
+        keep.append(i)
+        rest = ~suppressed & (boxes[:, 5] == boxes[i, 5])
+        rest[:i + 1] = False
+        if not rest.any():
+            continue
+        w = np.minimum(boxes[rest, 2], boxes[i, 2]) - np.maximum(boxes[rest, 0], boxes[i, 0])
+        h = np.minimum(boxes[rest, 3], boxes[i, 3]) - np.maximum(boxes[rest, 1], boxes[i, 1])
+        inter = np.clip(w, 0, None) * np.clip(h, 0, None)
+        smaller = np.maximum(np.minimum(areas[rest], areas[i]), 1e-9)
+        suppressed[np.flatnonzero(rest)[inter / smaller >= threshold]] = True
+    return boxes[keep].tolist()
+
+
+def prefetch(fn, items, workers=TILE_WORKERS):
+    """Yield fn(item) in order, computing up to `workers` items ahead on threads."""
+    workers = max(1, workers)
+    with ThreadPoolExecutor(workers) as pool:
+        pending = deque(pool.submit(fn, item) for item in items[:workers])
+        for item in items[workers:]:
+            yield pending.popleft().result()
+            pending.append(pool.submit(fn, item))
+        while pending:
+            yield pending.popleft().result()
+
+
+def predict_tiles(yolo, tiles, conf, batch_size=BATCH_SIZE):
+    """Run the tiles of one image from load_tiles() and merge their boxes."""
+    rows = []
+    for n in range(0, len(tiles), batch_size):
+        chunk = tiles[n:n + batch_size]
+        with span("predict.model", tiles=len(chunk)):
+            results = yolo([t for _, _, t in chunk], conf=conf, batch=len(chunk), verbose=False)
+        record_speed(results)
+        for (x, y, _), r in zip(chunk, results):
+            for x1, y1, x2, y2, c, cls in r.boxes.data.tolist():
+                rows.append([x1 + x, y1 + y, x2 + x, y2 + y, c, cls])
+    with span("tiling.merge", boxes=len(rows)):
+        return merge_boxes(rows)
+
+
+def predict_tiled(yolo, image_paths, conf, batch_size=BATCH_SIZE,
+                  tile_size=TILE_SIZE, overlap=TILE_OVERLAP, workers=TILE_WORKERS):
+    """
+    Sliced prediction for each image; returns one list of
+    [x1, y1, x2, y2, conf, class] rows per image, in image coordinates.
+    Decoding and slicing of the next images overlaps with inference.
+    """
+    loaded = prefetch(lambda p: load_tiles(p, tile_size, overlap), image_paths, workers)
+    return [predict_tiles(yolo, tiles, conf, batch_size) for tiles in loaded]
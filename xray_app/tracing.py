@@ -0,0 +1,131 @@
+"""
+Per-stage timing: named spans kept in memory, summarised as rolling p50/p95
+and exportable as JSON or as a Chrome trace (chrome://tracing, Perfetto).
+
+    with span("predict.model", images=8):
+        ...
+
+Tracing is off unless XRAY_TRACE=1 or tracer.enabled is set (the
+performance panel has a switch). While off, span() hands back one shared
+no-op context manager and record() returns at once, so instrumented code
+pays a single attribute check.
+"""
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+
+from .config import TRACE, TRACE_BUFFER
+
+# durations per stage kept for the rolling percentiles
+WINDOW = 200
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "args", "start")
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer._add(self.name, self.start, time.perf_counter_ns() - self.start, self.args)
+        return False
+
+
+def _percentile(values, q):
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class Tracer:
+    def __init__(self, enabled=TRACE, max_events=TRACE_BUFFER, window=WINDOW):
+        self.enabled = enabled
+        self.events = deque(maxlen=max_events)
+        self.window = window
+        self.durations = defaultdict(lambda: deque(maxlen=self.window))
+        self._origin = time.perf_counter_ns()
+        self._lock = threading.Lock()
+
+    def span(self, name, **args):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, args)
+
+    def record(self, name, ms, **args):
+        """Add a stage timed elsewhere (e.g. ultralytics' speed dict) that ended now."""
+        if not self.enabled:
+            return
+        duration = int(ms * 1e6)
+        self._add(name, time.perf_counter_ns() - duration, duration, args)
+
+    def record_speed(self, results):
+        """Add ultralytics' per-image preprocess/inference/postprocess times of a YOLO call."""
+        if not self.enabled:
+            return
+        for r in results:
+            for stage, ms in (getattr(r, "speed", None) or {}).items():
+                if ms is not None:
+                    self.record(f"yolo.{stage}", ms)
+
+    def _add(self, name, start, duration, args):
+        with self._lock:
+            self.events.append((name, start, duration, os.getpid(), threading.get_ident(), args))
+            self.durations[name].append(duration / 1e6)
+
+    def clear(self):
+        with self._lock:
+            self.events.clear()
+            self.durations.clear()
+
+    def stats(self):
+        """{stage: {count, p50, p95, max}} in ms over the last `window` spans of each stage."""
+        with self._lock:
+            snapshot = {name: sorted(d) for name, d in self.durations.items()}
+        return {name: {"count": len(d), "p50": _percentile(d, 0.5), "p95": _percentile(d, 0.95), "max": d[-1]}
+                for name, d in sorted(snapshot.items()) if d}
+
+    def chrome_trace(self):
+        """The recorded spans in Chrome's trace event format."""
+        with self._lock:
+            events = list(self.events)
+        return {"displayTimeUnit": "ms", "traceEvents": [
+            {"name": name, "cat": name.split(".")[0], "ph": "X", "pid": pid, "tid": tid,
+             "ts": (start - self._origin) / 1000, "dur": duration / 1000, "args": args}
+            for name, start, duration, pid, tid, args in events
+        ]}
+
+    def export(self, path, chrome=True):
+        """Write a Chrome trace (default) or the stats summary plus raw spans as JSON."""
+        data = self.chrome_trace()
+        if not chrome:
+            data = {"stats": self.stats(), "spans": [
+                {"name": e["name"], "start_ms": e["ts"] / 1000, "ms": e["dur"] / 1000, "args": e["args"]}
+                for e in data["traceEvents"]
+            ]}
+        with open(path, "w") as f:
+            json.dump(data, f, default=str)
+
+
+tracer = Tracer()
+span = tracer.span
+record = tracer.record
+record_speed = tracer.record_speed
@@ -0,0 +1 @@
+"""Reusable Qt components used by the desktop windows in app.py."""
@@ -0,0 +1,43 @@
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+from ..credentials import authenticate, create_user
+from ..db import get_connection
+
+
+class _AuthJob(QRunnable):
+    def __init__(self, worker, fn, args):
+        super().__init__()
+        self.worker = worker
+        self.fn = fn
+        self.args = args
+
+    def run(self):
+        try:
+            # the pool thread gets its own pooled connection
+            result = self.fn(get_connection(), *self.args)
+        except Exception as e:
+            self.worker.failed.emit(e)
+        else:
+            self.worker.finished.emit(result)
+
+
+class AuthWorker(QObject):
+    """
+    Runs the password KDF (credentials.authenticate / create_user) on a
+    private thread, so the login and register windows stay responsive while
+    it works. Results arrive on the GUI thread through the signals.
+    """
+
+    finished = Signal(object)   # authenticate: user id or None; create_user: the new id
+    failed = Signal(object)     # the exception raised
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+
+    def login(self, username, password):
+        self.pool.start(_AuthJob(self, authenticate, (username, password)))
+
+    def register(self, username, password):
+        self.pool.start(_AuthJob(self, create_user, (username, password)))
@@ -0,0 +1,103 @@
+import itertools
+import threading
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+from ..inference import predict
+
+
+class _InferenceJob(QRunnable):
+    def __init__(self, queue, job_id, fn, args, cancellable=False):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.queue = queue
+        self.job_id = job_id
+        self.fn = fn
+        self.args = args
+        self.cancellable = cancellable
+        self.cancelled = threading.Event()
+
+    def run(self):
+        if self.cancelled.is_set():
+            return
+        kwargs = {"cancelled": self.cancelled.is_set} if self.cancellable else {}
+        try:
+            result = self.fn(*self.args, **kwargs)
+        except Exception as e:
+            self.queue._job_done(self, error=str(e))
+        else:
+            self.queue._job_done(self, result=result)
+
+
+class InferenceQueue(QObject):
+    """
+    Runs predict() off the GUI thread.
+
+    Jobs run one at a time on a private thread pool (the YOLO model is not
+    safe to call concurrently). submit() returns a job id immediately and the
+    result arrives through the finished/failed signals, which are delivered on
+    the GUI thread. A queued job can be cancelled before it starts; cancelling
+    a running job drops its result, and stops it too if it was submitted as
+    cancellable.
+    """
+
+    finished = Signal(int, object)    # job id, prediction JSON (or task result)
+    failed = Signal(int, str)         # job id, error message
+    pending_changed = Signal(int)     # number of jobs not yet finished
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self._ids = itertools.count(1)
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, image_path):
+        return self.submit_task(predict, image_path)
+
+    def submit_task(self, fn, *args, priority=0, cancellable=False):
+        """
+        Queue any model-bound call (e.g. a bulk import) behind the other jobs;
+        queued jobs with a higher priority run first. A cancellable fn gets a
+        cancelled keyword argument, a callable to poll while it runs.
+        """
+        job = _InferenceJob(self, next(self._ids), fn, args, cancellable)
+        with self._lock:
+            self._jobs[job.job_id] = job
+        self.pool.start(job, priority)
+        self.pending_changed.emit(self.pending())
+        return job.job_id
+
+    def pending(self):
+        with self._lock:
+            return len(self._jobs)
+
+    def cancel(self, job_id):
+        """Cancel a job; returns False if it already finished."""
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+        if job is None:
+            return False
+        job.cancelled.set()
+        self.pool.tryTake(job)
+        self.pending_changed.emit(self.pending())
+        return True
+
+    def cancel_all(self):
+        with self._lock:
+            job_ids = list(self._jobs)
+        for job_id in job_ids:
+            self.cancel(job_id)
+        return job_ids
+
+    def _job_done(self, job, result=None, error=None):
+        # called on the pool thread; signals are queued to the GUI thread
+        with self._lock:
+            if self._jobs.pop(job.job_id, None) is None:
+                return  # cancelled while running
+        if error is None:
+            self.finished.emit(job.job_id, result)
+        else:
+            self.failed.emit(job.job_id, error)
+        self.pending_changed.emit(self.pending())
@@ -0,0 +1,82 @@
+from PySide6.QtCore import QPointF, QRectF, Qt
+from PySide6.QtGui import QColor, QFont, QFontMetricsF, QPen
+from PySide6.QtWidgets import QGraphicsItem
+
+from ..config import CLASS_NAMES
+
+# one color per entry in CLASS_NAMES; unknown classes keep the old cyan
+CLASS_COLORS = {
+    0: QColor(255, 196, 0),     # Impacted
+    1: QColor(0, 255, 255),     # Caries
+    2: QColor(255, 64, 255),    # Peri Lesion
+    3: QColor(255, 64, 64),     # Deep Caries
+}
+DEFAULT_COLOR = QColor(0, 255, 255)
+LABEL_BACKGROUND = QColor(0, 0, 0, 160)
+
+
+class DetectionOverlayItem(QGraphicsItem):
+    """
+    Draws every detection box and its "<class> <conf>" label in one item.
+
+    Label sizes are measured once when the boxes are set, so painting is just
+    rectangles and text. Views whose show_overlays attribute is False skip
+    it, which lets the original and the prediction view share one scene and
+    one decoded image.
+    """
+
+    def __init__(self, boxes, parent=None):
+        super().__init__(parent)
+        self.font = QFont()
+        self.font.setPointSize(10)
+        self.font.setBold(True)
+        self.pens = {}
+        self.set_boxes(boxes)
+
+    def _pen(self, cls):
+        pen = self.pens.get(cls)
+        if pen is None:
+            pen = self.pens[cls] = QPen(CLASS_COLORS.get(cls, DEFAULT_COLOR), 2)
+        return pen
+
+    def set_boxes(self, boxes):
+        self.prepareGeometryChange()
+        metrics = QFontMetricsF(self.font)
+        th = metrics.height() + 2
+        ascent = metrics.ascent()
+        widths = {}
+        self.items = []
+        bounds = QRectF()
+        for b in boxes:
+            cls, conf = b["class"], b["conf"]
+            label = f"{CLASS_NAMES.get(cls, cls)} {conf:.2f}"
+            tw = widths.get(label)
+            if tw is None:
+                tw = widths[label] = metrics.horizontalAdvance(label) + 4
+            x1, y1 = b["x1"], b["y1"]
+            rect = QRectF(x1, y1, b["x2"] - x1, b["y2"] - y1)
+            label_rect = QRectF(x1, y1 - th, tw, th)
+            self.items.append((cls, rect, label_rect, QPointF(x1 + 2, y1 - th + 1 + ascent), label))
+            bounds = bounds.united(rect).united(label_rect)
+        # room for the pen width
+        self.bounds = bounds.adjusted(-2, -2, 2, 2) if self.items else bounds
+
+    def boundingRect(self):
+        return self.bounds
+
+    def paint(self, painter, option, widget=None):
+        view = widget.parent() if widget is not None else None
+        if view is not None and not getattr(view, "show_overlays", True):
+            return
+        painter.setFont(self.font)
+        painter.setBrush(Qt.NoBrush)
+        for cls, rect, _, _, _ in self.items:
+            painter.setPen(self._pen(cls))
+            painter.drawRect(rect)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(LABEL_BACKGROUND)
+        for _, _, label_rect, _, _ in self.items:
+            painter.drawRect(label_rect)
+        for cls, _, _, pos, label in self.items:
+            painter.setPen(CLASS_COLORS.get(cls, DEFAULT_COLOR))
+            painter.drawText(pos, label)
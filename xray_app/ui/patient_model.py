@@ -0,0 +1,162 @@
+import itertools
+
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+from ..detections import FINDING_PATIENTS_SQL
+from ..search import fts_query, search_patients
+
+
+class PatientTableModel(QAbstractTableModel):
+    """
+    Patients of one user, fetched from SQLite a page at a time.
+
+    Rows are loaded lazily through canFetchMore()/fetchMore() with keyset
+    pagination on (sort column, id), so only the pages the view has scrolled
+    to are held in memory. Sorting is done by the ORDER BY of the query and
+    every row keeps its patients.id.
+
+    With a search text set, rows come from the FTS5 index instead, best match
+    first until a column is sorted explicitly. A finding filter keeps only
+    patients with a detection of one class above a confidence; their ids are
+    collected into a TEMP table on every reload() rather than for every page.
+    """
+
+    COLUMNS = (("name", "Name"), ("dob", "Date of Birth"), ("email", "Email"))
+    _tables = itertools.count(1)
+
+    def __init__(self, conn, user_id, page_size=200, parent=None):
+        super().__init__(parent)
+        self.conn = conn
+        self.user_id = user_id
+        self.page_size = page_size
+        self.search = None
+        self.rank_order = False
+        self.finding = None
+        self.sort_column = 0
+        self.sort_order = Qt.AscendingOrder
+        self._rows = []
+        self._exhausted = False
+        # per model: windows of one thread share the connection and so its TEMP tables
+        self._finding_table = f"temp.finding_patients_{next(self._tables)}"
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {self._finding_table}(id INTEGER PRIMARY KEY)")
+        self.reload()
+
+    # --- queries ---
+
+    def _sort_expr(self, table=""):
+        name = self.COLUMNS[self.sort_column][0]
+        col = table + name
+        if name == "dob":
+            # stored as dd-MM-yyyy: compare as yyyyMMdd so the order is by date
+            col = f"substr({col},7,4)||substr({col},4,2)||substr({col},1,2)"
+        # name is NOT NULL; the others need a non-NULL key for the row-value compare
+        return col if name == "name" else f"COALESCE({col}, '')"
+
+    def _fetch_page(self):
+        expr = self._sort_expr()
+        desc = self.sort_order == Qt.DescendingOrder
+        where = f"p.id IN (SELECT id FROM {self._finding_table})" if self.finding else None
+        where_params = ()
+        if self.search:
+            order_by = None if self.rank_order else f"{self._sort_expr('p.')} {'DESC' if desc else 'ASC'}"
+            rows = search_patients(self.conn, self.user_id, self.search,
+                                   self.page_size, len(self._rows), order_by, where, where_params)
+            if len(rows) < self.page_size:
+                self._exhausted = True
+            return rows
+        sql = f"SELECT id, name, dob, email, {expr} FROM patients p WHERE user_id=?"
+        params = [self.user_id]
+        if where:
+            sql += f" AND {where}"
+            params += where_params
+        if self._rows:
+            last = self._rows[-1]
+            sql += f" AND ({expr}, id) {'<' if desc else '>'} (?, ?)"
+            params += [last[4], last[0]]
+        direction = "DESC" if desc else "ASC"
+        sql += f" ORDER BY {expr} {direction}, id {direction} LIMIT ?"
+        params.append(self.page_size)
+        rows = self.conn.execute(sql, params).fetchall()
+        if len(rows) < self.page_size:
+            self._exhausted = True
+        return rows
+
+    def _collect_finding(self):
+        with self.conn:
+            self.conn.execute(f"DELETE FROM {self._finding_table}")
+            if self.finding:
+                self.conn.execute(f"INSERT OR IGNORE INTO {self._finding_table} {FINDING_PATIENTS_SQL}", self.finding)
+
+    def reload(self):
+        """Re-read the patients (and the finding filter's matches) from the first page."""
+        self._collect_finding()
+        self._refetch()
+
+    def _refetch(self):
+        self.beginResetModel()
+        self._rows = []
+        self._exhausted = False
+        self._rows = self._fetch_page()
+        self.endResetModel()
+
+    def set_search(self, text):
+        """Search name/email/dob by word prefixes; empty text shows every patient."""
+        search = text if fts_query(text) else None
+        if search == self.search:
+            return
+        self.search = search
+        self.rank_order = search is not None
+        self._refetch()
+
+    def set_finding_filter(self, cls, min_conf=0.0):
+        """Only patients with a detection of class cls at conf >= min_conf; cls None clears it."""
+        finding = None if cls is None else (cls, min_conf)
+        if finding == self.finding:
+            return
+        self.finding = finding
+        self.reload()
+
+    def patient_id(self, row):
+        return self._rows[row][0]
+
+    def patient_name(self, row):
+        return self._rows[row][1]
+
+    # --- Qt model interface ---
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        value = self._rows[index.row()][index.column() + 1]
+        return value if value else "no data"
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.COLUMNS[section][1]
+        return super().headerData(section, orientation, role)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted:
+            return
+        rows = self._fetch_page()
+        if not rows:
+            return
+        start = len(self._rows)
+        self.beginInsertRows(QModelIndex(), start, start + len(rows) - 1)
+        self._rows.extend(rows)
+        self.endInsertRows()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.sort_column = column
+        self.sort_order = order
+        self.rank_order = False
+        self._refetch()
@@ -0,0 +1,86 @@
+from PySide6.QtCore import QTimer
+from PySide6.QtWidgets import (
+    QCheckBox, QDialog, QFileDialog, QHBoxLayout, QHeaderView, QLabel, QPushButton,
+    QTableWidget, QTableWidgetItem, QVBoxLayout
+)
+
+from ..tracing import tracer
+
+CHROME_FILTER = "Chrome trace (*.json)"
+SUMMARY_FILTER = "Summary JSON (*.json)"
+
+
+class PerfPanel(QDialog):
+    """
+    Rolling p50/p95 per traced stage (see tracing.py), refreshed every
+    second, with a switch for tracing and export to a file, and the hit rate
+    of each cache in caches ({name: object with a stats() dict holding hits,
+    misses and bytes}). Non-modal, so it can stay open next to the main window.
+    """
+
+    COLUMNS = ("Stage", "Count", "p50 ms", "p95 ms", "Max ms")
+
+    def __init__(self, parent=None, caches=None):
+        super().__init__(parent)
+        self.caches = caches or {}
+        self.setWindowTitle("Performance")
+        self.resize(560, 480)
+        layout = QVBoxLayout(self)
+        self.chk_enabled = QCheckBox("Record timings")
+        self.chk_enabled.setChecked(tracer.enabled)
+        self.chk_enabled.toggled.connect(self.set_enabled)
+        layout.addWidget(self.chk_enabled)
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.table)
+        self.lbl_caches = QLabel()
+        self.lbl_caches.setVisible(bool(self.caches))
+        layout.addWidget(self.lbl_caches)
+        buttons = QHBoxLayout()
+        btn_clear = QPushButton("Clear")
+        btn_clear.clicked.connect(self.clear)
+        btn_export = QPushButton("Export...")
+        btn_export.clicked.connect(self.export)
+        buttons.addWidget(btn_clear)
+        buttons.addStretch()
+        buttons.addWidget(btn_export)
+        layout.addLayout(buttons)
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(1000)
+        self.refresh()
+
+    def set_enabled(self, enabled):
+        tracer.enabled = enabled
+
+    def clear(self):
+        tracer.clear()
+        self.refresh()
+
+    def refresh(self):
+        stats = tracer.stats()
+        self.table.setRowCount(len(stats))
+        for row, (name, s) in enumerate(stats.items()):
+            values = (name, str(s["count"]), f"{s['p50']:.1f}", f"{s['p95']:.1f}", f"{s['max']:.1f}")
+            for col, value in enumerate(values):
+                item = self.table.item(row, col)
+                if item is None:
+                    self.table.setItem(row, col, QTableWidgetItem(value))
+                else:
+                    item.setText(value)
+        lines = []
+        for name, cache in self.caches.items():
+            s = cache.stats()
+            lookups = s["hits"] + s["misses"]
+            rate = f"{s['hits'] / lookups:.0%}" if lookups else "-"
+            lines.append(f"{name}: {rate} hits ({s['hits']} of {lookups}), {s['bytes'] / 2 ** 20:.0f} MB")
+        self.lbl_caches.setText("\n".join(lines))
+
+    def export(self):
+        path, selected = QFileDialog.getSaveFileName(
+            self, "Export Timings", "trace.json", f"{CHROME_FILTER};;{SUMMARY_FILTER}")
+        if path:
+            tracer.export(path, chrome=selected != SUMMARY_FILTER)
@@ -0,0 +1,148 @@
+import json
+import threading
+from collections import OrderedDict
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+from PySide6.QtWidgets import QGraphicsScene
+
+from ..config import SCENE_CACHE_MB
+from ..tracing import span
+from .overlay import DetectionOverlayItem
+from .tiles import TiledImageItem, decode_base
+
+
+def build_scene(img_path, boxes, base=None, parent=None):
+    """
+    (scene, image item, overlay) for one X-ray: one scene shared by both
+    viewers, the original viewer skipping the overlay (show_overlays off).
+    """
+    scene = QGraphicsScene(parent)
+    with span("show_xray.decode"):
+        image = TiledImageItem(img_path, base)
+    scene.addItem(image)
+    with span("show_xray.overlay"):
+        overlay = DetectionOverlayItem(boxes)
+    scene.addItem(overlay)
+    return scene, image, overlay
+
+
+class _DecodeJob(QRunnable):
+    def __init__(self, prefetcher, xray_id, img_path, pred_json):
+        super().__init__()
+        self.prefetcher = prefetcher
+        self.xray_id = xray_id
+        self.img_path = img_path
+        self.pred_json = pred_json
+
+    def run(self):
+        base = boxes = None
+        if not self.prefetcher.stopped.is_set():
+            try:
+                with span("prefetch.decode"):
+                    base = decode_base(self.img_path)
+                    boxes = json.loads(self.pred_json)
+            except Exception:
+                pass
+        self.prefetcher._decoded(self.xray_id, self.img_path, self.pred_json, base, boxes)
+
+
+class XrayPrefetcher(QObject):
+    """
+    Scenes of X-rays ready to show, by xray id, least recently shown evicted
+    first once their images take more than max_bytes. prefetch() decodes
+    images and parses predictions on a background thread; the scenes are put
+    together on the GUI thread as they arrive. An entry only counts as a hit
+    while its file and prediction are unchanged, and the pinned (shown)
+    entry is never evicted.
+    """
+
+    decoded = Signal(object, str, str, object, object)   # xray id, path, prediction JSON, base, boxes
+
+    def __init__(self, parent=None, max_bytes=SCENE_CACHE_MB << 20):
+        super().__init__(parent)
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.pinned = None
+        self.hits = 0
+        self.misses = 0
+        self.prefetched = 0
+        self.evicted = 0
+        self._entries = OrderedDict()
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self._pending = set()
+        self._lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.decoded.connect(self._on_decoded)
+
+    def _valid(self, xray_id, img_path, pred_json):
+        entry = self._entries.get(xray_id)
+        return entry is not None and entry[0] == img_path and entry[1] == pred_json
+
+    def take(self, xray_id, img_path, pred_json):
+        """The cached (scene, image item, overlay) of an X-ray, or None."""
+        if not self._valid(xray_id, img_path, pred_json):
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(xray_id)
+        return self._entries[xray_id][2]
+
+    def add(self, xray_id, img_path, pred_json, built):
+        """Keep a scene built elsewhere (after a miss) for the next time."""
+        self._drop(xray_id)
+        image = built[1]
+        size = image.base.width() * image.base.height() * image.base.depth() // 8
+        self._entries[xray_id] = (img_path, pred_json, built, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            victim = next((k for k in self._entries if k != self.pinned and k != xray_id), None)
+            if victim is None:
+                break
+            self._drop(victim)
+            self.evicted += 1
+
+    def pin(self, xray_id):
+        self.pinned = xray_id
+
+    def holds(self, scene):
+        return any(entry[2][0] is scene for entry in self._entries.values())
+
+    def _drop(self, xray_id):
+        entry = self._entries.pop(xray_id, None)
+        if entry is not None:
+            self.bytes -= entry[3]
+            if xray_id != self.pinned:
+                entry[2][0].deleteLater()
+
+    def prefetch(self, rows):
+        """Prepare (xray id, path, prediction JSON) rows, the most likely next first."""
+        for order, (xray_id, img_path, pred_json) in enumerate(rows):
+            if self._valid(xray_id, img_path, pred_json):
+                continue
+            with self._lock:
+                if self.stopped.is_set() or xray_id in self._pending:
+                    continue
+                self._pending.add(xray_id)
+            self.pool.start(_DecodeJob(self, xray_id, img_path, pred_json), -order)
+
+    def _decoded(self, xray_id, img_path, pred_json, base, boxes):
+        # pool thread: the scene is built on the GUI thread
+        with self._lock:
+            self._pending.discard(xray_id)
+        if base is not None and not self.stopped.is_set():
+            self.decoded.emit(xray_id, img_path, pred_json, base, boxes)
+
+    def _on_decoded(self, xray_id, img_path, pred_json, base, boxes):
+        if self._valid(xray_id, img_path, pred_json) or xray_id == self.pinned:
+            return
+        self.add(xray_id, img_path, pred_json, build_scene(img_path, boxes, base, self.parent()))
+        self.prefetched += 1
+
+    def stop(self):
+        self.stopped.set()
+        self.pool.clear()
+
+    def stats(self):
+        return {"scenes": len(self._entries), "bytes": self.bytes, "hits": self.hits, "misses": self.misses,
+                "prefetched": self.prefetched, "evicted": self.evicted}
@@ -0,0 +1,60 @@
+import threading
+
+from PySide6.QtCore import QObject, QRunnable, QSize, QThreadPool, Qt, Signal
+from PySide6.QtGui import QImage, QImageReader
+
+from ..config import THUMBNAIL_SIZE
+from ..previews import generate_previews, preview_path
+from ..tracing import span
+
+
+class _ThumbnailJob(QRunnable):
+    def __init__(self, loader, key, img_path):
+        super().__init__()
+        self.loader = loader
+        self.key = key
+        self.img_path = img_path
+
+    def run(self):
+        if self.loader.stopped.is_set():
+            return
+        with span("history.thumbnail"):
+            image = self.load()
+        if not self.loader.stopped.is_set():
+            self.loader.loaded.emit(self.key, image)
+
+    def load(self):
+        thumb = preview_path(self.img_path, "thumb")
+        try:
+            generate_previews(self.img_path)
+            image = QImage(thumb)
+        except Exception:
+            image = QImage()
+        if image.isNull():
+            # no previews (e.g. Pillow missing): let Qt decode at thumbnail size
+            reader = QImageReader(self.img_path)
+            size = reader.size()
+            if size.isValid():
+                reader.setScaledSize(size.scaled(QSize(THUMBNAIL_SIZE, THUMBNAIL_SIZE), Qt.KeepAspectRatio))
+            image = reader.read()
+        return image
+
+
+class ThumbnailLoader(QObject):
+    """
+    Loads thumbnails on the global thread pool, creating missing previews on
+    the way. Results arrive on the GUI thread through loaded(key, QImage).
+    Keep it unparented and call stop() when the receiving widget goes away.
+    """
+
+    loaded = Signal(object, QImage)
+
+    def __init__(self):
+        super().__init__()
+        self.stopped = threading.Event()
+
+    def load(self, key, img_path):
+        QThreadPool.globalInstance().start(_ThumbnailJob(self, key, img_path))
+
+    def stop(self):
+        self.stopped.set()
@@ -0,0 +1,258 @@
+import itertools
+import math
+import os
+import threading
+from collections import OrderedDict
+
+from PySide6.QtCore import QObject, QRectF, QRunnable, QThreadPool, Signal
+from PySide6.QtGui import QImage, QImageReader, QPainter, QPixmap
+from PySide6.QtWidgets import QGraphicsItem, QGraphicsObject
+
+from ..config import TILE_CACHE_MB
+from ..previews import generate_tiles, preview_path, read_tile_manifest, tile_path
+from ..tracing import span
+
+
+class TileCache:
+    """
+    Decoded tiles (QPixmaps) of every open X-ray, least recently drawn
+    evicted first once they take more than max_bytes. GUI thread only.
+    """
+
+    def __init__(self, max_bytes=TILE_CACHE_MB << 20):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._tiles = OrderedDict()
+
+    def get(self, key):
+        pixmap = self._tiles.get(key)
+        if pixmap is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._tiles.move_to_end(key)
+        return pixmap
+
+    def peek(self, key):
+        """Like get(), without counting or refreshing the tile (for stand-ins)."""
+        return self._tiles.get(key)
+
+    def put(self, key, pixmap):
+        old = self._tiles.pop(key, None)
+        if old is not None:
+            self.bytes -= _pixmap_bytes(old)
+        self._tiles[key] = pixmap
+        self.bytes += _pixmap_bytes(pixmap)
+        while self.bytes > self.max_bytes and len(self._tiles) > 1:
+            _, evicted = self._tiles.popitem(last=False)
+            self.bytes -= _pixmap_bytes(evicted)
+
+    def clear(self):
+        self._tiles.clear()
+        self.bytes = 0
+
+    def stats(self):
+        return {"tiles": len(self._tiles), "bytes": self.bytes, "hits": self.hits, "misses": self.misses}
+
+
+def _pixmap_bytes(pixmap):
+    return pixmap.width() * pixmap.height() * pixmap.depth() // 8
+
+
+class _TileJob(QRunnable):
+    def __init__(self, loader, key):
+        super().__init__()
+        self.loader = loader
+        self.key = key
+
+    def run(self):
+        img_path, level, col, row = self.key
+        with span("view.tile_decode"):
+            image = QImage(tile_path(img_path, level, col, row))
+        self.loader._done(self.key, image)
+
+
+class _PyramidJob(QRunnable):
+    def __init__(self, loader, img_path):
+        super().__init__()
+        self.loader = loader
+        self.img_path = img_path
+
+    def run(self):
+        try:
+            generate_tiles(self.img_path)
+        except Exception:
+            pass
+        self.loader._pyramid_done(self.img_path)
+
+
+class TileLoader(QObject):
+    """
+    Decodes tiles (and builds missing tile pyramids) on a private thread
+    pool. The newest request runs first, so after a fast pan or zoom the
+    tiles now on screen come before the ones scrolled past. Results arrive
+    on the GUI thread through tile_loaded / pyramid_ready; call stop() before
+    the application quits.
+    """
+
+    tile_loaded = Signal(object, QImage)   # (img_path, level, col, row), decoded tile
+    pyramid_ready = Signal(str)            # img_path
+
+    def __init__(self, threads=2):
+        super().__init__()
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(threads)
+        self._order = itertools.count()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self.stopped = threading.Event()
+
+    def _claim(self, key):
+        with self._lock:
+            if key in self._pending:
+                return False
+            self._pending.add(key)
+            return True
+
+    def request(self, key):
+        if not self.stopped.is_set() and self._claim(key):
+            self.pool.start(_TileJob(self, key), next(self._order))
+
+    def request_pyramid(self, img_path):
+        if not self.stopped.is_set() and self._claim(img_path):
+            self.pool.start(_PyramidJob(self, img_path), -1)
+
+    def stop(self):
+        """Drop queued requests and silence the running ones."""
+        self.stopped.set()
+        self.pool.clear()
+
+    def _done(self, key, image):
+        with self._lock:
+            self._pending.discard(key)
+        if not self.stopped.is_set():
+            self.tile_loaded.emit(key, image)
+
+    def _pyramid_done(self, img_path):
+        with self._lock:
+            self._pending.discard(img_path)
+        if not self.stopped.is_set():
+            self.pyramid_ready.emit(img_path)
+
+
+tile_cache = TileCache()
+tile_loader = TileLoader()
+
+
+def decode_base(img_path):
+    """
+    (QImage, full size) TiledImageItem starts from: the screen-sized preview
+    when there is one smaller than the file, else the whole file. Safe to
+    call off the GUI thread.
+    """
+    size = QImageReader(img_path).size()
+    preview = preview_path(img_path, "preview")
+    image = QImage(preview) if os.path.exists(preview) and size.isValid() else QImage()
+    if image.isNull() or image.width() >= size.width():
+        # small image (or no previews): the whole file is the preview
+        image = QImage(img_path)
+        size = image.size()
+    return image, size
+
+
+class TiledImageItem(QGraphicsObject):
+    """
+    Shows an X-ray in full-image coordinates from its screen-sized preview
+    and, once the view zooms in past the preview's resolution, from tiles of
+    the pyramid level matching the zoom (see previews.generate_tiles). Only
+    tiles in the exposed area are decoded, in the background, into the
+    shared tile_cache; until a tile arrives a coarser cached one or the
+    preview stands in for it. base is decode_base()'s result, if already at hand.
+    """
+
+    def __init__(self, img_path, base=None, cache=tile_cache, loader=tile_loader, parent=None):
+        super().__init__(parent)
+        self.img_path = img_path
+        self.cache = cache
+        self.loader = loader
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption)
+        image, size = base or decode_base(img_path)
+        pix = QPixmap.fromImage(image)
+        self.base = pix
+        self.width, self.height = size.width(), size.height()
+        self.base_scale = self.width / pix.width() if pix.width() else 1.0
+        self.manifest = read_tile_manifest(img_path) if self.base_scale > 1 else None
+        self.pyramid_requested = False
+        loader.tile_loaded.connect(self._on_tile)
+        loader.pyramid_ready.connect(self._on_pyramid)
+
+    def boundingRect(self):
+        return QRectF(0, 0, self.width, self.height)
+
+    def paint(self, painter, option, widget=None):
+        exposed = option.exposedRect.intersected(self.boundingRect())
+        if exposed.isEmpty() or self.base.isNull():
+            return
+        painter.setRenderHint(QPainter.SmoothPixmapTransform)
+        s = self.base_scale
+        painter.drawPixmap(exposed, self.base, QRectF(exposed.x() / s, exposed.y() / s,
+                                                      exposed.width() / s, exposed.height() / s))
+        # screen pixels per image pixel; tiles only help once the preview is magnified
+        lod = option.levelOfDetailFromTransform(painter.worldTransform())
+        if lod * s <= 1.0:
+            return
+        if self.manifest is None:
+            if not self.pyramid_requested:
+                self.pyramid_requested = True
+                self.loader.request_pyramid(self.img_path)
+            return
+        levels, tile = self.manifest["levels"], self.manifest["tile"]
+        level = min(levels - 1, max(0, math.floor(math.log2(1 / lod)))) if lod < 1 else 0
+        span_px = tile << level
+        cols = range(int(exposed.left()) // span_px, math.ceil(exposed.right() / span_px))
+        rows = range(int(exposed.top()) // span_px, math.ceil(exposed.bottom() / span_px))
+        ready, stand_ins = [], {}
+        for row in rows:
+            for col in cols:
+                key = (self.img_path, level, col, row)
+                pixmap = self.cache.get(key)
+                if pixmap is not None:
+                    ready.append((key, pixmap))
+                    continue
+                self.loader.request(key)
+                for coarser in range(level + 1, levels):
+                    shift = coarser - level
+                    parent = (self.img_path, coarser, col >> shift, row >> shift)
+                    pixmap = self.cache.peek(parent)
+                    if pixmap is not None:
+                        stand_ins[parent] = pixmap
+                        break
+        for key, pixmap in list(stand_ins.items()) + ready:
+            self._draw_tile(painter, key, pixmap, tile)
+
+    @staticmethod
+    def _draw_tile(painter, key, pixmap, tile):
+        _, level, col, row = key
+        scale = 1 << level
+        painter.drawPixmap(QRectF(col * tile * scale, row * tile * scale,
+                                  pixmap.width() * scale, pixmap.height() * scale),
+                           pixmap, QRectF(pixmap.rect()))
+
+    def _on_tile(self, key, image):
+        if key[0] != self.img_path or image.isNull():
+            return
+        if self.cache.peek(key) is None:
+            self.cache.put(key, QPixmap.fromImage(image))
+        if self.manifest is None:
+            return
+        _, level, col, row = key
+        span_px = self.manifest["tile"] << level
+        self.update(QRectF(col * span_px, row * span_px, span_px, span_px))
+
+    def _on_pyramid(self, img_path):
+        if img_path == self.img_path:
+            self.manifest = read_tile_manifest(img_path)
+            if self.manifest is not None:
+                self.update()